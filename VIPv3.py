@@ -1,11 +1,28 @@
 # app.py
+import html
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import pandas as pd
+import numpy as np
 from pathlib import Path
-from datetime import datetime, date, timedelta
-from base64 import b64encode
-import mimetypes
-import random
+from datetime import datetime, date
+from functools import partial, wraps
+
+from vip import broadcast, db, export, ingest, perf, timeseries
+from vip.availability import DEMO_SEED, get_availability, seed_demo
+from vip.anonymize import DEFAULT_K, exportable
+from vip.assets import picture_html
+from vip.ledger import get_ledger
+from vip.marketplace import get_marketplace
+from vip.rfps import get_rfp_history
+from vip.seeds import SHARED_SEEDS
+from vip.shared import Overlay, SharedTable, memory_report
+
+# tempos de carga de dados por rerun (acertos de cache incluídos) -> seção Performance
+get_marketplace = perf.timed("load", "marketplace")(get_marketplace)
+get_ledger = perf.timed("load", "ledger")(get_ledger)
+get_rfp_history = perf.timed("load", "rfp_history")(get_rfp_history)
+get_availability = perf.timed("load", "availability")(get_availability)
 
 # -------------------------------------------------------------
 # VIP – Landing + Auth + Dashboard(Unificado: Dashboard + Admin)
@@ -23,8 +40,6 @@ st.set_page_config(
 # =====================
 if "route" not in st.session_state:
     st.session_state.route = "landing"
-if "users" not in st.session_state:
-    st.session_state.users = {}
 if "current_user" not in st.session_state:
     st.session_state.current_user = None
 
@@ -44,62 +59,31 @@ ADMIN_SECTIONS = [
     ("🚀 Promo/Boost", "admin_promo"),
     ("📦 Data Clients", "admin_clients"),
     ("📊 Site Charts", "admin_site"),
+    ("🗃️ Catalog Import", "admin_catalog"),
+    ("⏱️ Performance", "admin_perf"),
 ]
 if "main_section" not in st.session_state:
     st.session_state.main_section = DASH_SECTIONS[0][1]  # default: marketplace
 
+perf.begin_run(st.session_state, st.session_state.route)
+
 # =====================
-#   SEEDS
+#   STORAGE
 # =====================
-def _seed_notifications():
-    return [
-        {"id": 1, "title": "Payment confirmed",     "body": "Catering - $500 received.",       "ts": "2025-09-19 16:05", "ntype": "success", "read": True},
-        {"id": 2, "title": "RFP response received", "body": "Vertex 161 sent a proposal.",     "ts": "2025-09-22 10:12", "ntype": "info",    "read": False},
-        {"id": 3, "title": "New message",           "body": "Venue Harbor replied in chat.",   "ts": "2025-09-18 09:21", "ntype": "message", "read": False},
-    ]
-def _seed_transactions():
-    return pd.DataFrame(
-        [
-            ["2025-09-10", "Harbor 412",  "Venue Booking",     300, "Completed", "TXN-001"],
-            ["2025-09-12", "Helix 238",   "AV Support",        150, "Completed", "TXN-002"],
-            ["2025-09-15", "Radiant 179", "Catering Deposit",  500, "Pending",   "TXN-003"],
-            ["2025-09-18", "Vertex 161",  "Photography",       150, "Refunded",  "TXN-004"],
-            ["2025-09-20", "Harbor 412",  "Venue Balance",     450, "Completed", "TXN-005"],
-            ["2025-09-22", "Helix 238",   "Lighting",          220, "Completed", "TXN-006"],
-        ],
-        columns=["date", "counterparty", "service", "amount", "status", "ref"],
-    )
-def _seed_mail():
-    return {
-        "Inbox": [
-            {"id": 101, "title": "Quote for AV package", "from": "Helix 238", "preview": "We can offer...", "msgs": [
-                {"by":"Helix 238","ts":"2025-09-21 10:02","text":"We can offer AV package for $150."},
-                {"by":"You","ts":"2025-09-21 10:10","text":"Thanks! Can you include microphones?"}
-            ]},
-            {"id": 102, "title": "Venue Harbor availability", "from": "Harbor 412", "preview": "Available on 10/15", "msgs":[
-                {"by":"Harbor 412","ts":"2025-09-20 14:01","text":"We are available on 10/15."}
-            ]},
-        ],
-        "Sent": [
-            {"id": 201, "title": "Follow-up: Photography", "from": "Vertex 161", "preview": "Sharing brief...", "msgs":[
-                {"by":"You","ts":"2025-09-18 16:00","text":"Sharing brief for photography needs."}
-            ]},
-        ],
-        "Archived": []
-    }
-
-if "notifications" not in st.session_state:
-    st.session_state.notifications = _seed_notifications()
-if "transactions" not in st.session_state:
-    st.session_state.transactions = _seed_transactions()
-if "rfp_history" not in st.session_state:
-    st.session_state.rfp_history = []
-if "mail" not in st.session_state:
-    st.session_state.mail = _seed_mail()
+# usuários, transações, RFPs, notificações e mensagens ficam no SQLite (vip/db.py),
+# compartilhados entre sessões; aqui só o estado de UI da sessão
+@st.cache_resource
+def _init_store():
+    db.ensure_admin()
+    db.seed_broadcasts()
+    broadcast.get_dispatcher()  # retoma entregas pendentes
+    return True
+_init_store()
+
 if "mail_folder" not in st.session_state:
     st.session_state.mail_folder = "Inbox"
 if "mail_thread" not in st.session_state:
-    st.session_state.mail_thread = st.session_state.mail["Inbox"][0]["id"] if st.session_state.mail["Inbox"] else None
+    st.session_state.mail_thread = None
 
 # =====================
 # CONSTANTS / PATHS
@@ -109,6 +93,7 @@ ADMIN_ROLE = "Admin"
 
 ROOT = Path(__file__).resolve().parent
 LOGO_PATH = ROOT / "assets" / "logo.png"
+STATIC_DIR = ROOT / "static"   # variantes geradas do logo (servidas em /app/static)
 DATA_PATH = ROOT / "data" / "marketplace_clean_numeric.csv"
 
 # =====================
@@ -139,16 +124,14 @@ st.markdown(
 # =====================
 # HELPERS
 # =====================
-def render_centered_image(path: str, max_width_px: int = 900):
-    p = Path(path)
-    if p.exists():
-        data = p.read_bytes()
-        mime = mimetypes.guess_type(p.name)[0] or "image/png"
-        b64 = b64encode(data).decode()
+def render_centered_image(path: str, max_width_px: int = 900, lazy: bool = False):
+    img = picture_html(path, STATIC_DIR, max_width_px, static=bool(st.get_option("server.enableStaticServing")),
+                       lazy=lazy)
+    if img:
         st.markdown(
             f"""
             <div style="display:flex;justify-content:center;align-items:center;width:100%;margin:18px 0;">
-              <img src="data:{mime};base64,{b64}" style="max-width:{max_width_px}px;width:100%;height:auto;border-radius:6px;" />
+              {img}
             </div>
             """,
             unsafe_allow_html=True,
@@ -167,101 +150,146 @@ def nav(route: str):
     st.session_state["route"] = route
     st.rerun()
 
+def rerun_section():
+    """Reexecuta só a seção atual (fragmento); numa execução completa do script, o app."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+def go(route: str):
+    """Callback de navegação (on_click): troca a rota antes do rerun do clique, sem um segundo rerun."""
+    st.session_state["route"] = route
+
 def request_nav(route: str):
     st.session_state["route"] = route
     st.session_state["_pending_nav"] = True
 
 def create_user(username, password, role, full_name="", contact=""):
-    key = (username or "").strip().lower()
-    if not key:
-        return False, "Username is required."
-    if key in st.session_state.users:
-        return False, "An account with this username already exists."
-    st.session_state.users[key] = {
-        "password": password or "",
-        "full_name": (full_name or "").strip(),
-        "contact": (contact or "").strip(),
-        "role": role,
-        "status": "Active",
-    }
-    return True, "Account created successfully."
+    return db.create_user(username, password, role, full_name, contact)
 
 def authenticate(username, password):
-    key = (username or "").strip().lower()
-    user = st.session_state.users.get(key)
-    if not user:
-        return False, "No account found with this username."
-    if user["password"] != (password or ""):
-        return False, "Incorrect password."
-    st.session_state.current_user = {"username": key, **user}
-    return True, "Login successful."
+    ok, msg, user = db.authenticate(username, password)
+    if ok:
+        st.session_state.current_user = user
+    return ok, msg
+
+def current_username():
+    user = st.session_state.current_user
+    return user["username"] if user else None
 
 def logout():
     st.session_state.current_user = None
-    nav("landing")
+    go("landing")
+
+def _clear_bell(username):
+    db.mark_all_read(username)
+    st.session_state.notif_badge_cleared = True
 
 def unread_count() -> int:
-    return sum(1 for n in st.session_state.notifications if not n.get("read", False))
+    return db.unread_count(current_username())
 
 # =====================
 #  MARKETPLACE
 # =====================
 def _safe_read_marketplace(path: str):
     try:
-        df = pd.read_csv(path)
-        return df, None
+        return get_marketplace(path), None
     except Exception as e:
         return None, str(e)
 
+MARKET_SORTS = {
+    "Best match": ("best", True),     # ranking ponderado (vip/ranking.py)
+    "Relevance / default": (None, False),
+    "Price (low → high)": ("price", False),
+    "Price (high → low)": ("price", True),
+    "Rating (high → low)": ("rating", True),
+    "Capacity (high → low)": ("capacity", True),
+}
+MARKET_PAGE_SIZES = [25, 50, 100]
+
+@st.cache_resource
+def _seed_bookings(path: str, digest: str):
+    # reservas de demonstração (só com VIP_DEMO_BOOKINGS=1), se o banco ainda não tiver nenhuma
+    ds = get_marketplace(path)
+    if "name" in ds.df.columns:
+        seed_demo(ds.df["name"].dropna().unique())
+    return True
+
 def render_marketplace():
     st.subheader("🔎 Search & Filter Marketplace")
-    df, err = _safe_read_marketplace(DATA_PATH)
-    if err or df is None:
+    ds, err = _safe_read_marketplace(DATA_PATH)
+    if err or ds is None:
         st.error(f"Could not load marketplace data: {err or 'Unknown error'}")
         return
-
-    if "rating" in df.columns:
-        df["rating"] = df["rating"].round(1)
+    df = ds.df
+    if DEMO_SEED:
+        _seed_bookings(DATA_PATH, ds.digest)
 
     c1, c2, c3 = st.columns(3)
     with c1:
-        type_filter = st.selectbox("Type", ["All"] + sorted(df["type"].dropna().unique().tolist()) if "type" in df.columns else ["All"])
+        type_filter = st.selectbox("Type", ["All"] + ds.options.get("type", []))
     with c2:
-        city_filter = st.selectbox("City", ["All"] + sorted(df["city"].dropna().unique().tolist()) if "city" in df.columns else ["All"])
+        city_filter = st.selectbox("City", ["All"] + ds.options.get("city", []))
     with c3:
-        category_filter = st.selectbox("Category", ["All"] + sorted(df["category"].dropna().unique().tolist()) if "category" in df.columns else ["All"])
+        category_filter = st.selectbox("Category", ["All"] + ds.options.get("category", []))
 
-    if "price" in df.columns and pd.api.types.is_numeric_dtype(df["price"]):
-        price_min, price_max = int(df["price"].min()), int(df["price"].max())
+    if ds.price_bounds:
+        price_min, price_max = ds.price_bounds
         sel_price = st.slider("Price range (USD)", price_min, price_max, (price_min, price_max), step=10)
     else:
         sel_price = (0, 10**9)
 
     q = st.text_input("Search by name or category")
+    avail = st.date_input("Available on (date or range, optional)", value=(), min_value=date.today())
+
+
+    # filtros indexados + busca textual (ranqueada, tolera erros de digitação)
+    row_ids = ds.query(
+        {"type": type_filter, "city": city_filter, "category": category_filter},
+        price_range=sel_price,
+        text=q,
+    )
+    if avail:
+        # tira os listings com reserva/hold em qualquer dia do período (índice de intervalos)
+        busy = get_availability().busy(avail[0], avail[-1])
+        row_ids = row_ids[~np.isin(row_ids, ds.rows_for_names(busy))]
+
+    # paginação/ordenação no servidor: só a página visível vai para o browser
+    s1, s2, s3 = st.columns([2, 1, 1])
+    with s1:
+        sort_label = st.selectbox("Sort by", list(MARKET_SORTS))
+    with s2:
+        page_size = st.selectbox("Page size", MARKET_PAGE_SIZES)
+    budget = attendees = None
+    if MARKET_SORTS[sort_label][0] == "best":
+        r1, r2 = st.columns(2)
+        budget = r1.number_input("Your budget (USD, 0 = any)", min_value=0, value=0, step=50) or None
+        attendees = r2.number_input("Expected attendees (0 = any)", min_value=0, value=0, step=10) or None
+    total = int(row_ids.size)
+    n_pages = max(1, -(-total // page_size))
+    sig = (type_filter, city_filter, category_filter, tuple(sel_price), q, tuple(avail), sort_label, page_size,
+           budget, attendees)
+    if st.session_state.get("_mk_sig") != sig:
+        st.session_state["_mk_sig"] = sig
+        st.session_state["mk_page"] = 1
+    with s3:
+        page_no = st.number_input("Page", min_value=1, max_value=n_pages, step=1, key="mk_page")
+    sort_by, descending = MARKET_SORTS[sort_label]
+    if sort_by == "best":
+        page_ids = ds.rank_page(row_ids, page=int(page_no) - 1, page_size=page_size,
+                                budget=budget, attendees=attendees, text=q)
+    else:
+        page_ids = ds.sort_page(row_ids, sort_by, descending, page=int(page_no) - 1, page_size=page_size)
+    results = df.iloc[page_ids]
+
+    first = (int(page_no) - 1) * page_size
+    st.caption(f"Showing {first + 1 if total else 0}–{first + len(page_ids)} of {total} results")
+    df_display = ds.display_frame(page_ids)
+    st.dataframe(df_display, use_container_width=True)
 
-    results = df.copy()
-    if "type" in results.columns and type_filter != "All":
-        results = results[results["type"] == type_filter]
-    if "city" in results.columns and city_filter != "All":
-        results = results[results["city"] == city_filter]
-    if "category" in results.columns and category_filter != "All":
-        results = results[results["category"] == category_filter]
-    if "price" in results.columns and pd.api.types.is_numeric_dtype(results["price"]):
-        results = results[(results["price"] >= sel_price[0]) & (results["price"] <= sel_price[1])]
-
-    if q:
-        ql = q.lower()
-        name_mask = results["name"].astype(str).str.lower().str.contains(ql, na=False) if "name" in results.columns else False
-        cat_mask = results["category"].astype(str).str.lower().str.contains(ql, na=False) if "category" in results.columns else False
-        results = results[name_mask | cat_mask]
-
-    display_cols = [c for c in ["name","category","city","capacity","price","rating","contact_email","type"] if c in results.columns]
-    df_display = results[display_cols].copy()
-    if "rating" in df_display.columns:
-        df_display["rating"] = df_display["rating"].astype(str) + " ⭐"
-    st.dataframe(df_display.reset_index(drop=True), use_container_width=True)
-
-    selected_name = st.selectbox("Select an entry for RFP:", ["None"] + (df_display["name"].tolist() if "name" in df_display.columns else []))
+    # picker de RFP limitado à página atual
+    selected_name = st.selectbox("Select an entry for RFP (current page):", ["None"] + (df_display["name"].tolist() if "name" in df_display.columns else []))
     if selected_name != "None":
         item = results[results["name"] == selected_name].iloc[0].to_dict()
         st.success(f"Selected: {item['name']} ({item.get('type','—')}) in {item.get('city','—')} • ${item.get('price','—')}")
@@ -286,6 +314,10 @@ def render_rfp(with_topbar: bool = True):
             f"({item.get('type','—')}, {item.get('category','—')}) in **{item.get('city','—')}** — "
             f"Capacity: {item.get('capacity','—')} • Price: ${item.get('price','—')} • Contact: {item.get('contact_email','—')}"
         )
+        booked = get_availability().upcoming(item["name"], limit=5)
+        if booked:
+            st.caption("Already booked/held: " + ", ".join(
+                str(a) if a == b else f"{a} → {b}" for a, b in booked))
 
     v = st.session_state.get("rfp_form_version", 0)
     if "rfp_prefilled" not in st.session_state and item:
@@ -294,16 +326,25 @@ def render_rfp(with_topbar: bool = True):
     else:
         default_title = ""
 
-    with st.form(f"rfp_form_{v}", clear_on_submit=True):
+    # sem clear_on_submit: se a data conflitar, o form volta com o que foi digitado
+    # (depois do envio a nova versão da chave já limpa os campos)
+    with st.form(f"rfp_form_{v}"):
         title     = st.text_input("Project Title", value=default_title, key=f"title_{v}")
         scope_txt = st.text_area("Scope / Requirements", value="", key=f"scope_{v}")
         date_in   = st.date_input("Target Date", key=f"date_{v}")
         budget    = st.text_input("Budget (USD)", value="", key=f"budget_{v}")
         files     = st.file_uploader("Attach Brief / Specs", accept_multiple_files=True, key=f"files_{v}")
+        force     = st.checkbox("Submit even if the date is unavailable", key=f"force_{v}") if item else False
         submitted = st.form_submit_button("Submit RFP")
 
-    if submitted:
-        st.session_state.rfp_history.insert(0, {
+    conflicts = get_availability().conflicts(item["name"], date_in) if submitted and item else []
+    if conflicts and not force:
+        free = get_availability().next_free(item["name"], date_in)
+        st.warning(f"⚠️ {item['name']} is already booked on {date_in} "
+                   f"({', '.join(f'{a} → {b}' for a, b in conflicts)}). Next free date: {free}. "
+                   "Pick another date or tick “Submit even if the date is unavailable”.")
+    elif submitted:
+        rfp_id = db.add_rfp(current_username(), {
             "submitted_at": datetime.now().strftime("%Y-%m-%d %H:%M"),
             "title": title or "(untitled)",
             "scope": scope_txt or "",
@@ -315,15 +356,16 @@ def render_rfp(with_topbar: bool = True):
             "target_contact": item.get('contact_email', '') if item else "",
             "price": item.get('price', '') if item else "",
         })
+        if item and not conflicts:
+            # segura a data do listing enquanto a RFP está em aberto
+            db.add_booking(item["name"], date_in, kind="hold", username=current_username(), rfp_id=rfp_id)
 
         # cria notificação + reexibe badge
-        new_id = max([n["id"] for n in st.session_state.notifications] + [0]) + 1
-        st.session_state.notifications.insert(0, {
-            "id": new_id, "title": "RFP submitted",
-            "body": f"Your RFP to {item['name'] if item else 'vendor'} was submitted.",
-            "ts": datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "ntype": "info", "read": False,
-        })
+        db.add_notification(
+            current_username(), "RFP submitted",
+            f"Your RFP to {item['name'] if item else 'vendor'} was submitted.",
+            ntype="info",
+        )
         st.session_state.notif_badge_cleared = False
 
         st.success("✅ RFP submitted successfully!")
@@ -336,139 +378,169 @@ def render_rfp(with_topbar: bool = True):
         st.rerun()
 
     st.divider()
-    if st.button("⬅️ Back to Marketplace"):
-        _reset_rfp_state()
-        nav("dashboard")
+    st.button("⬅️ Back to Marketplace", on_click=_leave_rfp)
+
+def _leave_rfp():
+    _reset_rfp_state()
+    go("dashboard")
+
+# =====================
+#  RFP HISTORY
+# =====================
+def render_rfp_history():
+    st.subheader("🗂️ RFP Submission History")
+    df = get_rfp_history().for_user(current_username())
+    if df.empty:
+        st.info("No RFP submissions yet.")
+    else:
+        cols = ["submitted_at","title","target_name","target_type","target_city","budget_usd","target_date","price","target_contact"]
+        st.dataframe(df[cols].reset_index(drop=True), use_container_width=True, column_config={
+            "submitted_at": st.column_config.DatetimeColumn("submitted_at", format="YYYY-MM-DD HH:mm"),
+            "target_date": st.column_config.DateColumn("target_date"),
+            "budget_usd": st.column_config.NumberColumn("budget", format="$%.0f"),
+            "price": st.column_config.NumberColumn("price", format="$%.0f"),
+        })
 
 # =====================
 #  TRANSACTIONS
 # =====================
 def render_transactions():
     st.subheader("💳 Transaction History")
-    df = st.session_state.transactions.copy()
+    ledger = get_ledger(current_username())
+    if not len(ledger):
+        st.info("No transactions yet.")
+        return
 
-    c1, c2, c3 = st.columns(3)
+    c1, c2, c3, c4 = st.columns([1, 1.2, 1.2, 1.4])
     with c1:
-        status = st.selectbox("Status", ["All"] + df["status"].unique().tolist())
+        status = st.selectbox("Status", ["All"] + ledger.statuses)
     with c2:
-        min_amt, max_amt = int(df["amount"].min()), int(df["amount"].max())
-        amt = st.slider("Amount range", min_amt, max_amt, (min_amt, max_amt), step=10)
+        min_amt, max_amt = ledger.amount_bounds
+        amt = st.slider("Amount range", min_amt, max(max_amt, min_amt + 10), (min_amt, max_amt), step=10)
     with c3:
+        d_min, d_max = ledger.date_bounds
+        period = st.date_input("Date range", value=(d_min, d_max)) if d_min else ()
+    with c4:
         q = st.text_input("Search (counterparty / service / ref)")
 
-    if status != "All":
-        df = df[df["status"] == status]
-    df = df[(df["amount"] >= amt[0]) & (df["amount"] <= amt[1])]
-    if q:
-        ql = q.lower()
-        df = df[df.apply(lambda r: ql in str(r["counterparty"]).lower() or
-                                   ql in str(r["service"]).lower() or
-                                   ql in str(r["ref"]).lower(), axis=1)]
-    st.dataframe(df.reset_index(drop=True), use_container_width=True)
+    # date_input devolve 1 data enquanto o usuário ainda escolhe o fim do intervalo
+    date_from = period[0] if len(period) > 0 else None
+    date_to = period[1] if len(period) > 1 else None
+    df = ledger.filter(status=status, amount=amt, q=q, date_from=date_from, date_to=date_to)
+    st.dataframe(df.reset_index(drop=True), use_container_width=True,
+                 column_config={"date": st.column_config.DateColumn("date", format="YYYY-MM-DD")})
 
 # =====================
 #  NOTIFICATIONS (center)
 # =====================
+NOTIF_PAGE = 20
+
 def render_notifications_center():
     st.subheader("🔔 Notification Center")
-    notifs = sorted(st.session_state.notifications, key=lambda n: n.get("ts",""), reverse=True)
-    if not notifs:
+    me = current_username()
+    unread, total = db.notification_counts(me)
+    if not total:
         st.info("No notifications yet.")
         return
-    for n in notifs:
+    st.caption(f"{total} notifications • {unread} unread")
+    # só as N mais recentes; "Load more" aumenta a janela
+    limit = st.session_state.get("notif_limit", NOTIF_PAGE)
+    for n in db.list_notifications(me, limit=limit):
         with st.container(border=True):
-            st.markdown(f"**{n.get('title','(no title)')}**  \n{n.get('body','')}  \n"
-                        f"<span class='muted'>{n.get('ts','')}</span>", unsafe_allow_html=True)
+            st.markdown(f"**{html.escape(n.get('title') or '(no title)')}**  \n{html.escape(n.get('body') or '')}  \n"
+                        f"<span class='muted'>{html.escape(n.get('ts') or '')}</span>", unsafe_allow_html=True)
+    if limit < total:
+        st.button(f"Load more ({total - limit} older)", key="notif-more",
+                  on_click=lambda: st.session_state.update(notif_limit=limit + NOTIF_PAGE))
 
 # =====================
 #  MESSAGING
 # =====================
+MSG_WINDOW = 30
+
+# callbacks rodam antes do rerun do próprio clique, então não precisam de st.rerun()
+def _open_folder(folder):
+    st.session_state.mail_folder = folder
+    threads = db.list_threads(current_username(), folder)
+    st.session_state.mail_thread = threads[0]["id"] if threads else None
+
+def _open_thread(thread_id):
+    st.session_state.mail_thread = thread_id
+
+def _load_older(thread_id):
+    windows = st.session_state.setdefault("mail_window", {})
+    windows[thread_id] = windows.get(thread_id, MSG_WINDOW) + MSG_WINDOW
+
+def _send_message(thread_id):
+    key = f"msg-input-{thread_id}"
+    db.add_message(thread_id, "You", st.session_state.get(key) or "(empty)")
+    st.session_state[key] = ""
+    st.session_state.mail_sent = thread_id
+
+def _bubble(m):
+    # texto vem do usuário e vai para markdown com HTML liberado: sempre escapado
+    text, ts = html.escape(m["text"] or ""), html.escape(str(m["ts"] or ""))
+    if m["by"] == "You":
+        return f"<div class='bubble-u'><b>You:</b> {text}<br><span class='muted'>{ts}</span></div>"
+    return f"<div class='bubble-a'><b>{html.escape(m['by'] or '')}:</b> {text}<br><span class='muted'>{ts}</span></div>"
+
 def render_messaging_center():
     st.subheader("💬 Chat / Messaging Center")
+    me = current_username()
     col_left, col_mid, col_right = st.columns([1.1, 1.6, 2.2], gap="large")
 
     with col_left:
         st.markdown("**Folders**")
-        for f in ["Inbox","Sent","Archived"]:
-            if st.button(("📥 " if f=="Inbox" else "📤 " if f=="Sent" else "🗂️ ") + f, key=f"folder-{f}", use_container_width=True):
-                st.session_state.mail_folder = f
-                threads = st.session_state.mail[f]
-                st.session_state.mail_thread = threads[0]["id"] if threads else None
-                st.rerun()
+        for f in db.MAIL_FOLDERS:
+            st.button(("📥 " if f=="Inbox" else "📤 " if f=="Sent" else "🗂️ ") + f, key=f"folder-{f}",
+                      use_container_width=True, on_click=_open_folder, args=(f,))
 
     with col_mid:
         st.markdown(f"**{st.session_state.mail_folder}**")
-        threads = st.session_state.mail[st.session_state.mail_folder]
+        threads = db.list_threads(me, st.session_state.mail_folder)
+        if st.session_state.mail_thread is None and threads:
+            st.session_state.mail_thread = threads[0]["id"]
         if not threads:
             st.info("No threads.")
         else:
             for th in threads:
-                btn = st.button(f"{th['title']} — {th['from']}\n{th['preview']}", key=f"thread-{th['id']}", use_container_width=True)
-                if btn:
-                    st.session_state.mail_thread = th["id"]
-                    st.rerun()
+                st.button(f"{th['title']} — {th['from']}\n{th['preview']}", key=f"thread-{th['id']}",
+                          use_container_width=True, on_click=_open_thread, args=(th["id"],))
 
     with col_right:
-        thobj = None
-        for th in threads:
-            if th["id"] == st.session_state.mail_thread:
-                thobj = th
-                break
-        if not thobj:
+        # busca direta pelo id (e dono) em vez de varrer a lista da pasta
+        tid = st.session_state.mail_thread
+        thobj = db.get_thread(tid, me) if tid is not None else None
+        if not thobj or thobj["folder"] != st.session_state.mail_folder:
             st.info("Select a thread to view the conversation.")
         else:
-            st.markdown(f"**{thobj['title']}**  \n<span class='muted'>From: {thobj['from']}</span>", unsafe_allow_html=True)
+            st.markdown(f"**{html.escape(thobj['title'] or '')}**  \n"
+                        f"<span class='muted'>From: {html.escape(thobj['from'] or '')}</span>", unsafe_allow_html=True)
+            # janela das K mais recentes; as antigas só sob demanda
+            window = st.session_state.get("mail_window", {}).get(tid, MSG_WINDOW)
+            older = thobj["count"] - window
             with st.container(border=True, height=360):
-                for m in thobj["msgs"]:
-                    if m["by"] == "You":
-                        st.markdown(f"<div class='bubble-u'><b>You:</b> {m['text']}<br><span class='muted'>{m['ts']}</span></div>", unsafe_allow_html=True)
-                    else:
-                        st.markdown(f"<div class='bubble-a'><b>{m['by']}:</b> {m['text']}<br><span class='muted'>{m['ts']}</span></div>", unsafe_allow_html=True)
-
-            new_msg = st.text_input("Type a message", key=f"msg-input-{st.session_state.mail_thread}")
-            if st.button("Send", key=f"send-{st.session_state.mail_thread}"):
-                thobj["msgs"].append({"by":"You","ts":datetime.now().strftime("%Y-%m-%d %H:%M"),"text":new_msg or "(empty)"})
+                if older > 0:
+                    st.button(f"Load older ({older})", key=f"older-{tid}", on_click=_load_older, args=(tid,))
+                msgs = db.thread_messages(tid, limit=window)
+                st.markdown("".join(_bubble(m) for m in msgs), unsafe_allow_html=True)
+
+            st.text_input("Type a message", key=f"msg-input-{tid}")
+            st.button("Send", key=f"send-{tid}", on_click=_send_message, args=(tid,))
+            if st.session_state.pop("mail_sent", None) == tid:
                 st.success("Message sent.")
-                st.rerun()
 
 # =====================
 #  ADMIN HELPERS / DATA
 # =====================
-def _seed_admin_disputes():
-    return [
-        {"id": 9001, "created":"2025-09-22 11:10", "type":"Payment", "from":"Helix 238",
-         "against":"Harbor 412", "summary":"Refund disagreement (TXN-004)", "status":"Open"},
-        {"id": 9002, "created":"2025-09-23 09:45", "type":"Content", "from":"Vertex 161",
-         "against":"Radiant 179", "summary":"Misleading portfolio images", "status":"Under review"},
-    ]
-def _seed_broadcast_log():
-    return [
-        {"sent_at":"2025-09-21 17:05", "segment":"All Vendors", "subject":"Platform maintenance",
-         "body":"Short notice: maintenance 02:00–03:00 UTC.", "via":"Email"}
-    ]
-def _seed_promo_campaigns():
-    return [
-        {"id":7001, "name":"October Spotlight", "segment":"Venues", "budget":200, "status":"Active"},
-        {"id":7002, "name":"Boost – Photography", "segment":"Vendors (Photography)", "budget":150, "status":"Paused"},
-    ]
-if "admin_disputes" not in st.session_state:
-    st.session_state.admin_disputes = _seed_admin_disputes()
-if "broadcast_log" not in st.session_state:
-    st.session_state.broadcast_log = _seed_broadcast_log()
-if "promo_campaigns" not in st.session_state:
-    st.session_state.promo_campaigns = _seed_promo_campaigns()
-if "data_clients" not in st.session_state:
-    st.session_state.data_clients = [
-        {"id":3001, "name":"Acme Insights", "plan":"Pro (Monthly)", "status":"Active"},
-        {"id":3002, "name":"CivicData", "plan":"Basic (Annual)", "status":"Trial"},
-    ]
-
-# Seed Admin user (usuario: admin, senha: admin)
-if "users" in st.session_state and "admin" not in st.session_state.users:
-    st.session_state.users["admin"] = {
-        "password": "admin", "full_name":"Platform Admin",
-        "contact":"admin@vip.local", "role": ADMIN_ROLE, "status": "Active"
-    }
+# disputas, campanhas e clientes B2B: uma cópia imutável por processo e, por
+# sessão, só um overlay copy-on-write com as mudanças daquela sessão
+@st.cache_resource
+def _shared_seeds():
+    return {name: SharedTable(fn()) for name, fn in SHARED_SEEDS.items()}
+for _name, _table in _shared_seeds().items():
+    if _name not in st.session_state:
+        st.session_state[_name] = Overlay(_table)
 
 TAB_DESC = {
     # dashboard
@@ -485,62 +557,97 @@ TAB_DESC = {
     "admin_promo": "Create and manage boost campaigns.",
     "admin_clients": "Export anonymized datasets to B2B.",
     "admin_site": "Marketing-style demo charts.",
+    "admin_catalog": "Bulk import vendor/venue catalogs (CSV).",
+    "admin_perf": "Render timings, reruns and session memory.",
 }
 
 # renderizadores das seções admin
+USER_STATUSES = ["Active", "Suspended"]
+USER_PAGE_SIZES = [25, 50, 100]
+
 def admin_render_users():
     st.subheader("User Management")
-    df = pd.DataFrame([
-        {"username": u, "role": info.get("role"), "full_name": info.get("full_name",""),
-         "contact": info.get("contact",""), "status": info.get("status","Active")}
-        for u, info in st.session_state.users.items()
-    ])
-    st.dataframe(df, use_container_width=True)
-
-    c1, c2, c3, c4 = st.columns(4)
-    with c1:
-        st.markdown("**Approve / Suspend**")
-        target_user = st.selectbox("User", df["username"].tolist() if not df.empty else ["—"])
-        new_status = st.selectbox("Set status", ["Active","Suspended"])
-        if st.button("Apply status"):
-            if target_user in st.session_state.users:
-                st.session_state.users[target_user]["status"] = new_status
-                st.success(f"{target_user} → {new_status}")
-                st.rerun()
-    with c2:
-        st.markdown("**Change role**")
-        role_user = st.selectbox("User ", df["username"].tolist() if not df.empty else ["—"], key="role_user")
+    if msg := st.session_state.pop("usr_flash", None):
+        st.success(msg)
+    # busca/paginação no SQLite (prefixo de username/contato + papel/status indexados)
+    f1, f2, f3, f4 = st.columns([2, 1, 1, 1])
+    q = f1.text_input("Search username / contact (prefix)", key="usr_q")
+    role_f = f2.selectbox("Role filter", ["All"] + ROLE_OPTIONS + [ADMIN_ROLE], key="usr_role")
+    status_f = f3.selectbox("Status filter", ["All"] + USER_STATUSES, key="usr_status")
+    page_size = f4.selectbox("Page size", USER_PAGE_SIZES, key="usr_page_size")
+    match = {"q": q, "role": None if role_f == "All" else role_f, "status": None if status_f == "All" else status_f}
+
+    total = db.count_users(**match)
+    pages = max(1, -(-total // page_size))
+    sig = (q, role_f, status_f, page_size)
+    if st.session_state.get("_usr_sig") != sig:
+        st.session_state["_usr_sig"] = sig
+        st.session_state["usr_page"] = 1
+    page = st.number_input("Page", min_value=1, max_value=pages, step=1, key="usr_page")
+    df = db.search_users(**match, limit=page_size, offset=(page - 1) * page_size)
+    start = (page - 1) * page_size
+    st.caption(f"Showing {start + 1 if total else 0}–{start + len(df)} of {total:,} users • select rows for bulk actions")
+    event = st.dataframe(df, use_container_width=True, hide_index=True, on_select="rerun",
+                         selection_mode="multi-row", key=f"usr_table_{page}_{hash(sig)}")
+    selected = df["username"].iloc[event.selection.rows].tolist() if event and event.selection.rows else []
+
+    st.markdown("**Bulk actions**")
+    b1, b2, b3 = st.columns([2, 1, 1])
+    scope = b1.radio("Apply to", [f"Selected ({len(selected)})", f"All matching ({total:,})"],
+                     horizontal=True, key="usr_scope")
+    # uma única escrita: lista de usernames ou o próprio filtro da busca; a conta
+    # de quem aplica fica sempre de fora (não dá para se desativar/rebaixar aqui)
+    me = current_username()
+    target = {"usernames": selected} if scope.startswith("Selected") else {"match": match}
+    target["exclude"] = (me,)
+    if scope.startswith("Selected"):
+        blocked = not selected
+        if me in selected:
+            st.caption(f"Your own account ({me}) is skipped by bulk actions.")
+    else:
+        blocked = not b1.checkbox(f"I confirm: apply to all {total:,} matching users", key="usr_confirm_all")
+    with b2:
+        new_status = st.selectbox("Set status", USER_STATUSES)
+        if st.button("Apply status", disabled=blocked):
+            st.session_state.usr_flash = f"{db.set_users_status(new_status, **target)} user(s) → {new_status}"
+            st.session_state.pop("usr_confirm_all", None)
+            rerun_section()
+    with b3:
         new_role = st.selectbox("Role", ROLE_OPTIONS + [ADMIN_ROLE], index=0)
-        if st.button("Apply role"):
-            if role_user in st.session_state.users:
-                st.session_state.users[role_user]["role"] = new_role
-                st.success(f"{role_user} → role {new_role}")
-                st.rerun()
+        if st.button("Apply role", disabled=blocked):
+            st.session_state.usr_flash = f"{db.set_users_role(new_role, **target)} user(s) → role {new_role}"
+            st.session_state.pop("usr_confirm_all", None)
+            rerun_section()
+
+    c3, c4 = st.columns(2)
     with c3:
         st.markdown("**Reset password**")
-        pw_user = st.selectbox("User  ", df["username"].tolist() if not df.empty else ["—"], key="pw_user")
+        pw_user = st.text_input("Username", value=selected[0] if len(selected) == 1 else "", key="pw_user")
         new_pw = st.text_input("New password", type="password")
         if st.button("Reset"):
-            if pw_user in st.session_state.users:
-                st.session_state.users[pw_user]["password"] = new_pw or ""
-                st.success(f"Password reset for {pw_user}")
+            if db.set_password(pw_user, new_pw):
+                st.success(f"Password reset for {db.user_key(pw_user)}")
+            else:
+                st.error("No account found with this username.")
     with c4:
         st.markdown("**Create user (quick)**")
-        u = st.text_input("Username")
-        p = st.text_input("Password", type="password")
+        u = st.text_input("Username ", key="new_user")
+        p = st.text_input("Password", type="password", key="new_user_pw")
         r = st.selectbox("Role  ", ROLE_OPTIONS + [ADMIN_ROLE], key="new_role_sel")
         if st.button("Create user"):
             ok, msg = create_user(u, p, r, full_name=u, contact=f"{u}@example.com")
             st.success(msg) if ok else st.error(msg)
-            if ok: st.rerun()
+            if ok: rerun_section()
+
+TS_FREQS = {"Daily": "D", "Weekly": "W"}
+TS_PERIODS = {"All time": None, "Last 30 days": 30, "Last 90 days": 90, "Last 365 days": 365}
 
 def admin_render_analytics():
     st.subheader("Analytics & Reporting Hub")
-    tx = st.session_state.transactions.copy()
-    rfps = pd.DataFrame(st.session_state.rfp_history) if st.session_state.get("rfp_history") else pd.DataFrame(columns=["submitted_at"])
-    total_rev = int(tx.loc[tx["status"]=="Completed","amount"].sum()) if not tx.empty else 0
-    pending = int(tx.loc[tx["status"]=="Pending","amount"].sum()) if not tx.empty else 0
-    completed = int((tx["status"]=="Completed").sum()) if not tx.empty else 0
+    # KPIs lidos dos agregados materializados (não dependem do tamanho do ledger)
+    by_status_kpi = db.kpis("status")
+    total_rev, completed = by_status_kpi.get("Completed", (0, 0))
+    pending = by_status_kpi.get("Pending", (0, 0))[0]
 
     k1, k2, k3, k4 = st.columns(4)
     with k1: st.markdown(f"<div class='kpi'><h4>Revenue (Completed)</h4><div class='v'>${total_rev:,.0f}</div></div>", unsafe_allow_html=True)
@@ -550,29 +657,56 @@ def admin_render_analytics():
         mrr = total_rev // 3 if total_rev else 0
         st.markdown(f"<div class='kpi'><h4>MRR (est.)</h4><div class='v'>${mrr:,.0f}</div></div>", unsafe_allow_html=True)
 
+    # séries derivadas do banco (vip/timeseries.py), em cache e estendidas por incremento
+    g1, g2, _ = st.columns([2, 2, 3])
+    freq = TS_FREQS[g1.radio("Granularity", list(TS_FREQS), horizontal=True, key="ts_freq")]
+    window = TS_PERIODS[g2.selectbox("Period", list(TS_PERIODS), key="ts_period")]
+
     cA, cB = st.columns(2)
     with cA:
-        st.markdown("##### Revenue Trend (Demo)")
-        df_line = _demo_series(days=20, base=120, volatility=18)
-        st.line_chart(df_line.set_index("date"))
+        st.markdown("##### Revenue Trend (Completed)")
+        st.line_chart(timeseries.series("revenue", freq, window))
     with cB:
         st.markdown("##### Transactions by Status")
-        if tx.empty:
+        if not by_status_kpi:
             st.info("No transactions.")
         else:
-            by_status = tx.groupby("status", as_index=False)["amount"].sum().sort_values("amount", ascending=False)
+            by_status = pd.DataFrame(
+                [{"status": k, "amount": v[0]} for k, v in by_status_kpi.items()]
+            ).sort_values("amount", ascending=False)
             st.bar_chart(by_status.set_index("status"))
 
+    cC, cD = st.columns(2)
+    with cC:
+        st.markdown("##### RFP Volume")
+        st.bar_chart(timeseries.series("rfps", freq, window))
+    with cD:
+        st.markdown("##### Signups")
+        st.bar_chart(timeseries.series("signups", freq, window))
+
     st.markdown("<div class='vip-card'>", unsafe_allow_html=True)
     colA, colB = st.columns(2)
     with colA:
         st.markdown("**Transactions (latest)**")
-        st.dataframe(tx.sort_values("date", ascending=False).head(25), use_container_width=True, height=260)
+        st.dataframe(db.latest_transactions(25), use_container_width=True, height=260)
     with colB:
         st.markdown("**RFPs (last 30)**")
-        st.dataframe(rfps.sort_values("submitted_at", ascending=False).head(30), use_container_width=True, height=260)
+        hist = get_rfp_history()
+        st.dataframe(hist.export_frame(hist.latest(30)), use_container_width=True, height=260)
     st.markdown("</div>", unsafe_allow_html=True)
 
+    with st.expander("Top counterparties"):
+        top = sorted(db.kpis("counterparty").items(), key=lambda kv: kv[1][0], reverse=True)[:10]
+        st.dataframe(pd.DataFrame([{"counterparty": k, "amount": a, "transactions": n} for k, (a, n) in top]),
+                     use_container_width=True, hide_index=True)
+    if st.button("Verify aggregates (full recompute)"):
+        diffs = db.verify_kpis()
+        if diffs:
+            st.error(f"{len(diffs)} aggregate(s) out of sync — rebuilding.")
+            db.rebuild_kpis()
+        else:
+            st.success("Aggregates match a full recompute.")
+
 def admin_render_disputes():
     st.subheader("Flagged Content / Disputes")
     disp = st.session_state.admin_disputes
@@ -582,33 +716,33 @@ def admin_render_disputes():
     for row in disp:
         with st.container(border=True):
             c1, c2 = st.columns([6,2])
-            c1.markdown(f"**#{row['id']}** • {row['type']} • {row['summary']}  \n"
-                        f"From: {row['from']}  →  Against: {row['against']}  \n"
-                        f"<span class='muted'>{row['created']}</span>", unsafe_allow_html=True)
+            c1.markdown(f"**#{row['id']}** • {html.escape(row['type'])} • {html.escape(row['summary'])}  \n"
+                        f"From: {html.escape(row['from'])}  →  Against: {html.escape(row['against'])}  \n"
+                        f"<span class='muted'>{html.escape(row['created'])}</span>", unsafe_allow_html=True)
             new = c2.selectbox("Status", ["Open","Under review","Resolved","Rejected"],
                                index=["Open","Under review","Resolved","Rejected"].index(row["status"]),
                                key=f"disp-{row['id']}")
             if new != row["status"]:
-                row["status"] = new
+                disp.update(row["id"], status=new)
 
 def admin_render_comm():
     st.subheader("Platform-Wide Communications (email/SMS)")
-    seg = st.selectbox("Segment", ["All Users","All Vendors","All Venues","All NPOs/Clients"])
+    seg = st.selectbox("Segment", list(broadcast.SEGMENTS))
     subject = st.text_input("Subject")
     body = st.text_area("Message")
-    via = st.selectbox("Channel", ["Email","SMS","Both"])
+    via = st.selectbox("Channel", list(broadcast.CHANNELS))
     if st.button("Send broadcast"):
-        st.session_state.broadcast_log.insert(0, {
-            "sent_at": datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "segment": seg, "subject": subject, "body": body, "via": via
-        })
-        st.success("Broadcast queued (demo).")
-    st.markdown("**History**")
-    st.dataframe(pd.DataFrame(st.session_state.broadcast_log), use_container_width=True, height=240)
+        # só enfileira; a entrega roda em background (vip/broadcast.py)
+        bid, total = broadcast.send_broadcast(seg, subject, body, via)
+        st.success(f"Broadcast #{bid} queued: {total} deliveries.")
+    c1, c2 = st.columns([4, 1])
+    c1.markdown("**History**")
+    c2.button("Refresh status", key="bc-refresh")
+    st.dataframe(db.list_broadcasts(), use_container_width=True, height=240, hide_index=True)
 
 def admin_render_promo():
     st.subheader("Promo / Boost Campaign Manager")
-    dfc = pd.DataFrame(st.session_state.promo_campaigns)
+    dfc = st.session_state.promo_campaigns.frame()
     st.dataframe(dfc, use_container_width=True)
     c1, c2, c3 = st.columns([2,1,1])
     with c1:
@@ -619,35 +753,61 @@ def admin_render_promo():
         budget = st.number_input("Budget", min_value=0, value=100)
     st.write("")
     if st.button("Create campaign"):
-        new_id = max([c["id"] for c in st.session_state.promo_campaigns]+[7000]) + 1
+        new_id = st.session_state.promo_campaigns.next_id(7000)
         st.session_state.promo_campaigns.append({"id":new_id,"name":name or f"Campaign {new_id}",
                                                  "segment":seg or "General","budget":int(budget),"status":"Active"})
         st.success("Campaign created.")
-        st.rerun()
+        rerun_section()
 
 def admin_render_clients():
     st.subheader("Data Resale & Dashboard Clients (B2B)")
-    dc = pd.DataFrame(st.session_state.data_clients)
+    dc = st.session_state.data_clients.frame()
     st.dataframe(dc, use_container_width=True)
     st.markdown("**Export anonymized datasets**")
-    col1, col2 = st.columns(2)
-    with col1:
-        tx = st.session_state.transactions.copy()
-        st.download_button("Download transactions.csv",
-                           data=tx.to_csv(index=False).encode("utf-8"),
-                           file_name="transactions.csv", mime="text/csv")
-    with col2:
-        rfps = pd.DataFrame(st.session_state.rfp_history) if st.session_state.get("rfp_history") else pd.DataFrame()
-        st.download_button("Download rfp_history.csv",
-                           data=rfps.to_csv(index=False).encode("utf-8"),
-                           file_name="rfp_history.csv", mime="text/csv")
+    period = st.date_input("Date range (empty = all)", value=[], key="exp_period")
+    date_from = period[0] if len(period) > 0 else None
+    date_to = period[1] if len(period) > 1 else date_from
+    c1, c2, c3 = st.columns([1, 2, 1])
+    gz = c1.checkbox("Compress (gzip)", key="exp_gzip")
+    anon = c2.checkbox("Anonymize (pseudonymize ids, bucket dates/amounts, suppress rare rows)",
+                       value=True, key="exp_anon")
+    k = c3.number_input("k (min group size)", min_value=1, value=DEFAULT_K, step=1, key="exp_k", disabled=not anon)
+    # o CSV só é gerado no clique (callable), lido do SQLite em blocos para um arquivo temporário
+    for col, dataset in zip(st.columns(2), ("transactions", "rfps")):
+        with col:
+            # anonimizado: texto livre (título/escopo) não é oferecido
+            all_cols = exportable(dataset, export.DATASETS[dataset][1]) if anon else export.DATASETS[dataset][1]
+            cols = st.multiselect("Columns", all_cols, default=all_cols, key=f"exp_cols_{dataset}_{int(anon)}")
+            name = export.file_name(dataset, gz)
+            st.download_button(f"Download {name}",
+                               data=partial(export.export_file, dataset, cols, date_from, date_to, gz,
+                                            anonymize=anon, k=int(k)),
+                               file_name=name, mime="application/gzip" if gz else "text/csv",
+                               disabled=not cols, on_click="ignore", key=f"exp_dl_{dataset}")
+
+    # chaves da API JSON (vip/api.py, processo separado): o token só aparece na criação
+    st.markdown("**API access**")
+    st.caption("Clients query `python -m vip.api serve` (search, stats, series, anonymized exports) "
+               "with `Authorization: Bearer <key>`.")
+    a1, a2, a3 = st.columns([2, 1, 1])
+    client_id = a1.selectbox("Client", dc["id"].tolist(), key="api_client",
+                             format_func=lambda i: f"{i} — {dc.set_index('id').at[i, 'name']}")
+    if a2.button("Issue API key", key="api_issue"):
+        st.session_state.api_new_key = (client_id, db.create_api_key(client_id))
+    if a3.button("Revoke keys", key="api_revoke"):
+        st.toast(f"Revoked {db.revoke_api_keys(client_id)} key(s).")
+    new_key = st.session_state.get("api_new_key")
+    if new_key and new_key[0] == client_id:
+        st.code(new_key[1], language="text")
+        st.caption("Copy it now — only a hash is stored.")
+    st.dataframe(db.list_api_keys(client_id), use_container_width=True, hide_index=True)
 
 def admin_render_site():
     st.subheader("Demo Charts (marketing style)")
     c1, c2 = st.columns(2)
     with c1:
-        st.markdown("**Traffic Trend**")
-        st.line_chart(_demo_series(days=30, base=200, volatility=25).set_index("date"))
+        st.markdown("**Traffic Trend** (demo)")
+        st.line_chart(timeseries.demo_series(days=30, base=200, volatility=25).set_index("date"))
     with c2:
         st.markdown("**Signups / Conversions**")
         df = pd.DataFrame({"metric":["Signups","Verified","Paying"],"value":[420,310,120]}).set_index("metric")
@@ -656,29 +816,144 @@ def admin_render_site():
     df2 = pd.DataFrame({"Venue":[60,72,68,80,75],"Vendors":[40,55,62,70,66]}, index=[f"W{i}" for i in range(1,6)])
     st.area_chart(df2)
 
-# util de série demo
-def _demo_series(days=14, base=100, volatility=15):
-    now = datetime.now()
-    data, val = [], base
-    for i in range(days):
-        val = max(0, val + random.randint(-volatility, volatility))
-        data.append({"date": (now - timedelta(days=days-i)).strftime("%Y-%m-%d"), "value": val})
-    return pd.DataFrame(data)
+def admin_render_catalog():
+    st.subheader("🗃️ Catalog Import")
+    ds, err = _safe_read_marketplace(DATA_PATH)
+    if ds is not None:
+        k1, k2, k3 = st.columns(3)
+        k1.metric("Listings", f"{len(ds.df):,}")
+        k2.metric("Cities", len(ds.options.get("city", [])))
+        k3.metric("Categories", len(ds.options.get("category", [])))
+    st.caption("CSV columns: " + ", ".join(ingest.REQUIRED_COLUMNS) + ". Rows matching a listing by name + "
+               "contact e-mail (case-insensitive) update it; the rest are appended. "
+               "Same as `python -m vip.ingest <file>`.")
+    # leitura em blocos (vip/ingest.py); o catálogo é gravado e o cache trocado só no fim
+    up = st.file_uploader("Vendor / venue catalog (CSV)", type=["csv"], key="cat_file")
+    c1, c2 = st.columns(2)
+    dry = c1.checkbox("Validate only (dry run)", key="cat_dry")
+    chunk = c2.number_input("Rows per chunk", min_value=1_000, value=ingest.CHUNK_ROWS, step=10_000, key="cat_chunk")
+    if st.button("Import", disabled=up is None, key="cat_import"):
+        bar = st.progress(0.0, text="Reading…")
+        size = max(up.size, 1)
+        try:
+            st.session_state.cat_report = ingest.ingest(
+                up, DATA_PATH, chunk_rows=int(chunk), dry_run=dry,
+                progress=lambda r: bar.progress(min(up.tell() / size, 1.0), text=f"{r.rows:,} rows read"))
+        except ValueError as e:     # colunas faltando / CSV ilegível
+            bar.empty()
+            st.error(f"Import failed: {e}")
+            return
+        bar.empty()
+
+    rep = st.session_state.get("cat_report")
+    if rep is None:
+        return
+    s = rep.summary()
+    cols = st.columns(5)
+    for col, name in zip(cols, ("inserted", "updated", "unchanged", "duplicates", "rejected")):
+        col.metric(name.capitalize(), f"{s[name]:,}")
+    st.caption(f"{s['rows']:,} rows in {s['chunks']} chunk(s), {s['seconds']:.1f} s · catalog: {s['catalog_rows']:,} listings")
+    if rep.errors:
+        st.markdown(f"**Rejected rows** (first {len(rep.errors):,} problems)")
+        st.dataframe(rep.error_frame(), use_container_width=True, hide_index=True)
+
+def admin_render_perf():
+    st.subheader("⏱️ Performance")
+    summ = perf.summary()
+    reruns = perf.rerun_counts()
+    sizes = perf.state_sizes(st.session_state)
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("Reruns (this session)", st.session_state.get("_perf_reruns", 0))
+    k2.metric("Reruns (process)", sum(reruns.values()))
+    last = summ[summ["kind"] == "route"]
+    k3.metric("Dashboard p95", f"{last.loc[last['name'] == 'dashboard', 'p95'].max():.0f} ms"
+              if (last["name"] == "dashboard").any() else "—")
+    k4.metric("Session state", f"{sizes.sum() / 1024:,.0f} KB")
+
+    if summ.empty:
+        st.info("No samples yet. Use the app for a while and come back.")
+    else:
+        sec = summ[summ["kind"] == "section"].set_index("name")[["p50", "p95"]]
+        if not sec.empty:
+            st.markdown("**Section render time (ms)**")
+            st.bar_chart(sec)
+        st.markdown("**All metrics** (ms; `state` in KB) — last %d samples each" % perf.SAMPLE_WINDOW)
+        st.dataframe(summ, use_container_width=True, hide_index=True, column_config={
+            c: st.column_config.NumberColumn(c, format="%.2f") for c in ("p50", "p95", "max", "last")})
+    if reruns:
+        st.caption("Reruns by route: " + ", ".join(f"{r}: {n}" for r, n in sorted(reruns.items())))
+
+    with st.expander("Session state by key"):
+        st.dataframe((sizes / 1024).round(1).rename("KB").head(25), use_container_width=True)
+    with st.expander("Shared seed data (bytes per session)"):
+        mem = memory_report(_shared_seeds(), {n: st.session_state.get(n) for n in SHARED_SEEDS})
+        st.dataframe(mem, use_container_width=True, hide_index=True)
+        st.caption(f"Per session: {mem['copy_per_session'].sum():,} B as private copies → "
+                   f"{mem['overlay_per_session'].sum():,} B as overlays "
+                   f"(+{mem['shared_once'].sum():,} B shared once per process).")
+
+    st.markdown("**cProfile**")
+    c1, c2, c3 = st.columns([2, 1, 1])
+    sort = c1.selectbox("Sort by", ["cumulative", "tottime", "ncalls"], key="perf_sort")
+    if c2.button("Profile next rerun"):
+        perf.request_profile(st.session_state, sort)
+        st.toast("The next interaction in this session will be profiled.")
+    if c3.button("Reset metrics"):
+        perf.reset()
+        rerun_section()
+    if "_perf_last_profile" in st.session_state:
+        label, text = st.session_state["_perf_last_profile"]
+        st.caption(f"Last profile: {label}")
+        st.code(text, language="text")
+
+# =====================
+#  SECTIONS (fragmentos)
+# =====================
+# Cada seção roda como st.fragment: widgets dentro dela reexecutam só a seção
+# (sem CSS, sidebar, nav etc.); o que muda rota/nav usa st.rerun() do app.
+def _section(key, fn):
+    @st.fragment
+    @wraps(fn)
+    def run():
+        perf.count_fragment(st.session_state, key)
+        with perf.timer("section", key):   # inclusive quando a seção sai com st.rerun
+            fn()
+    return run
+
+DASH_RENDERERS = {key: _section(key, fn) for key, fn in [
+    ("dash_market", render_marketplace),
+    ("dash_rfp_hist", render_rfp_history),
+    ("dash_tx", render_transactions),
+    ("dash_notifs", render_notifications_center),
+    ("dash_chat", render_messaging_center),
+]}
+ADMIN_RENDERERS = {key: _section(key, fn) for key, fn in [
+    ("admin_users", admin_render_users),
+    ("admin_analytics", admin_render_analytics),
+    ("admin_disputes", admin_render_disputes),
+    ("admin_comm", admin_render_comm),
+    ("admin_promo", admin_render_promo),
+    ("admin_clients", admin_render_clients),
+    ("admin_site", admin_render_site),
+    ("admin_catalog", admin_render_catalog),
+    ("admin_perf", admin_render_perf),
+]}
 
 # =====================
 #  NAV BUTTONS (unificados)
 # =====================
+def _open_section(key):
+    st.session_state.main_section = key
+
 def render_unified_nav(is_admin: bool):
     """Linha 1: Dashboard | Linha 2: Admin (se admin)."""
     st.markdown("#### App Sections")
 
-    # linha dashboard
+    # linha dashboard; o callback troca a seção antes do rerun do clique (sem st.rerun extra)
     cols = st.columns(len(DASH_SECTIONS))
     for i, (label, key) in enumerate(DASH_SECTIONS):
         active = (st.session_state.main_section == key)
-        if cols[i].button(label, use_container_width=True, key=f"nav-{key}"):
-            st.session_state.main_section = key
-            st.rerun()
+        cols[i].button(label, use_container_width=True, key=f"nav-{key}", on_click=_open_section, args=(key,))
         if active:
             cols[i].caption("active")
 
@@ -688,9 +963,7 @@ def render_unified_nav(is_admin: bool):
         cols2 = st.columns(len(ADMIN_SECTIONS))
         for i, (label, key) in enumerate(ADMIN_SECTIONS):
             active = (st.session_state.main_section == key)
-            if cols2[i].button(label, use_container_width=True, key=f"nav-{key}"):
-                st.session_state.main_section = key
-                st.rerun()
+            cols2[i].button(label, use_container_width=True, key=f"nav-{key}", on_click=_open_section, args=(key,))
             if active:
                 cols2[i].caption("active")
     st.divider()
@@ -707,11 +980,9 @@ if st.session_state.route == "landing":
     st.markdown("<div class='vip-ctas'>", unsafe_allow_html=True)
     c1, c2 = st.columns([1, 1])
     with c1:
-        if st.button("🆕 Sign Up", use_container_width=True):
-            nav("signup")
+        st.button("🆕 Sign Up", use_container_width=True, on_click=go, args=("signup",))
     with c2:
-        if st.button("🔐 Login", use_container_width=True):
-            nav("login")
+        st.button("🔐 Login", use_container_width=True, on_click=go, args=("login",))
     st.markdown("</div>", unsafe_allow_html=True)
     st.markdown("<div class='vip-footer'>@2025 VIP • Privacy • Terms • Support</div>", unsafe_allow_html=True)
     st.markdown("</section></div>", unsafe_allow_html=True)
@@ -737,8 +1008,7 @@ elif st.session_state.route == "signup":
                     request_nav("login")
                 else:
                     st.error(msg)
-    if st.button("← Back"):
-        nav("landing")
+    st.button("← Back", on_click=go, args=("landing",))
     st.markdown("</div>", unsafe_allow_html=True)
 
 elif st.session_state.route == "login":
@@ -755,8 +1025,7 @@ elif st.session_state.route == "login":
                 request_nav("dashboard")
             else:
                 st.error(msg)
-    if st.button("← Back"):
-        nav("landing")
+    st.button("← Back", on_click=go, args=("landing",))
     st.markdown("</div>", unsafe_allow_html=True)
 
 elif st.session_state.route == "dashboard":
@@ -764,8 +1033,7 @@ elif st.session_state.route == "dashboard":
     user = st.session_state.current_user
     if not user:
         st.warning("You are not logged in.")
-        if st.button("Go to Login"):
-            nav("login")
+        st.button("Go to Login", on_click=go, args=("login",))
     else:
         # ======= TOP BAR: conta + único sino (só zera) =======
         with st.sidebar:
@@ -775,10 +1043,8 @@ elif st.session_state.route == "dashboard":
             st.write(f"**Name:** {user.get('full_name', '—')}")
             st.write(f"**Contact:** {user.get('contact', '—')}")
             st.divider()
-            if st.button("🔄 Switch Profile / Login"):
-                nav("login")
-            if st.button("🚪 Log out"):
-                logout()
+            st.button("🔄 Switch Profile / Login", on_click=go, args=("login",))
+            st.button("🚪 Log out", on_click=logout)
 
         top_l, top_r = st.columns([8,4])
         with top_l:
@@ -789,11 +1055,7 @@ elif st.session_state.route == "dashboard":
             unread = unread_count()
             show_badge = (unread > 0) and (not st.session_state.get("notif_badge_cleared", False))
             notif_label = f"🔔 Notifications ({unread})" if show_badge else "🔔 Notifications"
-            if c1.button(notif_label, use_container_width=True):
-                for n in st.session_state.notifications:
-                    n["read"] = True
-                st.session_state.notif_badge_cleared = True
-                st.rerun()
+            c1.button(notif_label, use_container_width=True, on_click=_clear_bell, args=(user["username"],))
 
         # ======= NAV UNIFICADA =======
         is_admin = (user.get("role") == ADMIN_ROLE)
@@ -803,30 +1065,11 @@ elif st.session_state.route == "dashboard":
         st.caption(TAB_DESC.get(st.session_state.main_section, ""))
 
         # ======= RENDER DA SEÇÃO ATIVA =======
-        key = st.session_state.main_section
-        # dashboard
-        if key == "dash_market":            render_marketplace()
-        elif key == "dash_rfp_hist":        # histórico de RFP
-            st.subheader("🗂️ RFP Submission History")
-            rows = st.session_state.get("rfp_history", [])
-            if not rows:
-                st.info("No RFP submissions yet.")
-            else:
-                df = pd.DataFrame(rows).sort_values("submitted_at", ascending=False)
-                cols = ["submitted_at","title","target_name","target_type","target_city","budget","target_date","price","target_contact"]
-                cols = [c for c in cols if c in df.columns]
-                st.dataframe(df[cols].reset_index(drop=True), use_container_width=True)
-        elif key == "dash_tx":              render_transactions()
-        elif key == "dash_notifs":          render_notifications_center()
-        elif key == "dash_chat":            render_messaging_center()
-        # admin (somente se admin)
-        elif is_admin and key == "admin_users":       admin_render_users()
-        elif is_admin and key == "admin_analytics":   admin_render_analytics()
-        elif is_admin and key == "admin_disputes":    admin_render_disputes()
-        elif is_admin and key == "admin_comm":        admin_render_comm()
-        elif is_admin and key == "admin_promo":       admin_render_promo()
-        elif is_admin and key == "admin_clients":     admin_render_clients()
-        elif is_admin and key == "admin_site":        admin_render_site()
+        # cada seção é um fragmento: interações dentro dela reexecutam só a seção
+        render = DASH_RENDERERS.get(st.session_state.main_section) or (
+            ADMIN_RENDERERS.get(st.session_state.main_section) if is_admin else None)
+        if render:
+            render()
         else:
             st.info("This section is available to Admins.")
 
@@ -834,13 +1077,16 @@ elif st.session_state.route == "dashboard":
 
 elif st.session_state.route == "rfp":
     st.markdown("<div class='vip-wrap'>", unsafe_allow_html=True)
-    render_rfp(with_topbar=False)
+    with perf.timer("section", "rfp"):
+        render_rfp(with_topbar=False)
     st.markdown("</div>", unsafe_allow_html=True)
 
 else:
     st.error("Unknown route. Returning to landing…")
     nav("landing")
 
+perf.end_run(st.session_state, st.session_state.route)
+
 # ---- pending nav hook ----
 if st.session_state.get("_pending_nav"):
     del st.session_state["_pending_nav"]
@@ -0,0 +1,30 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from vip import db, marketplace  # noqa: E402
+
+CATALOG = ROOT / "data" / "marketplace_clean_numeric.csv"
+
+
+@pytest.fixture
+def store(tmp_path):
+    """SQLite do teste num diretório temporário."""
+    old = db.current_path()
+    db.configure(tmp_path / "vip.db")
+    yield db
+    db.configure(old)
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    """Cópia do catálogo de exemplo (importações gravam no arquivo)."""
+    path = tmp_path / "market.csv"
+    shutil.copy(CATALOG, path)
+    yield path
+    marketplace.clear_cache()
@@ -0,0 +1,51 @@
+import gzip
+import io
+
+import pandas as pd
+import pytest
+
+from vip import anonymize, export
+
+NAMES = ["Helix 238", "Spectrum 22", "Harbor Hall"]
+
+
+@pytest.fixture
+def rfps(store, monkeypatch):
+    monkeypatch.setenv(anonymize.KEY_ENV, "test-key")
+    for i in range(30):
+        name = NAMES[i % len(NAMES)]
+        store.add_rfp("planner", {
+            "submitted_at": f"2025-03-{i % 28 + 1:02d} 10:00", "title": f"Proposal for {name}",
+            "scope": f"Gala dinner, {name} to provide staff", "target_date": "2025-06-01",
+            "budget": "$12,000", "target_name": name, "target_type": "Vendor",
+            "target_city": "Boston", "target_contact": f"{name.split()[0].lower()}@example.com", "price": "$$",
+        })
+    return store
+
+
+@pytest.mark.parametrize("k", [1, 5])
+def test_anonymized_rfp_export_has_no_target_names(rfps, k):
+    raw = export.export_bytes("rfps", anonymize=True, k=k).decode("utf-8")
+    for name in NAMES:
+        assert name not in raw and name.split()[0].lower() not in raw.lower()
+    header = raw.splitlines()[0].split(",")
+    assert "title" not in header and "scope" not in header and "target_name" in header
+
+
+def test_plain_export_keeps_free_text(rfps):
+    raw = export.export_bytes("rfps").decode("utf-8")
+    assert "Proposal for Helix 238" in raw
+
+
+def test_free_text_only_selection_is_rejected(rfps):
+    with pytest.raises(ValueError):
+        export.export_bytes("rfps", columns=["title", "scope"], anonymize=True)
+
+
+def test_pseudonyms_are_stable_and_rare_groups_suppressed(rfps):
+    a = pd.read_csv(io.BytesIO(gzip.decompress(export.export_bytes("rfps", compress=True, anonymize=True))))
+    b = pd.read_csv(io.BytesIO(export.export_bytes("rfps", anonymize=True)))
+    assert a["target_name"].equals(b["target_name"]) and a["target_name"].nunique() == len(NAMES)
+    assert set(a["budget"]) <= set(anonymize.AMOUNT_LABELS) | {anonymize.SUPPRESSED}
+    sparse = pd.read_csv(io.BytesIO(export.export_bytes("rfps", anonymize=True, k=100)))
+    assert (sparse[["submitted_at", "target_type", "target_city", "budget"]] == anonymize.SUPPRESSED).all().all()
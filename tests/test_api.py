@@ -0,0 +1,79 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from vip import api
+
+
+@pytest.fixture
+def server(store, catalog):
+    srv = api.ApiServer("127.0.0.1", 0, api.Api(catalog))
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv, store.create_api_key(3001)
+    srv.shutdown()
+    srv.server_close()
+
+
+def _get(server, path, etag=None):
+    srv, token = server
+    req = urllib.request.Request(f"http://127.0.0.1:{srv.server_address[1]}{path}",
+                                 headers={"X-API-Key": token, **({"If-None-Match": etag} if etag else {})})
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return resp.status, resp.headers.get("ETag"), resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers.get("ETag"), e.read()
+
+
+def test_not_modified_skips_the_body(server, monkeypatch):
+    srv, _ = server
+    calls = []
+    allowed, version, compute = srv.api.ROUTES["transactions/stats"]
+    monkeypatch.setitem(srv.api.ROUTES, "transactions/stats",
+                        (allowed, version, lambda self, p, a: calls.append(p) or compute(self, p, a)))
+
+    status, etag, body = _get(server, "/v1/transactions/stats?by=status")
+    assert status == 200 and etag and json.loads(body)["by"] == "status"
+    srv.api.cache = api.LRUCache()                  # sem cache: só o ETag evita o cálculo
+    status, again, body = _get(server, "/v1/transactions/stats?by=status", etag)
+    assert (status, again, body) == (304, etag, b"")
+    assert len(calls) == 1
+
+    api.db.add_transaction("ana", "2026-01-05", "Grand Hall", "Venue", 1200, "Paid", "T-1")
+    status, changed, _ = _get(server, "/v1/transactions/stats?by=status", etag)
+    assert status == 200 and changed != etag
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("query", ["price_min=inf", "price_max=-inf", "price_min=nan", "page=abc"])
+def test_bad_numbers_are_400(server, query):
+    status, _, body = _get(server, f"/v1/marketplace/search?{query}")
+    assert status == 400 and "must be a number" in json.loads(body)["error"]
+
+
+@pytest.mark.parametrize("query, error", [("budget=0", "budget must be >= 1"),
+                                          ("attendees=-5", "attendees must be >= 1"),
+                                          ("available_from=2026-13-01", "available_from must be YYYY-MM-DD"),
+                                          ("available_from=2026-01-01&available_to=soon",
+                                           "available_to must be YYYY-MM-DD"),
+                                          ("available_from=2026-01-05&available_to=2026-01-01",
+                                           "available_to must not be before available_from")])
+def test_bad_search_params_are_400(server, query, error):
+    status, _, body = _get(server, f"/v1/marketplace/search?{query}")
+    assert (status, json.loads(body)["error"]) == (400, error)
+
+
+def test_huge_series_window_is_capped(server):
+    status, _, body = _get(server, "/v1/series/revenue?days=100000000")
+    assert status == 200 and len(json.loads(body)["items"]) == api.MAX_SERIES_DAYS
+
+
+def test_counterparty_stats_not_exposed(server):
+    api.db.add_transaction("ana", "2026-01-05", "Grand Hall", "Venue", 1200, "Paid", "T-1")
+    status, _, body = _get(server, "/v1/transactions/stats?by=counterparty")
+    assert status == 400
+    assert b"Grand Hall" not in body
@@ -0,0 +1,15 @@
+from pathlib import Path
+
+import pytest
+
+from vip.assets import picture_html
+
+LOGO = Path(__file__).resolve().parent.parent / "assets" / "logo.png"
+
+
+@pytest.mark.parametrize("static", [True, False])
+def test_only_below_the_fold_images_are_lazy(tmp_path, static):
+    eager = picture_html(LOGO, tmp_path, 480, static=static)
+    lazy = picture_html(LOGO, tmp_path, 480, static=static, lazy=True)
+    assert 'loading="lazy"' not in eager                # logo do topo: carrega na hora
+    assert lazy.count('loading="lazy"') == 1 and lazy.replace(' loading="lazy"', "") == eager
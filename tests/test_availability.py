@@ -0,0 +1,58 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vip.availability import AvailabilityIndex
+
+
+def _index(*rows):
+    return AvailabilityIndex(pd.DataFrame(rows, columns=["listing", "start_date", "end_date", "kind"]))
+
+
+def test_adjacent_and_overlapping_bookings_are_merged():
+    idx = _index(("Hall", "2026-03-01", "2026-03-03", "booking"),
+                 ("Hall", "2026-03-04", "2026-03-05", "hold"),        # adjacente
+                 ("Hall", "2026-03-02", "2026-03-08", "booking"),     # sobreposta
+                 ("Hall", "2026-03-10", "2026-03-10", "booking"),     # 1 dia de folga: separada
+                 ("Barn", "2026-03-04", "2026-03-04", "booking"))
+    assert len(idx) == 3
+    assert idx.conflicts("Hall", "2026-03-01", "2026-03-31") == [
+        (date(2026, 3, 1), date(2026, 3, 8)), (date(2026, 3, 10), date(2026, 3, 10))]
+    assert idx.is_free("Hall", "2026-03-09") and not idx.is_free("Hall", "2026-03-08")
+    assert idx.is_free("Nowhere", "2026-03-01")
+
+
+def test_next_free_walks_chained_bookings():
+    idx = _index(("Hall", "2026-03-01", "2026-03-02", "booking"),
+                 ("Hall", "2026-03-04", "2026-03-05", "booking"),
+                 ("Hall", "2026-03-07", "2026-03-07", "hold"))
+    assert idx.next_free("Hall", "2026-03-01") == date(2026, 3, 3)
+    assert idx.next_free("Hall", "2026-03-01", days=2) == date(2026, 3, 8)     # as folgas têm 1 dia
+    assert idx.next_free("Hall", "2026-03-06") == date(2026, 3, 6)
+    assert idx.next_free("Barn", "2026-03-01", days=5) == date(2026, 3, 1)
+
+
+def test_busy_matches_a_brute_force_scan():
+    rng = np.random.default_rng(3)
+    start = rng.integers(0, 60, 300)
+    rows = [(f"L{i % 40}", str(np.datetime64("2026-01-01") + s), str(np.datetime64("2026-01-01") + s + d), "booking")
+            for i, (s, d) in enumerate(zip(start, rng.integers(0, 6, 300)))]
+    idx = _index(*rows)
+    frame = pd.DataFrame(rows, columns=["listing", "start", "end", "kind"])
+    for a, b in [("2026-01-10", "2026-01-10"), ("2026-01-05", "2026-01-20"), ("2026-03-05", "2026-03-30")]:
+        hit = frame[(frame["start"] <= b) & (frame["end"] >= a)]["listing"]
+        assert sorted(idx.busy(a, b)) == sorted(hit.unique())
+
+
+def test_reversed_ranges():
+    idx = _index(("Hall", "2026-03-05", "2026-03-01", "booking"))              # gravada invertida
+    assert idx.conflicts("Hall", "2026-03-03") == [(date(2026, 3, 1), date(2026, 3, 5))]
+    for query in (idx.conflicts, idx.is_free):
+        with pytest.raises(ValueError):
+            query("Hall", "2026-03-10", "2026-03-01")
+    with pytest.raises(ValueError):
+        idx.busy("2026-03-10", "2026-03-01")
+    with pytest.raises(ValueError):
+        _index().busy("2026-03-10", "2026-03-01")
@@ -0,0 +1,63 @@
+import threading
+
+from vip import broadcast
+
+FAST = {"Email": (1e6, 1000), "SMS": (1e6, 1000)}
+
+
+class FlakySender:
+    """Aceita tudo, menos endereços em `fail` (sempre) e em `flaky` (só na 1ª vez)."""
+
+    def __init__(self, fail=(), flaky=()):
+        self.fail, self.flaky = set(fail), set(flaky)
+        self.batches, self.sent = [], []
+        self._lock = threading.Lock()
+
+    def send_batch(self, channel, messages):
+        with self._lock:
+            self.batches.append(len(messages))
+            errors = []
+            for m in messages:
+                if m["address"] in self.fail or m["address"] in self.flaky:
+                    self.flaky.discard(m["address"])
+                    errors.append("rejected")
+                else:
+                    self.sent.append(m["address"])
+                    errors.append(None)
+            return errors
+
+
+def _users(db, n):
+    for i in range(n):
+        db.create_user(f"v{i:02d}", "secret123", "Vendor", contact=f"v{i:02d}@example.com", seed=False)
+    db.create_user("nomail", "secret123", "Vendor", contact="not-an-address", seed=False)
+    db.create_user("boss", "secret123", "Admin", contact="boss@example.com", seed=False)
+
+
+def _deliver(db, sender, segment="All Vendors", **kwargs):
+    d = broadcast.Dispatcher({"Email": sender}, limits=FAST, workers=1, backoff=0, **kwargs)
+    bid, total = db.create_broadcast(segment, broadcast.SEGMENTS[segment], "Hi", "Body", "Email", ("Email",))
+    for f in d.submit(bid, ("Email",)):
+        f.result(timeout=30)
+    return db.get_broadcast(bid), total
+
+
+def test_batches_retries_and_counters(store):
+    _users(store, 25)
+    sender = FlakySender(fail={"v03@example.com"}, flaky={"v07@example.com"})
+    b, total = _deliver(store, sender, batch_size=10)
+
+    assert total == 26                                      # admin fica de fora
+    # 1º lote sem o "nomail" (pulado antes do envio); depois as 2 novas tentativas
+    # (v03 e v07) e a última de v03, que esgota MAX_ATTEMPTS
+    assert sender.batches == [9, 10, 6, 2, 1]
+    assert (b["sent"], b["failed"], b["skipped"]) == (24, 1, 1)
+    assert b["status"] == "partial"
+    assert sorted(sender.sent) == sorted({f"v{i:02d}@example.com" for i in range(25)} - {"v03@example.com"})
+    assert not store.has_pending(b["id"]) and store.open_broadcasts() == []
+
+
+def test_all_delivered_is_done(store):
+    _users(store, 3)
+    b, _ = _deliver(store, FlakySender())
+    assert (b["status"], b["sent"], b["failed"], b["skipped"]) == ("done", 3, 0, 1)
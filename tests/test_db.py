@@ -0,0 +1,112 @@
+import sqlite3
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def users(store):
+    for name in ("ana", "bia"):
+        store.create_user(name, "secret123", "Planner", contact=f"{name}@example.com")
+    return store
+
+
+def test_kpi_triggers_match_a_full_recompute(users):
+    db = users
+    assert db.verify_kpis() == []
+    before, refunded = db.kpi("status", "Completed"), db.kpi("status", "Refunded")
+    tx = db.add_transaction("ana", "2026-01-05", "Grand Hall", "Venue", 1200, "Completed", "T-1")
+    assert db.kpi("status", "Completed") == (before[0] + 1200, before[1] + 1)
+    assert db.kpi("day", "2026-01-05") == (1200, 1)
+
+    with db.transaction() as conn:
+        conn.execute("UPDATE transactions SET status = 'Refunded', amount = 900 WHERE id = ?", (tx,))
+    assert db.kpi("status", "Completed") == before
+    assert db.kpi("status", "Refunded") == (refunded[0] + 900, refunded[1] + 1)
+    assert db.verify_kpis() == []
+
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM transactions WHERE id = ?", (tx,))
+    assert "2026-01-05" not in db.kpis("day")
+    assert db.verify_kpis() == []
+
+    db.add_rfp("bia", {"submitted_at": "2026-02-01 09:00", "title": "t", "target_name": "x"})
+    assert db.kpis("rfp_day")["2026-02-01"] == (0, 1)
+    assert db.verify_kpis() == []
+
+
+def test_notification_counters_follow_reads_and_deletes(users):
+    db = users
+    unread, total = db.notification_counts("ana")
+    db.add_notification("ana", "Hi", "body")
+    db.add_notification("ana", "Hi again", "body")
+    assert db.notification_counts("ana") == (unread + 2, total + 2)
+    db.mark_all_read("ana")
+    assert db.notification_counts("ana") == (0, total + 2)
+    with db.transaction() as conn:
+        conn.execute("UPDATE notifications SET read = 0 WHERE username = 'ana' AND title = 'Hi'")
+        conn.execute("DELETE FROM notifications WHERE username = 'ana' AND title = 'Hi again'")
+    assert db.notification_counts("ana") == (1, total + 1)
+    assert db.notification_counts("bia") == (unread, total)     # contador por usuário
+
+
+def test_thread_stats_and_append_only_messages(users):
+    db = users
+    thread = db.list_threads("ana", "Inbox")[0]
+    mid = db.add_message(thread["id"], "You", "hello", ts="2099-01-01 00:00")
+    stats = db.get_thread(thread["id"], "ana")
+    assert stats["count"] == thread["count"] + 1 and stats["last_ts"] == "2099-01-01 00:00"
+    assert db.thread_messages(thread["id"], limit=1) == [{"id": mid, "by": "You", "ts": "2099-01-01 00:00", "text": "hello"}]
+    assert db.get_thread(thread["id"], "bia") is None
+    with pytest.raises(sqlite3.DatabaseError, match="append-only"):
+        with db.transaction() as conn:
+            conn.execute("DELETE FROM messages WHERE id = ?", (mid,))
+
+
+def test_connections_are_pooled_across_threads(store):
+    with store.connection() as first:
+        pass
+    seen = []
+
+    def rerun():                                    # cada rerun do Streamlit é uma thread nova
+        with store.connection() as conn:
+            seen.append(conn)
+            conn.execute("SELECT 1").fetchone()
+
+    for _ in range(3):
+        t = threading.Thread(target=rerun)
+        t.start()
+        t.join()
+    assert seen == [first] * 3
+    with store.connection() as a, store.connection() as b:
+        assert a is not b                           # retiradas simultâneas não compartilham conexão
+    with pytest.raises(ZeroDivisionError):
+        with store.transaction() as conn:
+            conn.execute("INSERT INTO notifications(username, title, body, ts, ntype, read) "
+                         "VALUES ('x', 't', 'b', '2026-01-01', 'info', 0)")
+            1 / 0
+    with store.connection() as conn:
+        assert not conn.in_transaction
+    assert store.notification_counts("x") == (0, 0)
+
+
+def test_password_hash_runs_outside_the_write_lock(store, monkeypatch):
+    real = store.hash_password
+    locked = []
+
+    def hash_and_probe(password, *args):
+        probe = sqlite3.connect(store.current_path(), timeout=0, isolation_level=None)
+        try:
+            probe.execute("BEGIN IMMEDIATE")        # outro escritor consegue o lock durante o hash
+            probe.execute("ROLLBACK")
+        except sqlite3.OperationalError:
+            locked.append(password)
+        finally:
+            probe.close()
+        return real(password, *args)
+
+    monkeypatch.setattr(store, "hash_password", hash_and_probe)
+    assert store.create_user("carla", "pw-1", "Planner", seed=False)[0]
+    assert store.set_password("carla", "pw-2")
+    assert locked == []
+    assert store.authenticate("carla", "pw-2")[0]
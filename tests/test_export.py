@@ -0,0 +1,23 @@
+import io
+import os
+
+import pytest
+
+from vip import anonymize, export
+
+
+@pytest.fixture
+def rfps(store, monkeypatch):
+    monkeypatch.setenv(anonymize.KEY_ENV, "test-key")
+    for i in range(10):
+        store.add_rfp("planner", {"submitted_at": f"2025-03-{i + 1:02d} 10:00", "title": f"Proposal {i}",
+                                  "target_name": "Harbor Hall", "target_type": "Venue", "budget": "$5,000"})
+    return store
+
+
+def test_export_file_streams_to_a_temp_file(rfps):
+    fh = export.export_file("rfps", compress=True, anonymize=True)
+    assert isinstance(fh, io.RawIOBase) and fh.tell() == 0
+    assert fh.read() == export.export_bytes("rfps", compress=True, anonymize=True)
+    fh.close()
+    assert not os.path.exists(fh.path)
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vip import marketplace
+from vip.filters import FilterIndex
+from vip.marketplace import OPTION_COLUMNS
+
+
+@pytest.fixture
+def df(catalog):
+    return marketplace.get_marketplace(catalog).df
+
+
+def _expected(df, equals, price_range=None):
+    mask = np.ones(len(df), dtype=bool)
+    for col, val in equals.items():
+        if val not in (None, "All"):
+            mask &= (df[col] == val).fillna(False).to_numpy(dtype=bool)
+    if price_range is not None:
+        mask &= df["price"].between(*price_range).fillna(False).to_numpy(dtype=bool)
+    return np.flatnonzero(mask)
+
+
+def _queries(df):
+    rng = np.random.default_rng(0)
+    for _ in range(60):
+        equals = {c: rng.choice(["All"] + df[c].dropna().unique().tolist()) for c in ("type", "city", "category")}
+        lo = int(rng.integers(0, 600))
+        yield equals, (lo, lo + int(rng.integers(0, 600))) if rng.random() < 0.7 else None
+
+
+def test_query_matches_pandas_masks(df):
+    idx = FilterIndex(df, columns=OPTION_COLUMNS)
+    for equals, price in _queries(df):
+        assert np.array_equal(idx.query(equals, price), _expected(df, equals, price))
+    assert idx.query({"city": "Atlantis"}).size == 0
+    assert np.array_equal(idx.query(), np.arange(len(df)))
+
+
+def test_updated_matches_a_fresh_index(df):
+    idx = FilterIndex(df, columns=OPTION_COLUMNS)
+    changed = df.astype({"price": "int64"})
+    rows = [3, 10, 11, 500, 999]
+    for c in ("city", "category", "type"):
+        changed[c] = changed[c].cat.add_categories(["Lisbon", "Zebraology", "Yacht"])
+    changed.loc[rows[:2], "city"] = "Lisbon"
+    changed.loc[rows[2], "category"] = "Zebraology"
+    changed.loc[rows[3], "type"] = np.nan                          # valor apagado
+    changed.loc[rows, "price"] = [1, 9999, 250, 250, 1]
+    new = changed.iloc[[0, 1]].assign(city="Lisbon", type="Yacht", price=[125, 125])
+    changed = pd.concat([changed, new], ignore_index=True)
+
+    out = idx.updated(changed, rows + [len(df), len(df) + 1])
+    fresh = FilterIndex(changed, columns=OPTION_COLUMNS)
+    for c in OPTION_COLUMNS:
+        assert out.values(c) == fresh.values(c) == sorted(changed[c].dropna().unique().tolist())
+    for equals, price in [*_queries(changed), ({"city": "Lisbon"}, None), ({"type": "Yacht"}, (100, 130)),
+                          ({"category": "Zebraology"}, (0, 10**6))]:
+        assert np.array_equal(out.query(equals, price), fresh.query(equals, price))
+        assert np.array_equal(out.query(equals, price), _expected(changed, equals, price))
+    assert np.array_equal(idx.query({"city": "Lisbon"}), [])      # o índice original não muda
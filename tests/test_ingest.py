@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vip import ingest, marketplace
+
+
+def _rows(catalog, n=2):
+    return pd.read_csv(catalog).head(n)
+
+
+def test_upsert_matches_fresh_build(catalog, tmp_path):
+    rows = _rows(catalog, 3)
+    rows.loc[0, "city"] = "Lisbon"
+    rows.loc[1, "name"] = rows.loc[1, "name"].upper()         # mesma chave, outro texto
+    new = dict(type="Venue", name="Casa Nova", category="Ballroom", city="Porto", capacity=200,
+               price_range="", rating=4.7, contact_email="casa@nova.pt", price=480)
+    src = tmp_path / "import.csv"
+    pd.concat([rows, pd.DataFrame([new, new])]).to_csv(src, index=False)
+
+    report = ingest.ingest(src, catalog, chunk_rows=2)
+    assert (report.inserted, report.updated, report.unchanged, report.duplicates) == (1, 2, 1, 1)
+
+    ds = marketplace.get_marketplace(catalog)
+    assert len(ds.df) == 1001
+    assert ds.df.iloc[-1]["price_range"] == "$$$$"              # derivado do price
+    marketplace.clear_cache()
+    fresh = marketplace.get_marketplace(catalog)
+    assert fresh.df.equals(ds.df) and fresh.options == ds.options
+    for eq, text in [({"city": "Lisbon"}, ""), ({"city": "Porto"}, ""), ({}, "casa nova"), ({}, "hotel")]:
+        assert np.array_equal(fresh.query(eq, text=text), ds.query(eq, text=text))
+
+
+def test_invalid_rows_are_reported(catalog, tmp_path):
+    bad = _rows(catalog, 1).assign(capacity=-1, rating=7, contact_email="nope", price=500, price_range="$")
+    src = tmp_path / "import.csv"
+    bad.to_csv(src, index=False)
+    report = ingest.ingest(src, catalog)
+    assert report.rejected == 1 and report.inserted == report.updated == 0
+    assert {e["column"] for e in report.errors} == {"capacity", "rating", "contact_email", "price_range"}
+    assert {e["line"] for e in report.errors} == {2}
+
+
+def test_failed_import_leaves_live_dataset_intact(catalog, tmp_path):
+    live = marketplace.get_marketplace(catalog)
+    first = _rows(catalog, 1).assign(category="Zebraology")
+    filler = _rows(catalog, 2).tail(1)
+    src = tmp_path / "import.csv"
+    # 1º bloco válido (recategoriza a linha 0), 2º bloco com CSV quebrado
+    src.write_text(first.to_csv(index=False) + filler.to_csv(index=False, header=False) * 3 + 'a,"b,c\nx\n')
+    with pytest.raises(pd.errors.ParserError):
+        ingest.ingest(src, catalog, chunk_rows=2)
+
+    assert marketplace.get_marketplace(catalog) is live
+    assert len(live.text) == len(live.df)
+    assert live.query(text="zebraology").size == 0
+    assert 0 in live.query(text=str(live.df.iloc[0]["category"]))
+
+
+def test_upserted_does_not_touch_source_dataset(catalog):
+    ds = marketplace.get_marketplace(catalog)
+    row = ds.df.iloc[[0]].assign(name="Zebra Hall").reset_index(drop=True)
+    out = ds.upserted(row, [len(ds.df)])
+    assert out.query(text="zebra hall")[0] == len(ds.df)
+    assert out.text is not ds.text and len(ds.text) == len(ds.df)
+    assert ds.query(text="zebra").size == 0
+
+
+def test_later_duplicate_wins_across_chunks(catalog, tmp_path):
+    rows = _rows(catalog, 4)
+    last = rows.iloc[[0]].assign(city="Lisbon", price=777, price_range="$$$$")
+    src = tmp_path / "import.csv"
+    pd.concat([rows, last]).to_csv(src, index=False)               # a repetição fica noutro bloco
+    report = ingest.ingest(src, catalog, chunk_rows=2)
+    assert (report.updated, report.unchanged, report.duplicates) == (1, 3, 1)
+    row = marketplace.get_marketplace(catalog).df.iloc[0]
+    assert (row["city"], row["price"]) == ("Lisbon", 777)
+
+
+def test_chunked_upsert_matches_a_single_write(catalog):
+    ds = marketplace.get_marketplace(catalog)
+    n = len(ds.df)
+    rows = ds.df.iloc[[5, 1, 7]].assign(city="Porto", name=["A", "B", "C"]).reset_index(drop=True)
+    new = ds.df.iloc[[2, 3]].assign(category="Zebraology").reset_index(drop=True)
+    once = ds.upserted(pd.concat([rows, new], ignore_index=True), [5, 1, 7, n, n + 1])
+    work = marketplace.CatalogUpsert(ds).apply(rows.iloc[:2], [5, 1]).apply(new.iloc[:1], [n])
+    chunked = work.apply(pd.concat([rows.iloc[2:], new.iloc[1:]]), [7, n + 1]).finish()
+    assert chunked.df.equals(once.df) and chunked.options == once.options
+    for text in ("zebraology", "a", "porto"):
+        assert np.array_equal(chunked.query(text=text), once.query(text=text))
+    with pytest.raises(ValueError):
+        marketplace.CatalogUpsert(ds).apply(new.iloc[:1], [n + 3])
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vip import ledger, marketplace
+
+
+@pytest.fixture
+def raw(catalog):
+    """Transações sintéticas com os listings do catálogo como contrapartes."""
+    df = marketplace.get_marketplace(catalog).df
+    rng = np.random.default_rng(5)
+    n = 2000
+    pick = rng.integers(0, len(df), n)
+    dates = (np.datetime64("2025-01-01") + rng.integers(0, 400, n)).astype(str).astype(object)
+    dates[rng.random(n) < 0.02] = "not a date"
+    return pd.DataFrame({
+        "date": dates,
+        "counterparty": df["name"].to_numpy()[pick],
+        "service": df["category"].astype(str).to_numpy()[pick],
+        "amount": df["price"].to_numpy()[pick],
+        "status": rng.choice(["Completed", "Pending", "Refunded"], n),
+        "ref": [f"TXN-{i:05d}" for i in range(n)],
+    })
+
+
+def _expected(raw, status=None, amount=None, q="", date_from=None, date_to=None):
+    dates = pd.to_datetime(raw["date"], format="%Y-%m-%d", errors="coerce")
+    mask = pd.Series(True, index=raw.index)
+    if date_from is not None:
+        mask &= dates >= pd.Timestamp(date_from)
+    if date_to is not None:
+        mask &= dates < pd.Timestamp(date_to) + pd.Timedelta(days=1)
+    if status and status != "All":
+        mask &= raw["status"] == status
+    if amount is not None:
+        mask &= raw["amount"].between(*amount)
+    if q:
+        hay = raw["counterparty"] + "\x00" + raw["service"] + "\x00" + raw["ref"]
+        mask &= hay.str.lower().str.contains(q.lower(), regex=False)
+    return sorted(raw["ref"][mask])
+
+
+@pytest.mark.parametrize("kwargs", [
+    {},
+    {"date_from": "2025-03-01", "date_to": "2025-03-31"},
+    {"date_from": "2025-12-15"},
+    {"date_to": "2025-01-01"},                                  # um dia só, no limite inferior
+    {"date_from": "2026-06-01"},                                # depois de todas
+    {"date_from": "2025-05-10", "date_to": "2025-05-01"},       # invertido: vazio
+    {"status": "Pending", "amount": (100, 400), "date_from": "2025-02-01", "date_to": "2025-08-15"},
+    {"q": "hotel", "date_to": "2025-06-30"},
+    {"q": "TXN-0004", "status": "All"},
+])
+def test_filter_matches_pandas(raw, kwargs):
+    led = ledger.Ledger(raw)
+    got = led.filter(**kwargs)
+    assert sorted(got["ref"]) == _expected(raw, **kwargs)
+    dates = got["date"].dropna()
+    assert dates.is_monotonic_increasing
+
+
+def test_bounds(raw):
+    led = ledger.Ledger(raw)
+    valid = pd.to_datetime(raw["date"], format="%Y-%m-%d", errors="coerce").dropna()
+    assert led.date_bounds == (valid.min().date(), valid.max().date())
+    assert led.amount_bounds == (raw["amount"].min(), raw["amount"].max())
+    assert led.statuses == ["Completed", "Pending", "Refunded"]
+    assert ledger.Ledger(raw.iloc[:0]).date_bounds == (None, None)
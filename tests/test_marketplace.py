@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vip import marketplace
+
+
+@pytest.fixture
+def ds(catalog):
+    return marketplace.get_marketplace(catalog)
+
+
+def _sorted(ds, ids, col, descending):
+    frame = pd.DataFrame({"id": ids, "v": ds.df[col].to_numpy(dtype=np.float64)[ids]})
+    return frame.sort_values(["v", "id"], ascending=[not descending, True], na_position="last")["id"].to_numpy()
+
+
+@pytest.mark.parametrize("col, descending", [("price", False), ("price", True), ("rating", True),
+                                             ("capacity", True), ("capacity", False)])
+@pytest.mark.parametrize("page_size", [1, 7, 25, 100])
+def test_sort_page_matches_a_pandas_sort(ds, col, descending, page_size):
+    for ids in (np.arange(len(ds.df)), ds.query({"type": "Venue"}), ds.query(price_range=(100, 400))):
+        want = _sorted(ds, ids, col, descending)
+        pages = -(-ids.size // page_size)
+        got = np.concatenate([ds.sort_page(ids, col, descending, page=p, page_size=page_size) for p in range(pages)])
+        assert np.array_equal(got, want)
+        assert ds.sort_page(ids, col, descending, page=pages, page_size=page_size).size == 0
+
+
+def test_sort_page_ties_and_missing_values():
+    df = pd.DataFrame({"name": [f"L{i}" for i in range(60)], "price": [np.nan if i % 7 == 0 else i % 3 for i in range(60)]})
+    ds = marketplace.build_dataset(df)
+    ids = np.random.default_rng(1).permutation(60)
+    for descending in (False, True):
+        want = _sorted(ds, ids, "price", descending)
+        for page in range(4):                           # 1ª página: seleção parcial; demais: ordenação
+            assert np.array_equal(ds.sort_page(ids, "price", descending, page=page, page_size=10),
+                                  want[page * 10:(page + 1) * 10])
+    assert np.array_equal(ds.sort_page(ids, None, page=1, page_size=10), ids[10:20])
+    assert np.array_equal(ds.sort_page(ids, "name", page=0, page_size=10), ids[:10])    # não numérica
+
+
+def test_query_matches_pandas(ds):
+    df = ds.df
+    mask = ((df["city"] == df["city"].iloc[0]) & df["price"].between(150, 700)).to_numpy(dtype=bool)
+    equals = {"city": df["city"].iloc[0], "type": "All"}
+    assert np.array_equal(ds.query(equals, (150, 700)), np.flatnonzero(mask))
+
+    hits, _ = ds.text.search("hotel")
+    got = ds.query(equals, (150, 700), text="hotel")
+    assert got.tolist() == [i for i in hits if mask[i]]                 # ordem de relevância preservada
+    assert ds.query(text="   ").tolist() == np.arange(len(df)).tolist()
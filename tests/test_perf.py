@@ -0,0 +1,19 @@
+from vip import perf
+
+
+def test_state_size_is_sampled(monkeypatch):
+    monkeypatch.setattr(perf, "ENABLED", True)
+    perf.reset()
+    calls = []
+    real = perf.state_sizes
+    monkeypatch.setattr(perf, "state_sizes", lambda s: calls.append(1) or real(s))
+    state = {"big": list(range(1000))}
+    for _ in range(2 * perf.STATE_EVERY + 1):
+        perf.begin_run(state, "dashboard")
+        perf.end_run(state, "dashboard")
+    assert len(calls) == 3                          # 1º rerun e a cada STATE_EVERY
+    assert perf.rerun_counts() == {"dashboard": 2 * perf.STATE_EVERY + 1}
+    summ = perf.summary().set_index(["kind", "name"])
+    assert summ.loc[("state", "session_kb"), "count"] == 3
+    assert summ.loc[("route", "dashboard"), "count"] == 2 * perf.STATE_EVERY + 1
+    perf.reset()
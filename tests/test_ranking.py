@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vip.ranking import Ranker, RankWeights
+
+
+@pytest.fixture
+def ranker():
+    rng = np.random.default_rng(7)
+    n = 500
+    return Ranker(pd.DataFrame({
+        "rating": rng.choice([3.0, 4.0, 4.5, 5.0, np.nan], n),     # poucos valores: muitos empates
+        "price": rng.choice([100.0, 250.0, 400.0, np.nan], n),
+        "capacity": rng.choice([0, 50, 120, 300], n),
+    }))
+
+
+def _full_sort(ranker, ids, k, **kwargs):
+    s = ranker.scores(ids, **kwargs)
+    order = np.lexsort((ids, -s))[:k]
+    return ids[order], s[order]
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"budget": 300}, {"attendees": 100},
+                                    {"budget": 150, "attendees": 40, "text_scores": np.linspace(0, 2.5, 400)}])
+@pytest.mark.parametrize("k", [1, 7, 25, 399, 400, 1000])
+def test_top_k_matches_a_full_sort(ranker, kwargs, k):
+    ids = np.random.default_rng(k).permutation(500)[:400]
+    got, expected = ranker.top_k(ids, k, **kwargs), _full_sort(ranker, ids, k, **kwargs)
+    assert np.array_equal(got[0], expected[0]) and np.allclose(got[1], expected[1])
+
+
+def test_ties_at_the_k_boundary_go_by_id():
+    ranker = Ranker(pd.DataFrame({"rating": [5.0, 4.0, 4.0, 4.0, 4.0, 3.0], "price": 100.0}))
+    ids = np.array([5, 4, 3, 2, 1, 0])
+    top, scores = ranker.top_k(ids, 3)
+    assert top.tolist() == [0, 1, 2] and scores[1] == scores[2]
+    assert ranker.top_k(ids, 0)[0].size == 0 and ranker.top_k(ids[:0], 3)[0].size == 0
+
+
+def test_absent_components_renormalize_the_weights(ranker):
+    ids = np.arange(500)
+    w = RankWeights(rating=0.5, price=0.3, capacity=0.15, text=0.05)
+    base = (w.rating * ranker.rating + w.price * ranker.cheapness) / (w.rating + w.price)
+    assert np.allclose(ranker.scores(ids, weights=w), base)          # sem público e sem texto
+    only_rating = RankWeights(rating=1.0, price=0.0, capacity=0.0, text=0.0)
+    assert np.allclose(ranker.scores(ids, attendees=80, weights=only_rating), ranker.rating)
+    assert np.all((ranker.scores(ids, budget=200, attendees=80) >= 0) & (ranker.scores(ids) <= 1))
+
+
+@pytest.mark.parametrize("bad", [0, -50])
+def test_non_positive_budget_and_attendees_are_ignored(ranker, bad):
+    ids = np.arange(500)
+    plain = ranker.scores(ids)
+    assert np.array_equal(ranker.scores(ids, budget=bad), plain)
+    assert np.array_equal(ranker.scores(ids, attendees=bad), plain)
+    assert np.isfinite(ranker.scores(ids, budget=bad, attendees=bad)).all()
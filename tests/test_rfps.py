@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vip import rfps
+
+
+def _raw(ids, days, users=("ana", "bia", "caio")):
+    return pd.DataFrame({
+        "id": ids,
+        "username": [users[i % len(users)] for i in ids],
+        "submitted_at": [f"2026-01-{d:02d} 09:00" for d in days],
+        "title": [f"rfp {i}" for i in ids], "scope": "", "target_date": "2026-06-01",
+        "budget": [f"${i}00" if i % 3 else "" for i in ids],
+        "target_name": [f"Venue {i % 4}" for i in ids], "target_type": "Venue", "target_city": "Porto",
+        "target_contact": "", "price": [str(i * 10) if i % 2 else "" for i in ids],
+    })
+
+
+def _same(a, b):
+    pd.testing.assert_frame_equal(a.df, b.df)
+    for user in ("ana", "bia", "caio", "nobody"):
+        pd.testing.assert_frame_equal(a.for_user(user), b.for_user(user))
+    for target in ("Venue 0", "Venue 3"):
+        pd.testing.assert_frame_equal(a.for_target(target), b.for_target(target))
+    pd.testing.assert_frame_equal(a.between("2026-01-03", "2026-01-07"), b.between("2026-01-03", "2026-01-07"))
+    pd.testing.assert_frame_equal(a.latest(5), b.latest(5))
+
+
+@pytest.mark.parametrize("days", [range(1, 41), [20 - i % 20 for i in range(40)]])   # em ordem / fora de ordem
+def test_extended_matches_a_full_build(days):
+    days = list(days)
+    raw = _raw(list(range(1, 41)), days)
+    hist = rfps.RfpHistory.build(raw.iloc[:5])
+    for lo in range(5, 40, 7):                          # vários appends: força a realocação dos buffers
+        hist = hist.extended(raw.iloc[lo:lo + 7])
+    assert hist.last_id == 40 and len(hist) == 40
+    _same(hist, rfps.RfpHistory.build(raw))
+    pd.testing.assert_frame_equal(hist.df, rfps._typed(raw))
+
+
+def test_older_snapshots_do_not_see_appended_rows():
+    raw = _raw(list(range(1, 31)), range(1, 31))
+    old = rfps.RfpHistory.build(raw.iloc[:20])
+    frozen = old.for_user("ana")
+    new = old.extended(raw.iloc[20:25])
+    pd.testing.assert_frame_equal(old.for_user("ana"), frozen)
+    assert len(old) == 20 and len(old.between()) == 20 and old.latest(1)["id"].item() == 20
+
+    branch = old.extended(raw.iloc[20:30])              # estende um snapshot que não é mais o último
+    _same(branch, rfps.RfpHistory.build(raw))
+    _same(new, rfps.RfpHistory.build(raw.iloc[:25]))
+    assert np.array_equal(old.df["id"], np.arange(1, 21))
@@ -0,0 +1,82 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vip import marketplace
+from vip.textindex import TextIndex
+
+
+@pytest.fixture
+def fields(catalog):
+    df = marketplace.get_marketplace(catalog).df
+    return [df[c].astype("string").fillna("").str.lower() for c in ("name", "category")]
+
+
+def _grams(s):
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def _contains(fields, q):
+    return np.flatnonzero(np.logical_or.reduce([f.str.contains(q, regex=False).to_numpy(dtype=bool) for f in fields]))
+
+
+def _word_prefix(fields, q):
+    pattern = r"(?<![0-9a-z])" + re.escape(q)
+    return np.flatnonzero(np.logical_or.reduce([f.str.contains(pattern).to_numpy(dtype=bool) for f in fields]))
+
+
+def _fuzzy(fields, q, min_score=0.5):
+    qg = _grams(q)
+    scores = np.array([len(qg & set().union(*map(_grams, row))) / len(qg) for row in zip(*fields)])
+    ids = np.flatnonzero(scores >= min_score)
+    return ids, scores[ids]
+
+
+QUERIES = ["hotel", "cater", "ball", "room", "photo", "event", "the", "xyz"]
+
+
+def test_match_and_prefix_match_pandas(fields):
+    idx = TextIndex(*fields)
+    for q in QUERIES:
+        assert np.array_equal(idx.match(q), _contains(fields, q)), q
+    for q in ("h", "gr", "ca", "5", "zz"):
+        assert np.array_equal(idx.match(q), _word_prefix(fields, q)), q
+
+
+@pytest.mark.parametrize("q", ["catring", "hotell", "balroom", "photgraphy", "evnts"])
+def test_fuzzy_scores_match_a_brute_force_overlap(fields, q):
+    ids, scores = TextIndex(*fields).fuzzy(q)
+    want_ids, want_scores = _fuzzy(fields, q)
+    assert np.array_equal(ids, want_ids) and np.allclose(scores, want_scores)
+
+
+def test_search_ranks_prefix_then_substring_then_fuzzy(fields):
+    idx = TextIndex(*fields)
+    q = "ball"
+    ids, scores = idx.search(q)
+    exact = _contains(fields, q)
+    prefix = _word_prefix(fields, q)
+    f_ids, f_scores = _fuzzy(fields, q)
+    want = {i: 2.5 if i in prefix else 2.0 for i in exact}
+    want.update({i: s for i, s in zip(f_ids, f_scores) if i not in want})
+    order = sorted(want, key=lambda i: (-want[i], i))
+    assert ids.tolist() == order and np.allclose(scores, [want[i] for i in order])
+
+
+def test_incremental_changes_match_a_fresh_build(fields):
+    idx = TextIndex(*fields).copy()
+    name, category = (f.tolist() for f in fields)
+    idx.update(4, "Zebra Catering Hall", "Catering")
+    name[4], category[4] = "zebra catering hall", "catering"
+    idx.remove(7)
+    name[7] = category[7] = ""
+    idx.extend(len(name), ["Nova Casa", "Hotel Zebra"], ["Ballroom", "Hotel"])
+    name += ["nova casa", "hotel zebra"]
+    category += ["ballroom", "hotel"]
+    fresh = TextIndex(name, category)
+    for q in QUERIES + ["zebra", "nova", "z", "catring"]:
+        (got, got_scores), (want, want_scores) = idx.search(q), fresh.search(q)
+        assert np.array_equal(got, want) and np.allclose(got_scores, want_scores), q
+    assert 7 not in idx.match("").tolist()             # removida: some até da lista completa
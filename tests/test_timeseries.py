@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vip import timeseries
+from vip.timeseries import DailyAgg
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Conta as reconstruções completas feitas por get_daily."""
+    calls = []
+    real = DailyAgg.build.__func__
+    monkeypatch.setattr(DailyAgg, "build", classmethod(lambda cls, *a: calls.append(a) or real(cls, *a)))
+    return calls
+
+
+def _fresh(metric):
+    src = timeseries.SOURCES[metric]
+    return DailyAgg.build(src.since(0), src.prepare, src.watermark())
+
+
+def _same(agg, fresh):
+    assert np.array_equal(agg.days, fresh.days) and np.array_equal(agg.count, fresh.count)
+    assert np.allclose(agg.total, fresh.total) and agg.rows == fresh.rows and agg.mark == fresh.mark
+
+
+def test_insert_extends_the_cached_aggregate(store, builds):
+    store.add_transaction("ana", "2026-01-05", "Grand Hall", "Venue", 1200, "Completed", "T-1")
+    timeseries.get_daily("revenue")
+    store.add_transaction("ana", "2026-01-05", "Grand Hall", "Venue", 300, "Completed", "T-2")
+    store.add_transaction("ana", "2026-01-09", "Grand Hall", "Venue", 50, "Pending", "T-3")
+    agg = timeseries.get_daily("revenue")
+    assert len(builds) == 1                             # só a primeira leitura
+    _same(agg, _fresh("revenue"))
+    assert agg.frame().loc["2026-01-05", "total"] == 1500
+
+
+def test_status_update_forces_a_rebuild(store, builds):
+    tx = store.add_transaction("ana", "2026-01-05", "Grand Hall", "Venue", 1200, "Completed", "T-1")
+    store.add_transaction("ana", "2026-01-06", "Grand Hall", "Venue", 700, "Completed", "T-2")
+    timeseries.get_daily("revenue")
+    with store.transaction() as conn:
+        conn.execute("UPDATE transactions SET status = 'Refunded' WHERE id = ?", (tx,))
+    store.add_transaction("ana", "2026-01-07", "Grand Hall", "Venue", 10, "Completed", "T-3")
+    agg = timeseries.get_daily("revenue")
+    assert len(builds) == 2
+    _same(agg, _fresh("revenue"))
+    assert agg.frame()["total"].sum() == 710                  # o reembolso saiu da receita
+
+
+def test_user_delete_forces_a_rebuild(store, builds):
+    for name in ("ana", "bia", "caio"):
+        store.create_user(name, "secret123", "Planner", seed=False)
+    before = timeseries.get_daily("signups")
+    with store.transaction() as conn:
+        conn.execute("DELETE FROM users WHERE username = 'bia'")
+    store.create_user("duda", "secret123", "Planner", seed=False)  # mesmo total, id maior
+    agg = timeseries.get_daily("signups")
+    assert len(builds) == 2 and agg is not before
+    _same(agg, _fresh("signups"))
+
+
+def test_weekly_frame_covers_the_window_edges():
+    days = (np.array(["2026-01-07", "2026-01-12", "2026-02-01"], dtype="datetime64[D]")
+            .astype(np.int64))                          # quarta, segunda, domingo
+    agg = DailyAgg(days, np.array([1, 2, 4]), np.array([10.0, 20.0, 40.0]), 3, 3, ())
+    start, end = pd.Timestamp("2026-01-07"), pd.Timestamp("2026-02-01")
+    weekly, daily = agg.frame("W", start, end), agg.frame("D", start, end)
+    assert weekly.index[0] == pd.Timestamp("2026-01-05")        # segunda da semana de `start`
+    assert weekly.index[-1] == pd.Timestamp("2026-01-26")       # segunda da semana de `end`
+    assert (weekly.index.dayofweek == 0).all() and len(weekly) == 4
+    assert weekly.sum().tolist() == daily.sum().tolist() == [7, 70.0]
+    assert weekly["total"].tolist() == [10.0, 20.0, 0.0, 40.0]
+    # a janela corta os dias fora dela mesmo dentro da primeira/última semana
+    assert agg.frame("W", "2026-01-08", "2026-01-31")["total"].tolist() == [0.0, 20.0, 0.0, 0.0]
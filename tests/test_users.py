@@ -0,0 +1,10 @@
+def test_bulk_update_skips_excluded_accounts(store):
+    for name, role in (("boss", "Admin"), ("ana", "Planner"), ("bia", "Planner")):
+        store.create_user(name, "secret123", role, seed=False)
+
+    assert store.set_users_status("Suspended", match={}, exclude=("Boss",)) == 2
+    assert store.set_users_role("Vendor", usernames=["boss", "ana"], exclude=("boss",)) == 1
+    users = store.list_users().set_index("username")
+    assert users.loc["boss", ["role", "status"]].tolist() == ["Admin", "Active"]
+    assert users.loc["ana", ["role", "status"]].tolist() == ["Vendor", "Suspended"]
+    assert users.loc["bia", "status"] == "Suspended"
@@ -0,0 +1 @@
+# VIP – backend helpers (sem Streamlit) usados pelo VIPv3.py
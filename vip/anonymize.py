@@ -0,0 +1,159 @@
+# =====================
+#  ANONYMIZATION
+# =====================
+# Etapa de anonimização das exportações B2B, aplicada coluna a coluna sobre
+# blocos (DataFrames) do export:
+#   - identificadores viram pseudônimos por hash com chave secreta (BLAKE2b em
+#     modo MAC: estáveis entre exportações, sem como reverter sem a chave); o
+#     hash roda só nos valores únicos de cada bloco, com cache entre blocos;
+#   - datas viram mês (YYYY-MM) e valores viram faixas;
+#   - combinações de quase-identificadores com menos de k linhas no dataset
+#     inteiro têm essas colunas suprimidas ("*"). As contagens vêm de uma
+#     primeira passada (`observe`) antes da passada de escrita;
+#   - texto livre (título/escopo das RFPs costuma citar o fornecedor pelo nome)
+#     não sai na exportação anonimizada: `exportable` tira essas colunas.
+# A chave vem de VIP_ANON_KEY ou de data/anon.key (gerada na primeira vez).
+import hashlib
+import os
+import secrets
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+KEY_ENV = "VIP_ANON_KEY"
+DEFAULT_KEY_PATH = Path(__file__).resolve().parent.parent / "data" / "anon.key"
+DEFAULT_K = 5
+SUPPRESSED = "*"
+AMOUNT_EDGES = [0, 100, 250, 500, 1_000, 2_500, 5_000, 10_000]
+AMOUNT_LABELS = [f"{lo}-{hi - 1}" for lo, hi in zip(AMOUNT_EDGES, AMOUNT_EDGES[1:])] + [f"{AMOUNT_EDGES[-1]}+"]
+
+
+@dataclass(frozen=True)
+class Profile:
+    pseudonyms: dict     # coluna -> prefixo do pseudônimo
+    dates: tuple
+    amounts: tuple
+    quasi: tuple         # quase-identificadores para a supressão k-anônima
+    free_text: tuple = ()   # nunca exportadas anonimizadas
+
+
+PROFILES = {
+    "transactions": Profile(pseudonyms={"counterparty": "cp", "ref": "ref"},
+                            dates=("date",), amounts=("amount",),
+                            quasi=("date", "service", "amount", "status")),
+    "rfps": Profile(pseudonyms={"target_name": "tn", "target_contact": "tc"},
+                    dates=("submitted_at", "target_date"), amounts=("budget", "price"),
+                    quasi=("submitted_at", "target_type", "target_city", "budget"),
+                    free_text=("title", "scope")),
+}
+
+
+def exportable(dataset: str, columns) -> list:
+    """Colunas que podem sair numa exportação anonimizada (sem texto livre)."""
+    return [c for c in columns if c not in PROFILES[dataset].free_text]
+
+
+def load_key(path=None) -> bytes:
+    env = os.environ.get(KEY_ENV)
+    if env:
+        return env.encode("utf-8")
+    path = Path(path or DEFAULT_KEY_PATH)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(secrets.token_hex(32))
+        path.chmod(0o600)
+    return path.read_text().strip().encode("utf-8")
+
+
+class Pseudonymizer:
+    def __init__(self, key: bytes, prefix: str, length: int = 12):
+        if len(key) > hashlib.blake2b.MAX_KEY_SIZE:
+            key = hashlib.blake2b(key).digest()
+        self.prefix = prefix
+        # estado com chave/prefixo já absorvidos; cada valor só copia e atualiza
+        # (~5x mais rápido que hmac.new por valor)
+        self._base = hashlib.blake2b(key=key, person=prefix.encode("utf-8")[:16], digest_size=length // 2)
+        self._cache: dict = {}
+
+    def _token(self, value: str) -> str:
+        h = self._base.copy()
+        h.update(value.encode("utf-8"))
+        return f"{self.prefix}_{h.hexdigest()}"
+
+    def __call__(self, values: pd.Series) -> np.ndarray:
+        raw = values.astype("string").fillna("").to_numpy(dtype=object)
+        codes, uniques = pd.factorize(raw)
+        cache, token = self._cache, self._token
+        mapped = [cache.get(u) or cache.setdefault(u, token(u) if u else "") for u in uniques.tolist()]
+        return np.array(mapped or [""], dtype=object)[codes]
+
+
+def _numeric(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype("float64")
+    digits = values.astype("string").str.replace(r"[^0-9.\-]", "", regex=True)
+    return pd.to_numeric(digits.replace("", pd.NA), errors="coerce").astype("float64")
+
+
+def bucket_amounts(values: pd.Series) -> np.ndarray:
+    nums = _numeric(values).to_numpy()
+    idx = np.clip(np.digitize(nums, AMOUNT_EDGES) - 1, 0, len(AMOUNT_LABELS) - 1)
+    return np.where(np.isnan(nums), "", np.asarray(AMOUNT_LABELS, dtype=object)[idx])
+
+
+def generalize_dates(values: pd.Series) -> np.ndarray:
+    """'YYYY-MM-DD[ HH:MM]' -> 'YYYY-MM'."""
+    return values.astype("string").fillna("").str.slice(0, 7).to_numpy(dtype=object)
+
+
+class Anonymizer:
+    def __init__(self, dataset: str, key: bytes | None = None, k: int = DEFAULT_K):
+        self.profile = PROFILES[dataset]
+        self.k = k
+        key = key if key is not None else load_key()
+        self._pseudo = {c: Pseudonymizer(key, p) for c, p in self.profile.pseudonyms.items()}
+        self._counts: dict = {}
+
+    def quasi_columns(self, columns) -> list:
+        return [c for c in self.profile.quasi if c in columns]
+
+    def generalize(self, df: pd.DataFrame) -> pd.DataFrame:
+        out = df.drop(columns=[c for c in self.profile.free_text if c in df.columns])
+        for c, fn in self._pseudo.items():
+            if c in out:
+                out[c] = fn(out[c])
+        for c in self.profile.dates:
+            if c in out:
+                out[c] = generalize_dates(out[c])
+        for c in self.profile.amounts:
+            if c in out:
+                out[c] = bucket_amounts(out[c])
+        return out
+
+    def observe(self, generalized: pd.DataFrame):
+        """Acumula as contagens das combinações de quase-identificadores (1ª passada)."""
+        quasi = self.quasi_columns(generalized.columns)
+        if not quasi or generalized.empty:
+            return
+        for combo, n in generalized.groupby(quasi, sort=False, dropna=False).size().items():
+            combo = combo if isinstance(combo, tuple) else (combo,)
+            self._counts[combo] = self._counts.get(combo, 0) + int(n)
+
+    def suppress(self, generalized: pd.DataFrame) -> pd.DataFrame:
+        quasi = self.quasi_columns(generalized.columns)
+        if not quasi or generalized.empty or self.k <= 1:
+            return generalized
+        # contagem por grupo do bloco -> linhas via códigos do groupby
+        grouped = generalized.groupby(quasi, sort=False, dropna=False)
+        combos = grouped.size().index
+        counts = np.array([self._counts.get(c if isinstance(c, tuple) else (c,), 0) for c in combos])
+        rare = (counts < self.k)[grouped.ngroup().to_numpy()]
+        if rare.any():
+            generalized = generalized.copy()
+            generalized.loc[rare, quasi] = SUPPRESSED
+        return generalized
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.suppress(self.generalize(df))
@@ -0,0 +1,374 @@
+# =====================
+#  DATA CLIENTS API
+# =====================
+# API HTTP/JSON somente leitura para os clientes B2B (data_clients), num
+# processo separado do Streamlit (cliente que faz polling não passa por rerun):
+#   GET /v1/health
+#   GET /v1/marketplace/search?type=&city=&category=&price_min=&price_max=&q=
+#                              &available_from=&available_to=&sort=&budget=&attendees=&page=&page_size=
+#   GET /v1/transactions/stats?by=status|day
+#   GET /v1/series/<revenue|rfps|signups>?freq=D|W&days=
+#   GET /v1/export/<transactions|rfps>?from=&to=&columns=&k=&gzip=1   (sempre anonimizado)
+# Autenticação por chave (Authorization: Bearer <chave> ou X-API-Key), mapeada
+# para o id do cliente em data_clients. O ETag de cada resposta vem da consulta
+# normalizada + versão dos dados (digest do catálogo, versão do ledger, ...),
+# então If-None-Match responde 304 antes de qualquer consulta; respostas JSON
+# ficam num cache LRU indexado pelo próprio ETag. Nomes de contrapartes não saem
+# por aqui (só pseudonimizados, na exportação).
+#   python -m vip.api issue-key 3001
+#   python -m vip.api serve --port 8502
+import argparse
+import hashlib
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from vip import db, export, timeseries
+from vip.anonymize import DEFAULT_K, exportable
+from vip.availability import get_availability
+from vip.marketplace import DISPLAY_COLUMNS, get_marketplace
+from vip.seeds import _seed_data_clients
+
+DEFAULT_CSV = Path(__file__).resolve().parent.parent / "data" / "marketplace_clean_numeric.csv"
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+MAX_SERIES_DAYS = 3660      # janela máxima de /series (dias zerados entram no frame)
+CACHE_ENTRIES = 512
+ALLOWED_CLIENT_STATUS = ("Active", "Trial")
+SORTS = {
+    # valor de `sort` -> (coluna, decrescente); mesmos critérios do marketplace
+    "best": ("best", True),
+    "relevance": (None, False),
+    "price": ("price", False),
+    "-price": ("price", True),
+    "-rating": ("rating", True),
+    "-capacity": ("capacity", True),
+}
+STATS_DIMS = ("status", "day")
+
+
+class ApiError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = CACHE_ENTRIES):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+# ---------- parâmetros ----------
+def normalize(query: str, allowed) -> tuple:
+    """Consulta canônica: só parâmetros conhecidos, sem vazios/"All", ordenada."""
+    params = {}
+    for name, values in parse_qs(query, keep_blank_values=False).items():
+        if name not in allowed:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"unknown parameter: {name}")
+        value = values[-1].strip()
+        if value and value != "All":
+            params[name] = value.lower() if name == "q" else value
+    return tuple(sorted(params.items()))
+
+
+def _int(params: dict, name: str, default=None, lo=None, hi=None):
+    raw = params.get(name)
+    if raw is None:
+        return default
+    try:
+        value = int(float(raw))
+    except (ValueError, OverflowError):     # "abc", "inf", "nan"
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be a number") from None
+    if lo is not None and value < lo:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be >= {lo}")
+    return min(value, hi) if hi is not None else value
+
+
+def _date(params: dict, name: str):
+    raw = params.get(name)
+    if raw is not None:
+        try:
+            date.fromisoformat(raw)
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be YYYY-MM-DD") from None
+    return raw
+
+
+def _etag(*parts) -> str:
+    return '"' + hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+
+def _records(frame) -> list:
+    return json.loads(frame.to_json(orient="records", date_format="iso", double_precision=4))
+
+
+# ---------- endpoints ----------
+class Api:
+    def __init__(self, csv_path=DEFAULT_CSV, cache_entries: int = CACHE_ENTRIES):
+        self.csv_path = Path(csv_path)
+        self.cache = LRUCache(cache_entries)
+        self.clients = {c["id"]: c for c in _seed_data_clients()}
+
+    def client_for(self, token: str) -> dict:
+        client_id = db.api_key_client(token)
+        client = self.clients.get(client_id)
+        if client is None:
+            raise ApiError(HTTPStatus.UNAUTHORIZED, "missing or invalid API key")
+        if client["status"] not in ALLOWED_CLIENT_STATUS:
+            raise ApiError(HTTPStatus.FORBIDDEN, f"client {client_id} is {client['status']}")
+        return client
+
+    # cada rota: (parâmetros aceitos, versão dos dados(params, arg), cálculo(params, arg))
+    def _search_version(self, params, _):
+        ds = get_marketplace(self.csv_path)
+        return (ds.digest, db.bookings_version() if "available_from" in params else 0)
+
+    def _search(self, params, _):
+        ds = get_marketplace(self.csv_path)
+        sort = params.get("sort", "best")
+        if sort not in SORTS:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"sort must be one of {sorted(SORTS)}")
+        lo, hi = ds.price_bounds or (0, 10**9)
+        price = (_int(params, "price_min", lo), _int(params, "price_max", hi))
+        q = params.get("q", "")
+        ids = ds.query({c: params.get(c, "All") for c in ("type", "city", "category")},
+                       price_range=price, text=q)
+        available = (_date(params, "available_from"), _date(params, "available_to"))
+        if None not in available and date.fromisoformat(available[1]) < date.fromisoformat(available[0]):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "available_to must not be before available_from")
+        if available[0] is not None:
+            busy = get_availability().busy(*available)
+            ids = ids[~np.isin(ids, ds.rows_for_names(busy))]
+        page = _int(params, "page", 1, lo=1)
+        size = _int(params, "page_size", DEFAULT_PAGE_SIZE, lo=1, hi=MAX_PAGE_SIZE)
+        sort_by, descending = SORTS[sort]
+        if sort_by == "best":
+            page_ids = ds.rank_page(ids, page=page - 1, page_size=size, text=q,
+                                    budget=_int(params, "budget", lo=1), attendees=_int(params, "attendees", lo=1))
+        else:
+            page_ids = ds.sort_page(ids, sort_by, descending, page=page - 1, page_size=size)
+        cols = [c for c in DISPLAY_COLUMNS if c in ds.df.columns]
+        total = int(ids.size)
+        pages = max(1, -(-total // size))
+        return {"total": total, "page": page, "page_size": size, "pages": pages,
+                "next_page": page + 1 if page < pages else None,
+                "items": _records(ds.df.iloc[page_ids][cols])}
+
+    def _stats(self, params, _):
+        by = params.get("by", "status")
+        if by not in STATS_DIMS:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"by must be one of {list(STATS_DIMS)}")
+        rows = sorted(db.kpis(by).items())
+        return {"by": by, "items": [{"key": k, "amount": a, "count": n} for k, (a, n) in rows]}
+
+    def _series_version(self, params, metric):
+        if metric not in timeseries.SOURCES:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"unknown series: {metric}")
+        # janela com `days` termina hoje: o dia entra na versão
+        return (timeseries.SOURCES[metric].watermark(), date.today().isoformat() if "days" in params else "")
+
+    def _series(self, params, metric):
+        freq = params.get("freq", "D")
+        if freq not in timeseries.FREQS:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"freq must be one of {sorted(timeseries.FREQS)}")
+        s = timeseries.series(metric, freq, _int(params, "days", None, lo=1, hi=MAX_SERIES_DAYS))
+        return {"metric": metric, "freq": freq,
+                "items": [{"date": d.strftime("%Y-%m-%d"), "value": float(v)} for d, v in s["value"].items()]}
+
+    ROUTES = {
+        "health": ((), lambda self, p, a: 0, lambda self, p, a: {"status": "ok"}),
+        "marketplace/search": (("type", "city", "category", "price_min", "price_max", "q", "available_from",
+                                "available_to", "sort", "budget", "attendees", "page", "page_size"),
+                               _search_version, _search),
+        "transactions/stats": (("by",), lambda self, p, a: db.transactions_version(), _stats),
+        "series": (("freq", "days"), _series_version, _series),
+    }
+
+    def resolve(self, path: str) -> tuple:
+        parts = path.strip("/").split("/")
+        if len(parts) < 2 or parts[0] != "v1":
+            raise ApiError(HTTPStatus.NOT_FOUND, "not found")
+        route, arg = "/".join(parts[1:]), None
+        if parts[1] in ("series", "export") and len(parts) == 3:
+            route, arg = parts[1], parts[2]
+        if route not in self.ROUTES and route != "export":
+            raise ApiError(HTTPStatus.NOT_FOUND, "not found")
+        return route, arg
+
+    def json_etag(self, route: str, arg, query: str) -> tuple:
+        """(etag, parâmetros) de uma rota JSON, só com as versões dos dados."""
+        allowed, version, _ = self.ROUTES[route]
+        key = normalize(query, allowed)
+        params = dict(key)
+        return _etag(route, arg, key, version(self, params, arg)), params
+
+    def json_body(self, route: str, arg, params: dict, etag: str) -> bytes:
+        """Corpo da rota; só é calculado se não estiver no cache."""
+        body = self.cache.get(etag)
+        if body is None:
+            body = json.dumps(self.ROUTES[route][2](self, params, arg), ensure_ascii=False).encode("utf-8")
+            self.cache.put(etag, body)
+        return body
+
+    def export_request(self, dataset: str, query: str) -> tuple:
+        """(etag, nome do arquivo, gzip?, gerador de bytes) de uma exportação anonimizada."""
+        if dataset not in export.DATASETS:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"unknown dataset: {dataset}")
+        params = dict(normalize(query, ("from", "to", "columns", "k", "gzip")))
+        cols = params["columns"].split(",") if "columns" in params else None
+        unknown = [c for c in cols or () if c not in export.DATASETS[dataset][1]]
+        if unknown:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"unknown columns: {unknown}")
+        cols = exportable(dataset, cols or export.DATASETS[dataset][1])     # sem texto livre
+        if not cols:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "none of the requested columns can be exported")
+        for name in ("from", "to"):
+            _date(params, name)
+        k = max(_int(params, "k", DEFAULT_K), DEFAULT_K)      # cliente não baixa o k mínimo
+        compress = params.get("gzip") in ("1", "true")
+        mark = db.transactions_watermark() if dataset == "transactions" else db.rfps_watermark()
+        etag = _etag("export", dataset, tuple(sorted(params.items())), k, mark)
+        chunks = export.iter_csv(dataset, cols, params.get("from"), params.get("to"), anonymize=True, k=k)
+        if compress:
+            chunks = _gzip_stream(chunks)
+        return etag, export.file_name(dataset, compress), compress, chunks
+
+
+def _gzip_stream(chunks):
+    z = zlib.compressobj(export.GZIP_LEVEL, zlib.DEFLATED, 31)
+    for piece in chunks:
+        out = z.compress(piece)
+        if out:
+            yield out
+    yield z.flush()
+
+
+# ---------- HTTP ----------
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "vip-api/1"
+
+    def _token(self) -> str:
+        auth = self.headers.get("Authorization", "")
+        if auth.lower().startswith("bearer "):
+            return auth[7:].strip()
+        return self.headers.get("X-API-Key", "").strip()
+
+    def _not_modified(self, etag: str) -> bool:
+        tags = [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]
+        return etag in tags or "*" in tags
+
+    def _send(self, status, body: bytes = b"", etag: str | None = None, ctype="application/json"):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "private, no-cache")
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        api: Api = self.server.api
+        url = urlsplit(self.path)
+        self.client_id = None
+        try:
+            route, arg = api.resolve(url.path)
+            if route != "health":
+                self.client_id = api.client_for(self._token())["id"]
+            if route == "export":
+                self._export(api, arg, url.query)
+                return
+            etag, params = api.json_etag(route, arg, url.query)
+            if self._not_modified(etag):
+                self._send(HTTPStatus.NOT_MODIFIED, etag=etag)
+            else:
+                self._send(HTTPStatus.OK, api.json_body(route, arg, params, etag), etag)
+        except ApiError as e:
+            self._send(e.status, json.dumps({"error": str(e)}).encode("utf-8"))
+        except ValueError as e:          # datas/valores inválidos vindos das camadas de dados
+            self._send(HTTPStatus.BAD_REQUEST, json.dumps({"error": str(e)}).encode("utf-8"))
+
+    def _export(self, api: Api, dataset: str, query: str):
+        etag, name, compress, chunks = api.export_request(dataset, query)
+        if self._not_modified(etag):
+            self._send(HTTPStatus.NOT_MODIFIED, etag=etag)
+            return
+        # corpo em streaming (chunked): a exportação é gerada em blocos do SQLite
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/gzip" if compress else "text/csv; charset=utf-8")
+        self.send_header("Content-Disposition", f'attachment; filename="{name}"')
+        self.send_header("ETag", etag)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for piece in chunks:
+            if piece:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(piece), piece))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, fmt, *args):
+        client = getattr(self, "client_id", None)
+        super().log_message(f"[client {client or '-'}] {fmt}", *args)
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8502, api: Api | None = None):
+        super().__init__((host, port), ApiHandler)
+        self.api = api or Api()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Read-only JSON API for data clients")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    srv = sub.add_parser("serve", help="run the API server")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8502)
+    srv.add_argument("--csv", default=str(DEFAULT_CSV), help="marketplace catalog")
+    key = sub.add_parser("issue-key", help="create an API key for a data client id")
+    key.add_argument("client_id", type=int)
+    rev = sub.add_parser("revoke", help="revoke all API keys of a data client id")
+    rev.add_argument("client_id", type=int)
+    args = ap.parse_args()
+    if args.cmd == "issue-key":
+        if args.client_id not in {c["id"] for c in _seed_data_clients()}:
+            ap.error(f"unknown data client id {args.client_id}")
+        print(db.create_api_key(args.client_id))
+    elif args.cmd == "revoke":
+        print(f"revoked {db.revoke_api_keys(args.client_id)} key(s)")
+    else:
+        with ApiServer(args.host, args.port, Api(args.csv)) as server:
+            print(f"vip api listening on http://{args.host}:{args.port} (db {db.current_path()})")
+            server.serve_forever()
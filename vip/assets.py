@@ -0,0 +1,94 @@
+# =====================
+#  LANDING ASSETS
+# =====================
+# Gera (uma vez) variantes redimensionadas do logo em WebP/PNG dentro de
+# static/ e monta um <picture> com srcset. Com `server.enableStaticServing`
+# o browser baixa os arquivos de /app/static/ (e os guarda em cache); sem
+# static serving o payload base64 da menor variante adequada é montado uma vez
+# por processo e reaproveitado em todas as visitas.
+import threading
+from base64 import b64encode
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow é opcional; sem ele usamos o arquivo original
+    Image = None
+
+VARIANT_WIDTHS = (480, 900, 1280)
+FORMATS = (("webp", "image/webp"), ("png", "image/png"))
+STATIC_URL = "app/static"
+
+_LOCK = threading.Lock()
+
+
+def variant_path(src: Path, out_dir: Path, width: int, ext: str) -> Path:
+    return out_dir / f"{src.stem}-{width}.{ext}"
+
+
+def build_variants(src, out_dir, widths=VARIANT_WIDTHS) -> dict:
+    """{ext: [(largura, caminho), ...]}; só regera arquivos ausentes ou mais velhos que o original."""
+    src, out_dir = Path(src), Path(out_dir)
+    if Image is None:
+        return {}
+    src_mtime = src.stat().st_mtime_ns
+    out = {ext: [] for ext, _ in FORMATS}
+    with _LOCK:
+        with Image.open(src) as im:
+            im.load()
+            widths = sorted({min(w, im.width) for w in widths})
+            for w in widths:
+                resized = None
+                for ext, _ in FORMATS:
+                    dst = variant_path(src, out_dir, w, ext)
+                    if not dst.exists() or dst.stat().st_mtime_ns < src_mtime:
+                        if resized is None:
+                            h = round(im.height * w / im.width)
+                            resized = im if w == im.width else im.resize((w, h), Image.LANCZOS)
+                        out_dir.mkdir(parents=True, exist_ok=True)
+                        tmp = dst.with_suffix(dst.suffix + ".tmp")
+                        if ext == "webp":
+                            resized.save(tmp, "WEBP", quality=82, method=6)
+                        else:
+                            resized.save(tmp, "PNG", optimize=True)
+                        tmp.replace(dst)
+                    out[ext].append((w, dst))
+    return out
+
+
+def _data_uri(path: Path, mime: str) -> str:
+    return f"data:{mime};base64,{b64encode(path.read_bytes()).decode()}"
+
+
+@lru_cache(maxsize=16)
+def _picture_html(src: str, mtime_ns: int, out_dir: str, max_width_px: int, static: bool, lazy: bool) -> str:
+    src_p = Path(src)
+    loading = ' loading="lazy"' if lazy else ""
+    variants = build_variants(src_p, Path(out_dir))
+    style = f"max-width:{max_width_px}px;width:100%;height:auto;border-radius:6px;"
+    if not variants or not variants.get("png"):
+        return f'<img src="{_data_uri(src_p, "image/png")}" style="{style}"{loading} />'
+
+    sizes = f"(max-width: {max_width_px}px) 100vw, {max_width_px}px"
+    if static:
+        srcsets = {ext: ", ".join(f"{STATIC_URL}/{p.name} {w}w" for w, p in items)
+                   for ext, items in variants.items()}
+        fallback = f"{STATIC_URL}/{variants['png'][-1][1].name}"
+        return (
+            f'<picture><source type="image/webp" srcset="{srcsets["webp"]}" sizes="{sizes}" />'
+            f'<img src="{fallback}" srcset="{srcsets["png"]}" sizes="{sizes}" style="{style}" '
+            f'decoding="async"{loading} /></picture>'
+        )
+    # sem static serving: uma única variante (a menor que cobre max_width) embutida
+    w, p = next(((w, p) for w, p in variants["webp"] if w >= max_width_px), variants["webp"][-1])
+    return f'<img src="{_data_uri(p, "image/webp")}" width="{w}" style="{style}" decoding="async"{loading} />'
+
+
+def picture_html(src, out_dir, max_width_px: int = 900, static: bool = False, lazy: bool = False) -> str | None:
+    """HTML do logo (cacheado por processo); None se o arquivo não existe.
+    `lazy` só para imagens abaixo da dobra: o logo do topo carrega na hora."""
+    p = Path(src)
+    if not p.exists():
+        return None
+    return _picture_html(str(p.resolve()), p.stat().st_mtime_ns, str(out_dir), max_width_px, static, lazy)
@@ -0,0 +1,174 @@
+# =====================
+#  AVAILABILITY
+# =====================
+# Índice de intervalos das reservas (bookings/holds) por listing. As datas
+# viram dias inteiros (datetime64[D]); os intervalos de cada listing são
+# fundidos (sobrepostos ou adjacentes) e guardados em arrays planos no formato
+# CSR (offsets por listing), então:
+#   - is_free / conflicts / next_free de um listing = busca binária no trecho dele;
+#   - busy(X, Y) para todos os listings = recorte por busca binária na lista
+#     global ordenada por início (só intervalos que começam entre X - maior
+#     duração e Y podem cruzar [X, Y]) + máscara vetorizada.
+# O cache por processo só reconstrói o índice quando `booking_version` muda.
+# Reservas de demonstração nunca entram sozinhas no banco compartilhado: só pelo
+# CLI abaixo ou, no app, com VIP_DEMO_BOOKINGS=1 (e o banco sem reservas).
+#   python -m vip.availability seed            # reservas de demonstração para o catálogo
+import argparse
+import os
+import threading
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from vip import db
+
+_EPOCH = np.datetime64("1970-01-01", "D")
+DEMO_SEED = os.environ.get("VIP_DEMO_BOOKINGS", "0") == "1"
+
+
+def _day(value) -> int:
+    return int((np.datetime64(pd.Timestamp(value).date(), "D") - _EPOCH).astype(np.int64))
+
+
+def _as_date(day: int) -> date:
+    return (_EPOCH + np.timedelta64(int(day), "D")).astype(date)
+
+
+def _range(start, end=None) -> tuple:
+    """[start, end] em dias; sem `end` é um dia só. Intervalo invertido é erro."""
+    a = _day(start)
+    b = _day(end) if end is not None else a
+    if b < a:
+        raise ValueError(f"end {end} is before start {start}")
+    return a, b
+
+
+class AvailabilityIndex:
+    def __init__(self, bookings: pd.DataFrame):
+        codes, names = pd.factorize(bookings["listing"].astype("string"))
+        starts = pd.to_datetime(bookings["start_date"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+        ends = pd.to_datetime(bookings["end_date"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+        starts, ends = np.minimum(starts, ends), np.maximum(starts, ends)    # reserva gravada invertida
+        self.names = np.asarray(names, dtype=object)
+        self._code_of = {n: i for i, n in enumerate(self.names)}
+
+        # fusão vetorizada por listing: ordena por (listing, início) e abre um novo
+        # intervalo quando o início passa do maior fim visto até ali (+1 dia)
+        order = np.lexsort((starts, codes))
+        c, s, e = codes[order], starts[order], ends[order]
+        run_max = pd.Series(e).groupby(c).cummax().to_numpy() if c.size else e
+        prev_max = np.concatenate([[np.iinfo(np.int64).min], run_max[:-1]])
+        new_run = np.ones(c.size, dtype=bool)
+        if c.size:
+            new_run[1:] = (c[1:] != c[:-1]) | (s[1:] > prev_max[1:] + 1)
+        first = np.flatnonzero(new_run)
+        self._code = c[first]
+        self._start = s[first]
+        self._end = np.maximum.reduceat(e, first) if first.size else e[:0]
+        self._offsets = np.searchsorted(self._code, np.arange(len(self.names) + 1))
+
+        # visão global ordenada por início para consultas de todos os listings
+        g = np.argsort(self._start, kind="stable")
+        self._g_start, self._g_end, self._g_code = self._start[g], self._end[g], self._code[g]
+        self._max_len = int((self._end - self._start).max()) if self._start.size else 0
+
+    def __len__(self):
+        return int(self._start.size)
+
+    def _slice(self, listing: str):
+        i = self._code_of.get(listing)
+        if i is None:
+            return self._start[:0], self._end[:0]
+        a, b = self._offsets[i], self._offsets[i + 1]
+        return self._start[a:b], self._end[a:b]
+
+    def conflicts(self, listing: str, start, end=None) -> list:
+        """Intervalos ocupados do listing que cruzam [start, end], como (date, date)."""
+        a, b = _range(start, end)
+        s, e = self._slice(listing)
+        hi = int(np.searchsorted(s, b, side="right"))
+        lo = int(np.searchsorted(e, a, side="left"))   # fins também são crescentes (fundidos)
+        return [(_as_date(s[i]), _as_date(e[i])) for i in range(lo, hi)]
+
+    def is_free(self, listing: str, start, end=None) -> bool:
+        return not self.conflicts(listing, start, end)
+
+    def next_free(self, listing: str, start, days: int = 1) -> date:
+        """Primeiro dia >= start com `days` dias livres seguidos."""
+        d = _day(start)
+        s, e = self._slice(listing)
+        i = int(np.searchsorted(e, d, side="left"))
+        while i < s.size and s[i] <= d + days - 1:
+            d = max(d, int(e[i]) + 1)
+            i += 1
+        return _as_date(d)
+
+    def busy(self, start, end=None) -> np.ndarray:
+        """Nomes dos listings com alguma ocupação em [start, end]."""
+        a, b = _range(start, end)
+        if not self._g_start.size:
+            return np.array([], dtype=object)
+        lo = int(np.searchsorted(self._g_start, a - self._max_len, side="left"))
+        hi = int(np.searchsorted(self._g_start, b, side="right"))
+        hit = self._g_end[lo:hi] >= a
+        return self.names[np.unique(self._g_code[lo:hi][hit])]
+
+    def upcoming(self, listing: str, after=None, limit: int = 5) -> list:
+        s, e = self._slice(listing)
+        i = int(np.searchsorted(e, _day(after or date.today()), side="left"))
+        return [(_as_date(s[j]), _as_date(e[j])) for j in range(i, min(i + limit, s.size))]
+
+
+_CACHE: dict = {}   # db path -> (versão, AvailabilityIndex)
+_LOCK = threading.Lock()
+
+
+def get_availability() -> AvailabilityIndex:
+    key = str(db.current_path())
+    version = db.bookings_version()
+    hit = _CACHE.get(key)
+    if hit and hit[0] == version:
+        return hit[1]
+    with _LOCK:
+        hit = _CACHE.get(key)
+        if hit and hit[0] == version:
+            return hit[1]
+        idx = AvailabilityIndex(db.list_bookings())
+        _CACHE[key] = (version, idx)
+        return idx
+
+
+def demo_bookings(names, share: float = 0.3, horizon_days: int = 120, seed: int = 0, start=None) -> list:
+    """Reservas sintéticas: ~`share` dos listings com 1–3 reservas de 1–3 dias."""
+    rng = np.random.default_rng(seed)
+    names = np.asarray(list(names), dtype=object)
+    chosen = names[rng.random(names.size) < share]
+    per = rng.integers(1, 4, chosen.size)
+    listing = np.repeat(chosen, per)
+    base = np.datetime64(start or date.today(), "D")
+    first = base + rng.integers(0, horizon_days, listing.size).astype("timedelta64[D]")
+    last = first + rng.integers(0, 3, listing.size).astype("timedelta64[D]")
+    kind = np.where(rng.random(listing.size) < 0.8, "booking", "hold")
+    return list(zip(listing.tolist(), first.astype(str).tolist(), last.astype(str).tolist(), kind.tolist()))
+
+
+def seed_demo(names, **kwargs) -> int:
+    """Grava reservas de demonstração se ainda não houver nenhuma."""
+    with db.connection() as conn:
+        if conn.execute("SELECT 1 FROM bookings LIMIT 1").fetchone() is not None:
+            return 0
+    return db.add_bookings(demo_bookings(names, **kwargs))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Availability tools")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sd = sub.add_parser("seed", help="insert demo bookings for the catalog listings (only if none exist)")
+    sd.add_argument("csv", nargs="?", default=str(Path(__file__).resolve().parent.parent / "data" / "marketplace_clean_numeric.csv"))
+    sd.add_argument("--share", type=float, default=0.3)
+    sd.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    names = pd.read_csv(args.csv, usecols=["name"])["name"].dropna().unique()
+    print(f"inserted {seed_demo(names, share=args.share, seed=args.seed):,} bookings into {db.current_path()}")
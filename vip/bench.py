@@ -0,0 +1,232 @@
+# =====================
+#  MARKETPLACE BENCHMARKS
+# =====================
+# Mede os caminhos do render_marketplace (load, filtros, busca, ordenação e
+# preparo da tabela) em catálogos sintéticos e reporta p50/p95 + pico de memória.
+#   python -m vip.bench --sizes 10k 100k 1M --json bench.json
+#   python -m vip.bench --sizes 100k --baseline bench.json   # falha se p95 regredir
+# O estágio `anonymize` mede a anonimização de exportação (vip/anonymize.py)
+# num bloco de transações sintéticas do mesmo tamanho e reporta linhas/s.
+# O estágio `availability` monta o índice de reservas (vip/availability.py)
+# com ~30% dos listings reservados e mede o filtro "Available on" (período).
+# O estágio `upsert` aplica blocos de ~1% do catálogo (metade updates, metade
+# linhas novas) com `MarketplaceDataset.upserted`, como a importação em lote.
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from vip import marketplace
+from vip.anonymize import Anonymizer
+from vip.availability import AvailabilityIndex, demo_bookings
+from vip.synth import generate_catalog, write_catalog
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+SEARCHES = ["cat", "helix", "catring", "hall", "nova 1", "ph", "conference", "vancuver"]
+SORTS = [None, "price", "rating", "capacity"]
+
+
+def _measure(fn, iterations: int):
+    fn()  # aquecimento
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ms = np.asarray(samples) * 1000
+    return {"p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95)),
+            "peak_mb": peak / 2**20}
+
+
+def _random_state(ds, rng):
+    eq = {c: (rng.choice(ds.options[c]) if rng.random() < 0.5 else "All") for c in ds.options}
+    lo, hi = ds.price_bounds or (0, 10**9)
+    a, b = sorted(rng.integers(lo, hi + 1, 2))
+    return eq, (int(a), int(b))
+
+
+def bench_catalog(csv_path, iterations: int = 50, seed: int = 0) -> dict:
+    csv_path = Path(csv_path)
+    rng = np.random.default_rng(seed)
+    results = {}
+
+    def load():
+        marketplace.clear_cache()
+        return marketplace.get_marketplace(csv_path)
+
+    col = marketplace.columnar_path(csv_path)
+    col.unlink(missing_ok=True)
+    results["load_csv"] = _measure(load, max(3, iterations // 10))
+    try:
+        marketplace.build_columnar(csv_path)
+        results["load_columnar"] = _measure(load, max(3, iterations // 10))
+    except ImportError:
+        pass
+    ds = load()
+    all_ids = np.arange(len(ds.df))
+
+    def filters():
+        eq, price = _random_state(ds, rng)
+        ds.query(eq, price)
+
+    def search():
+        ds.query(text=str(rng.choice(SEARCHES)))
+
+    def sort():
+        ds.sort_page(all_ids, SORTS[rng.integers(len(SORTS))], bool(rng.integers(2)),
+                     page=int(rng.integers(0, 5)), page_size=25)
+
+    def best_match():
+        eq, price = _random_state(ds, rng)
+        ds.rank_page(ds.query(eq, price), page=int(rng.integers(0, 3)), page_size=25,
+                     budget=int(rng.integers(50, 500)), attendees=int(rng.integers(10, 500)))
+
+    page_ids = ds.sort_page(all_ids, "price", page=0, page_size=100)
+
+    def render_prep():
+        ds.display_frame(page_ids)
+
+    def end_to_end():
+        eq, price = _random_state(ds, rng)
+        q = str(rng.choice(SEARCHES)) if rng.random() < 0.5 else ""
+        ids = ds.query(eq, price, text=q)
+        ds.display_frame(ds.sort_page(ids, SORTS[rng.integers(len(SORTS))], True, page=0, page_size=25))
+
+    for name, fn in [("filter", filters), ("text_search", search), ("sort_page", sort),
+                     ("best_match", best_match), ("render_prep", render_prep), ("end_to_end", end_to_end)]:
+        results[name] = _measure(fn, iterations)
+    return results
+
+
+def synthetic_transactions(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 730, rows), unit="D")
+    return pd.DataFrame({
+        "date": days.strftime("%Y-%m-%d"),
+        "counterparty": np.char.add("Vendor ", rng.integers(0, max(rows // 20, 1), rows).astype(str)),
+        "service": rng.choice(["Venue Booking", "Catering", "AV", "Photography"], rows),
+        "amount": rng.lognormal(6, 1, rows).astype(np.int64),
+        "status": rng.choice(["Completed", "Pending", "Refunded"], rows, p=[0.8, 0.15, 0.05]),
+        "ref": np.char.add("TXN-", np.arange(rows).astype(str)),
+    })
+
+
+def bench_anonymize(rows: int, iterations: int = 5, seed: int = 0) -> dict:
+    """Anonimização completa (contagem + transformação) de `rows` transações."""
+    df = synthetic_transactions(rows, seed)
+    key = b"bench-key"
+
+    def run():
+        anon = Anonymizer("transactions", key=key)
+        anon.observe(anon.generalize(df[anon.quasi_columns(df.columns)]))
+        anon.transform(df)
+
+    r = _measure(run, iterations)
+    r["rows_per_s"] = rows / (r["p50_ms"] / 1000) if r["p50_ms"] else 0.0
+    return r
+
+
+def bench_availability(ds, iterations: int = 50, seed: int = 0) -> dict:
+    """Índice de reservas + filtro de período sobre todo o catálogo."""
+    rows = demo_bookings(ds.df["name"].dropna().unique(), seed=seed, start="2026-01-01")
+    idx = AvailabilityIndex(pd.DataFrame(rows, columns=["listing", "start_date", "end_date", "kind"]))
+    rng = np.random.default_rng(seed)
+    all_ids = np.arange(len(ds.df))
+
+    def run():
+        a = np.datetime64("2026-01-01") + int(rng.integers(0, 120))
+        busy = idx.busy(a, a + int(rng.integers(0, 7)))
+        return all_ids[~np.isin(all_ids, ds.rows_for_names(busy))]
+
+    return _measure(run, iterations)
+
+
+def bench_upsert(ds, iterations: int = 5, seed: int = 0) -> dict:
+    """Blocos de importação encadeados sobre o dataset (o índice de texto dele cresce)."""
+    rng = np.random.default_rng(seed)
+    size = max(len(ds.df) // 100, 100)
+    batches = []
+    for i in range(iterations + 2):     # aquecimento + amostras + medição de memória
+        pos = rng.choice(len(ds.df), size // 2, replace=False)   # upserts mantêm as posições
+        upd = ds.df.iloc[pos].reset_index(drop=True)
+        upd = upd.assign(rating=np.round(rng.uniform(3, 5, len(upd)), 1))
+        new = generate_catalog(size - len(upd), seed=seed + i, offset=10**9 + i * size)
+        batches.append((pos, pd.concat([upd, new], ignore_index=True)))
+    state = {"ds": ds, "i": 0}
+
+    def run():
+        cur, (pos, rows) = state["ds"], batches[state["i"]]
+        ids = np.concatenate([pos, np.arange(len(cur.df), len(cur.df) + len(rows) - pos.size)])
+        state["ds"] = cur.upserted(rows, ids)
+        state["i"] += 1
+
+    r = _measure(run, iterations)
+    r["rows_per_s"] = size / (r["p50_ms"] / 1000) if r["p50_ms"] else 0.0
+    return r
+
+
+def compare(current: dict, baseline: dict, tolerance: float):
+    """Lista de (size, stage, antes, depois) onde o p95 piorou além da tolerância."""
+    bad = []
+    for size, stages in current.items():
+        for stage, r in stages.items():
+            old = baseline.get(size, {}).get(stage)
+            if old and r["p95_ms"] > old["p95_ms"] * tolerance:
+                bad.append((size, stage, old["p95_ms"], r["p95_ms"]))
+    return bad
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark marketplace query paths")
+    ap.add_argument("--sizes", nargs="+", default=["10k", "100k"], choices=list(SIZES))
+    ap.add_argument("--csv", default=None, help="benchmark this catalog instead of synthetic ones")
+    ap.add_argument("--iterations", type=int, default=50)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", default=None, help="write results to this file")
+    ap.add_argument("--baseline", default=None, help="previous --json output to compare against")
+    ap.add_argument("--tolerance", type=float, default=1.5, help="allowed p95 ratio vs baseline")
+    args = ap.parse_args(argv)
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        targets = [(Path(args.csv).stem, Path(args.csv))] if args.csv else [
+            (s, write_catalog(Path(tmp) / f"market_{s}.csv", SIZES[s], seed=args.seed)) for s in args.sizes]
+        for label, path in targets:
+            if args.csv:  # não gera .parquet ao lado do arquivo do usuário
+                path = Path(tmp) / path.name
+                path.write_bytes(Path(args.csv).read_bytes())
+            report[label] = bench_catalog(path, args.iterations, args.seed)
+            n_rows = SIZES.get(label) or sum(1 for _ in open(path, "rb")) - 1
+            ds = marketplace.get_marketplace(path)
+            report[label]["availability"] = bench_availability(ds, args.iterations, args.seed)
+            report[label]["upsert"] = bench_upsert(ds, max(3, args.iterations // 10), args.seed)
+            report[label]["anonymize"] = bench_anonymize(n_rows, max(3, args.iterations // 10), args.seed)
+            print(f"\n== {label} ==")
+            print(f"{'stage':<14}{'p50 ms':>10}{'p95 ms':>10}{'peak MB':>10}")
+            for stage, r in report[label].items():
+                print(f"{stage:<14}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['peak_mb']:>10.1f}"
+                      + (f"{r['rows_per_s']:>14,.0f} rows/s" if "rows_per_s" in r else ""))
+    marketplace.clear_cache()
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    if args.baseline:
+        bad = compare(report, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for size, stage, old, new in bad:
+            print(f"REGRESSION {size}/{stage}: p95 {old:.2f} ms -> {new:.2f} ms")
+        return 1 if bad else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
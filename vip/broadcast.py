@@ -0,0 +1,274 @@
+# =====================
+#  BROADCAST DELIVERY
+# =====================
+# Fila de entrega dos broadcasts (Email/SMS). `send_broadcast` só resolve o
+# segmento e grava as entregas pendentes no SQLite (um INSERT ... SELECT) e
+# devolve na hora; um pool limitado de threads consome a fila em lotes, com
+# rate limit por canal (token bucket), novas tentativas com backoff e o status
+# de cada entrega de volta no banco. Entregas pendentes de um processo anterior
+# são retomadas quando o dispatcher sobe.
+# Envio:
+#   - Email: SMTP em VIP_SMTP_HOST[:VIP_SMTP_PORT] se definido; senão um outbox
+#     JSONL em data/outbox/email.jsonl;
+#   - SMS: sink falso em JSONL (data/outbox/sms.jsonl).
+# Stand-in de SMTP local para testes (grava as mensagens recebidas em JSONL):
+#   python -m vip.broadcast smtp-sink --port 1025 --out /tmp/smtp.jsonl
+#   VIP_SMTP_HOST=localhost VIP_SMTP_PORT=1025 streamlit run VIPv3.py
+import argparse
+import json
+import os
+import re
+import smtplib
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from pathlib import Path
+
+from vip import db
+
+SEGMENTS = {
+    # segmento -> papéis (None = todos os usuários não admin)
+    "All Users": None,
+    "All Vendors": ("Vendor",),
+    "All Venues": ("Venue",),
+    "All NPOs/Clients": ("Non-Profit", "For-Profit (Client)"),
+}
+CHANNELS = {"Email": ("Email",), "SMS": ("SMS",), "Both": ("Email", "SMS")}
+RATE_LIMITS = {"Email": (50.0, 200), "SMS": (10.0, 50)}   # canal -> (msgs/s, rajada)
+BATCH_SIZE = 200
+MAX_ATTEMPTS = 3
+BACKOFF_S = 1.0
+WORKERS = 4
+OUTBOX_DIR = Path(__file__).resolve().parent.parent / "data" / "outbox"
+SENDER = "noreply@vip.local"
+
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+PHONE_RE = re.compile(r"^\+?[\d\s().-]{7,}$")
+VALID_ADDRESS = {"Email": lambda a: bool(EMAIL_RE.match(a)),
+                 "SMS": lambda a: bool(PHONE_RE.match(a)) and sum(ch.isdigit() for ch in a) >= 7}
+
+
+# ---------- canais ----------
+class RateLimiter:
+    """Token bucket: `rate` mensagens/s com rajada de até `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate, self.burst = rate, burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n: int = 1):
+        while n > 0:
+            take = min(n, self.burst)
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                wait = 0.0 if self._tokens >= take else (take - self._tokens) / self.rate
+                self._tokens -= take    # pode ficar negativo: o próximo espera a dívida
+            if wait:
+                time.sleep(wait)
+            n -= take
+
+
+class SinkSender:
+    """Grava as mensagens em JSONL (outbox de email / sink falso de SMS)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def send_batch(self, channel: str, messages: list) -> list:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lines = "".join(json.dumps({"channel": channel, **m}, ensure_ascii=False) + "\n" for m in messages)
+        with self._lock, open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(lines)
+        return [None] * len(messages)
+
+
+class SmtpSender:
+    """Uma conexão SMTP por lote; erro por destinatário quando o servidor recusa."""
+
+    def __init__(self, host: str, port: int = 25, sender: str = SENDER, timeout: float = 10):
+        self.host, self.port, self.sender, self.timeout = host, port, sender, timeout
+
+    def send_batch(self, channel: str, messages: list) -> list:
+        try:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        except OSError as e:
+            return [f"connect: {e}"] * len(messages)
+        errors = []
+        with smtp:
+            for m in messages:
+                msg = EmailMessage()
+                msg["From"], msg["To"], msg["Subject"] = self.sender, m["address"], m["subject"]
+                msg.set_content(m["body"])
+                try:
+                    smtp.send_message(msg)
+                    errors.append(None)
+                except (smtplib.SMTPException, OSError) as e:
+                    errors.append(str(e)[:200])
+        return errors
+
+
+def default_senders() -> dict:
+    host = os.environ.get("VIP_SMTP_HOST")
+    email = (SmtpSender(host, int(os.environ.get("VIP_SMTP_PORT", "25"))) if host
+             else SinkSender(OUTBOX_DIR / "email.jsonl"))
+    return {"Email": email, "SMS": SinkSender(OUTBOX_DIR / "sms.jsonl")}
+
+
+# ---------- dispatcher ----------
+class Dispatcher:
+    def __init__(self, senders: dict, limits: dict = RATE_LIMITS, workers: int = WORKERS,
+                 batch_size: int = BATCH_SIZE, max_attempts: int = MAX_ATTEMPTS, backoff: float = BACKOFF_S):
+        self.senders = senders
+        self.limiters = {ch: RateLimiter(*limits[ch]) for ch in senders}
+        self.batch_size, self.max_attempts, self.backoff = batch_size, max_attempts, backoff
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vip-broadcast")
+
+    def submit(self, broadcast_id, channels):
+        return [self._pool.submit(self._run, broadcast_id, ch) for ch in channels]
+
+    def resume(self):
+        for bid, ch in db.open_broadcasts():
+            self.submit(bid, [ch])
+
+    def _run(self, broadcast_id, channel: str):
+        db.set_broadcast_status(broadcast_id, "sending")
+        b = db.get_broadcast(broadcast_id)
+        valid = VALID_ADDRESS[channel]
+        for rnd in range(self.max_attempts):
+            if rnd:
+                time.sleep(self.backoff * 2 ** (rnd - 1))
+            after, retry = 0, False
+            while batch := db.pending_deliveries(broadcast_id, channel, after, self.batch_size):
+                after = batch[-1]["id"]
+                retry |= self._send_batch(b, channel, batch, valid)
+            if not retry:
+                break
+        if not db.has_pending(broadcast_id):
+            b = db.get_broadcast(broadcast_id)
+            db.set_broadcast_status(broadcast_id, "done" if not b["failed"] else
+                                    "failed" if not b["sent"] else "partial")
+
+    def _send_batch(self, b: dict, channel: str, batch: list, valid) -> bool:
+        """Envia um lote e grava o resultado; True se ficou algo para nova tentativa."""
+        updates = [("skipped", d["attempts"], "no valid address", d["id"]) for d in batch if not valid(d["address"])]
+        todo = [d for d in batch if valid(d["address"])]
+        retry = False
+        if todo:
+            self.limiters[channel].acquire(len(todo))
+            msgs = [{"to": d["username"], "address": d["address"], "subject": b["subject"], "body": b["body"]}
+                    for d in todo]
+            try:
+                errors = self.senders[channel].send_batch(channel, msgs)
+            except Exception as e:          # sender quebrado: o lote todo tenta de novo
+                errors = [str(e)[:200]] * len(todo)
+            for d, err in zip(todo, errors):
+                attempts = d["attempts"] + 1
+                if err is None:
+                    updates.append(("sent", attempts, "", d["id"]))
+                elif attempts < self.max_attempts:
+                    updates.append(("pending", attempts, err, d["id"]))
+                    retry = True
+                else:
+                    updates.append(("failed", attempts, err, d["id"]))
+        db.record_deliveries(updates)
+        return retry
+
+
+_DISPATCHERS: dict = {}   # db path -> Dispatcher
+_LOCK = threading.Lock()
+
+
+def get_dispatcher() -> Dispatcher:
+    key = str(db.current_path())
+    with _LOCK:
+        d = _DISPATCHERS.get(key)
+        if d is None:
+            d = _DISPATCHERS[key] = Dispatcher(default_senders())
+            d.resume()
+        return d
+
+
+def send_broadcast(segment: str, subject: str, body: str, via: str) -> tuple:
+    """Enfileira o broadcast e devolve (id, nº de entregas) sem esperar o envio."""
+    channels = CHANNELS[via]
+    bid, total = db.create_broadcast(segment, SEGMENTS[segment], subject, body, via, channels)
+    if total:
+        get_dispatcher().submit(bid, channels)
+    else:
+        db.set_broadcast_status(bid, "done")
+    return bid, total
+
+
+# ---------- stand-in de SMTP ----------
+class _SmtpSinkHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        self._reply("220 vip smtp-sink ready")
+        mail_from, rcpts = "", []
+        while line := self.rfile.readline():
+            cmd = line.decode("utf-8", "replace").strip()
+            verb = cmd[:4].upper()
+            if verb in ("HELO", "EHLO"):
+                self._reply("250 vip smtp-sink")
+            elif verb == "MAIL":
+                mail_from, rcpts = cmd[10:].strip(" <>"), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                rcpts.append(cmd[8:].strip(" <>"))
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while (chunk := self.rfile.readline()) not in (b".\r\n", b".\n", b""):
+                    data.append(chunk.decode("utf-8", "replace"))
+                self.server.store({"from": mail_from, "to": rcpts, "data": "".join(data)})
+                self._reply("250 OK queued")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            elif verb in ("RSET", "NOOP"):
+                self._reply("250 OK")
+            else:
+                self._reply("502 Command not implemented")
+
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    """Servidor SMTP mínimo que só grava as mensagens recebidas (JSONL ou lista)."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "localhost", port: int = 1025, out=None):
+        super().__init__((host, port), _SmtpSinkHandler)
+        self.out = Path(out) if out else None
+        self.messages: list = []
+        self._lock = threading.Lock()
+
+    def store(self, msg: dict):
+        with self._lock:
+            self.messages.append(msg)
+            if self.out:
+                with open(self.out, "a", encoding="utf-8") as fh:
+                    fh.write(json.dumps(msg, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Broadcast delivery tools")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sink = sub.add_parser("smtp-sink", help="run a local SMTP stand-in that records messages")
+    sink.add_argument("--host", default="localhost")
+    sink.add_argument("--port", type=int, default=1025)
+    sink.add_argument("--out", default=str(OUTBOX_DIR / "smtp.jsonl"))
+    args = ap.parse_args()
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    with SmtpSink(args.host, args.port, args.out) as server:
+        print(f"smtp-sink listening on {args.host}:{args.port}, writing to {args.out}")
+        server.serve_forever()
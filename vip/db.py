@@ -0,0 +1,1001 @@
+# =====================
+#  STORAGE (SQLite)
+# =====================
+# Store compartilhado entre sessões/processos: usuários, transações, RFPs,
+# notificações e mensagens. As conexões ficam num pool por processo (e por
+# arquivo): cada leitura/transação pega uma conexão livre e a devolve no fim,
+# então reruns (cada um numa thread nova do Streamlit) reaproveitam conexões
+# já abertas em vez de reabrir e reconfigurar uma. WAL permite leituras
+# concorrentes enquanto outra sessão grava.
+#   VIP_DB_PATH=/tmp/vip.db streamlit run VIPv3.py
+import hashlib
+import hmac
+import json
+import os
+import queue
+import secrets
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from vip.seeds import _seed_broadcast_log, _seed_mail, _seed_notifications, _seed_transactions
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "data" / "vip.db"
+ADMIN_ROLE = "Admin"
+TS_FMT = "%Y-%m-%d %H:%M"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username      TEXT PRIMARY KEY,
+    password_hash TEXT NOT NULL,
+    full_name     TEXT NOT NULL DEFAULT '',
+    contact       TEXT NOT NULL DEFAULT '',
+    role          TEXT NOT NULL,
+    status        TEXT NOT NULL DEFAULT 'Active',
+    created_at    TEXT NOT NULL
+);
+-- diretório de usuários: prefixo de username usa a PK; papel/status e contato têm índice próprio
+CREATE INDEX IF NOT EXISTS ix_users_role_status ON users(role, status, username);
+CREATE INDEX IF NOT EXISTS ix_users_status ON users(status, username);
+CREATE INDEX IF NOT EXISTS ix_users_contact ON users(lower(contact));
+CREATE TABLE IF NOT EXISTS transactions (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    username     TEXT NOT NULL,
+    date         TEXT NOT NULL,
+    counterparty TEXT NOT NULL DEFAULT '',
+    service      TEXT NOT NULL DEFAULT '',
+    amount       INTEGER NOT NULL DEFAULT 0,
+    status       TEXT NOT NULL,
+    ref          TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS ix_tx_user_date ON transactions(username, date);
+CREATE INDEX IF NOT EXISTS ix_tx_ref ON transactions(ref);
+CREATE INDEX IF NOT EXISTS ix_tx_date ON transactions(date);
+CREATE INDEX IF NOT EXISTS ix_tx_status ON transactions(status);
+CREATE TABLE IF NOT EXISTS tx_versions (
+    username TEXT PRIMARY KEY,
+    version  INTEGER NOT NULL DEFAULT 0
+);
+CREATE TRIGGER IF NOT EXISTS trg_tx_ins AFTER INSERT ON transactions BEGIN
+    INSERT INTO tx_versions(username, version) VALUES (NEW.username, 1)
+    ON CONFLICT(username) DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_tx_upd AFTER UPDATE ON transactions BEGIN
+    INSERT INTO tx_versions(username, version) VALUES (NEW.username, 1)
+    ON CONFLICT(username) DO UPDATE SET version = version + 1;
+    UPDATE tx_versions SET version = version + 1 WHERE username = OLD.username AND OLD.username <> NEW.username;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_tx_del AFTER DELETE ON transactions BEGIN
+    UPDATE tx_versions SET version = version + 1 WHERE username = OLD.username;
+END;
+CREATE TABLE IF NOT EXISTS rfps (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    username       TEXT NOT NULL,
+    submitted_at   TEXT NOT NULL,
+    title          TEXT NOT NULL DEFAULT '',
+    scope          TEXT NOT NULL DEFAULT '',
+    target_date    TEXT NOT NULL DEFAULT '',
+    budget         TEXT NOT NULL DEFAULT '',
+    target_name    TEXT NOT NULL DEFAULT '',
+    target_type    TEXT NOT NULL DEFAULT '',
+    target_city    TEXT NOT NULL DEFAULT '',
+    target_contact TEXT NOT NULL DEFAULT '',
+    price          TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS ix_rfps_user_date ON rfps(username, submitted_at);
+CREATE INDEX IF NOT EXISTS ix_rfps_date ON rfps(submitted_at);
+CREATE INDEX IF NOT EXISTS ix_rfps_target ON rfps(target_name, submitted_at);
+CREATE TABLE IF NOT EXISTS notifications (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    title    TEXT NOT NULL DEFAULT '',
+    body     TEXT NOT NULL DEFAULT '',
+    ts       TEXT NOT NULL,
+    ntype    TEXT NOT NULL DEFAULT 'info',
+    read     INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_notif_user_ts ON notifications(username, ts);
+CREATE INDEX IF NOT EXISTS ix_notif_user_read ON notifications(username, read);
+CREATE TABLE IF NOT EXISTS threads (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    folder   TEXT NOT NULL,
+    title    TEXT NOT NULL DEFAULT '',
+    sender   TEXT NOT NULL DEFAULT '',
+    preview  TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS ix_threads_user_folder ON threads(username, folder, id);
+CREATE TABLE IF NOT EXISTS messages (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    thread_id INTEGER NOT NULL REFERENCES threads(id),
+    by        TEXT NOT NULL,
+    ts        TEXT NOT NULL,
+    text      TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS ix_messages_thread ON messages(thread_id, id);
+"""
+
+# Agregados materializados do dashboard (Analytics): mantidos pelos triggers
+# na mesma transação de cada escrita, lidos por chave sem varrer o ledger.
+#   dim = status | counterparty | day   (amount = soma, count = nº de transações)
+#   dim = rfp_day | rfp                 (count = nº de RFPs)
+KPI_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kpi_agg (
+    dim    TEXT NOT NULL,
+    key    TEXT NOT NULL,
+    amount INTEGER NOT NULL DEFAULT 0,
+    count  INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dim, key)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS trg_kpi_tx_ins AFTER INSERT ON transactions BEGIN
+    INSERT INTO kpi_agg(dim, key, amount, count) VALUES
+        ('status', NEW.status, NEW.amount, 1),
+        ('counterparty', NEW.counterparty, NEW.amount, 1),
+        ('day', NEW.date, NEW.amount, 1)
+    ON CONFLICT(dim, key) DO UPDATE SET amount = amount + excluded.amount, count = count + excluded.count;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_kpi_tx_del AFTER DELETE ON transactions BEGIN
+    INSERT INTO kpi_agg(dim, key, amount, count) VALUES
+        ('status', OLD.status, -OLD.amount, -1),
+        ('counterparty', OLD.counterparty, -OLD.amount, -1),
+        ('day', OLD.date, -OLD.amount, -1)
+    ON CONFLICT(dim, key) DO UPDATE SET amount = amount + excluded.amount, count = count + excluded.count;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_kpi_tx_upd AFTER UPDATE OF status, counterparty, date, amount ON transactions BEGIN
+    INSERT INTO kpi_agg(dim, key, amount, count) VALUES
+        ('status', OLD.status, -OLD.amount, -1),
+        ('counterparty', OLD.counterparty, -OLD.amount, -1),
+        ('day', OLD.date, -OLD.amount, -1)
+    ON CONFLICT(dim, key) DO UPDATE SET amount = amount + excluded.amount, count = count + excluded.count;
+    INSERT INTO kpi_agg(dim, key, amount, count) VALUES
+        ('status', NEW.status, NEW.amount, 1),
+        ('counterparty', NEW.counterparty, NEW.amount, 1),
+        ('day', NEW.date, NEW.amount, 1)
+    ON CONFLICT(dim, key) DO UPDATE SET amount = amount + excluded.amount, count = count + excluded.count;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_kpi_rfp_ins AFTER INSERT ON rfps BEGIN
+    INSERT INTO kpi_agg(dim, key, amount, count) VALUES
+        ('rfp', 'total', 0, 1),
+        ('rfp_day', substr(NEW.submitted_at, 1, 10), 0, 1)
+    ON CONFLICT(dim, key) DO UPDATE SET count = count + excluded.count;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_kpi_rfp_del AFTER DELETE ON rfps BEGIN
+    INSERT INTO kpi_agg(dim, key, amount, count) VALUES
+        ('rfp', 'total', 0, -1),
+        ('rfp_day', substr(OLD.submitted_at, 1, 10), 0, -1)
+    ON CONFLICT(dim, key) DO UPDATE SET count = count + excluded.count;
+END;
+"""
+
+POOL_SIZE = 8            # conexões ociosas guardadas por arquivo; as excedentes são fechadas
+
+_db_path = Path(os.environ.get("VIP_DB_PATH", DEFAULT_DB_PATH))
+_pools: dict = {}       # caminho do banco -> queue.LifoQueue de conexões livres
+_init_lock = threading.Lock()
+_initialized = set()
+
+
+def configure(path):
+    """Aponta o store para outro arquivo (ex.: testes locais)."""
+    global _db_path
+    _db_path = Path(path)
+
+
+def current_path() -> Path:
+    return _db_path
+
+
+def _now() -> str:
+    return datetime.now().strftime(TS_FMT)
+
+
+def _open(key: str) -> sqlite3.Connection:
+    _db_path.parent.mkdir(parents=True, exist_ok=True)
+    # check_same_thread=False: a conexão passa de thread em thread pelo pool,
+    # mas só uma a usa por vez (entre a retirada e a devolução)
+    conn = sqlite3.connect(key, timeout=10, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    with _init_lock:
+        if key not in _initialized:
+            conn.executescript(SCHEMA + KPI_SCHEMA + NOTIF_SCHEMA + MAIL_SCHEMA + BROADCAST_SCHEMA
+                               + BOOKING_SCHEMA + API_KEY_SCHEMA)
+            # bancos criados antes dos agregados/contadores
+            if conn.execute("SELECT 1 FROM kpi_agg LIMIT 1").fetchone() is None:
+                rebuild_kpis(conn)
+            if conn.execute("SELECT 1 FROM notif_counters LIMIT 1").fetchone() is None:
+                rebuild_notif_counters(conn)
+            if conn.execute("SELECT 1 FROM thread_stats LIMIT 1").fetchone() is None:
+                rebuild_thread_stats(conn)
+            _initialized.add(key)
+    return conn
+
+
+def _pool(key: str) -> queue.LifoQueue:
+    pool = _pools.get(key)
+    if pool is None:
+        with _init_lock:
+            pool = _pools.setdefault(key, queue.LifoQueue(maxsize=POOL_SIZE))
+    return pool
+
+
+@contextmanager
+def connection():
+    """Conexão do pool do processo, devolvida ao sair do bloco (aberta só se não
+    houver nenhuma livre). Quem está dentro de `transaction()` usa a conexão dela."""
+    key = str(_db_path)
+    pool = _pool(key)
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _open(key)
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:         # bloco interrompido no meio de uma escrita
+            conn.execute("ROLLBACK")
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+def _all(sql: str, params=()) -> list:
+    with connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def _one(sql: str, params=()):
+    with connection() as conn:
+        return conn.execute(sql, params).fetchone()
+
+
+def _frame(sql: str, params=()) -> pd.DataFrame:
+    with connection() as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+@contextmanager
+def transaction():
+    with connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+# =====================
+#  USERS
+# =====================
+def hash_password(password: str, salt: str | None = None, iterations: int = 200_000) -> str:
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", (password or "").encode(), bytes.fromhex(salt), iterations)
+    return f"pbkdf2_sha256${iterations}${salt}${digest.hex()}"
+
+
+def check_password(password: str, stored: str) -> bool:
+    try:
+        _, iterations, salt, _ = stored.split("$")
+    except ValueError:
+        return False
+    return hmac.compare_digest(hash_password(password, salt, int(iterations)), stored)
+
+
+def _public(row) -> dict:
+    user = dict(row)
+    user.pop("password_hash", None)
+    return user
+
+
+def user_key(username) -> str:
+    """Forma canônica do username (chave primária de `users`)."""
+    return (username or "").strip().lower()
+
+
+def _user_row(conn, username):
+    return conn.execute("SELECT * FROM users WHERE username = ?", (user_key(username),)).fetchone()
+
+
+def get_user(username: str) -> dict | None:
+    row = _one("SELECT * FROM users WHERE username = ?", (user_key(username),))
+    return _public(row) if row else None
+
+
+def create_user(username, password, role, full_name="", contact="", seed=True):
+    key = user_key(username)
+    if not key:
+        return False, "Username is required."
+    if get_user(key) is not None:       # falha cedo, sem pagar o hash
+        return False, "An account with this username already exists."
+    # PBKDF2 (~0,1 s) fora da transação: BEGIN IMMEDIATE segura o lock de escrita do banco
+    pw_hash = hash_password(password or "")
+    try:
+        with transaction() as conn:
+            if _user_row(conn, key) is not None:
+                return False, "An account with this username already exists."
+            conn.execute(
+                "INSERT INTO users(username, password_hash, full_name, contact, role, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, 'Active', ?)",
+                (key, pw_hash, (full_name or "").strip(), (contact or "").strip(), role, _now()),
+            )
+            if seed:
+                _seed_user_data(conn, key)
+    except sqlite3.IntegrityError:
+        return False, "An account with this username already exists."
+    return True, "Account created successfully."
+
+
+def authenticate(username, password):
+    """(ok, msg, user) — `user` sem o hash da senha."""
+    row = _one("SELECT * FROM users WHERE username = ?", (user_key(username),))
+    if not row:
+        return False, "No account found with this username.", None
+    if not check_password(password or "", row["password_hash"]):
+        return False, "Incorrect password.", None
+    return True, "Login successful.", _public(row)
+
+
+USER_COLUMNS = ["username", "role", "full_name", "contact", "status", "created_at"]
+
+
+def list_users() -> pd.DataFrame:
+    return _frame("SELECT username, role, full_name, contact, status FROM users ORDER BY username")
+
+
+def _user_filter(q: str = "", role=None, status=None) -> tuple:
+    """WHERE por prefixo (username ou contato) + papel/status, sempre em faixas de índice."""
+    where, params = [], []
+    q = (q or "").strip().lower()
+    if q:
+        # prefixo como faixa [q, q + U+FFFF): PK para username, ix_users_contact para contato
+        where.append("((username >= ? AND username < ?) OR (lower(contact) >= ? AND lower(contact) < ?))")
+        params += [q, q + "\uffff", q, q + "\uffff"]
+    if role:
+        where.append("role = ?")
+        params.append(role)
+    if status:
+        where.append("status = ?")
+        params.append(status)
+    return (" WHERE " + " AND ".join(where) if where else ""), params
+
+
+def search_users(q: str = "", role=None, status=None, limit: int = 50, offset: int = 0) -> pd.DataFrame:
+    where, params = _user_filter(q, role, status)
+    return _frame(f"SELECT {', '.join(USER_COLUMNS)} FROM users{where} ORDER BY username LIMIT ? OFFSET ?",
+                  (*params, limit, offset))
+
+
+def count_users(q: str = "", role=None, status=None) -> int:
+    where, params = _user_filter(q, role, status)
+    return _one(f"SELECT COUNT(*) FROM users{where}", params)[0]
+
+
+def signups_since(after_rowid: int = 0) -> pd.DataFrame:
+    """(id = rowid, created_at) das contas com rowid > after_rowid, em ordem de inserção."""
+    return _frame("SELECT rowid AS id, created_at FROM users WHERE rowid > ? ORDER BY rowid", (after_rowid,))
+
+
+def users_watermark() -> tuple:
+    row = _one("SELECT COALESCE(MAX(rowid), 0), COUNT(*) FROM users")
+    return (row[0], row[1])
+
+
+def _bulk_update(column: str, value, usernames=None, match: dict | None = None, exclude=()) -> int:
+    """UPDATE único: para a lista de usernames (via json_each) ou para todos que
+    casam com o filtro de busca (`match` = kwargs de `search_users`), nunca para
+    os usernames em `exclude` (ex.: o admin que está aplicando a ação)."""
+    if usernames is not None:
+        keys = json.dumps(sorted({user_key(u) for u in usernames}))
+        sql, params = f"UPDATE users SET {column} = ? WHERE username IN (SELECT value FROM json_each(?))", [value, keys]
+    else:
+        where, fparams = _user_filter(**(match or {}))
+        sql, params = f"UPDATE users SET {column} = ?{where or ' WHERE 1'}", [value, *fparams]
+    skip = sorted({user_key(u) for u in exclude if u})
+    if skip:
+        sql += " AND username NOT IN (SELECT value FROM json_each(?))"
+        params.append(json.dumps(skip))
+    with transaction() as conn:
+        return conn.execute(sql, params).rowcount
+
+
+def set_users_status(status: str, usernames=None, match: dict | None = None, exclude=()) -> int:
+    return _bulk_update("status", status, usernames, match, exclude)
+
+
+def set_users_role(role: str, usernames=None, match: dict | None = None, exclude=()) -> int:
+    return _bulk_update("role", role, usernames, match, exclude)
+
+
+def set_user_status(username: str, status: str) -> bool:
+    return set_users_status(status, [username]) > 0
+
+
+def set_user_role(username: str, role: str) -> bool:
+    return set_users_role(role, [username]) > 0
+
+
+def set_password(username: str, password: str) -> bool:
+    pw_hash = hash_password(password or "")     # antes do BEGIN IMMEDIATE (ver create_user)
+    with transaction() as conn:
+        return conn.execute("UPDATE users SET password_hash = ? WHERE username = ?",
+                            (pw_hash, user_key(username))).rowcount > 0
+
+
+def ensure_admin():
+    # Seed Admin user (usuario: admin, senha: admin)
+    if get_user("admin") is None:
+        create_user("admin", "admin", ADMIN_ROLE, full_name="Platform Admin", contact="admin@vip.local")
+
+
+def _seed_user_data(conn, username):
+    tx = _seed_transactions()
+    conn.executemany(
+        "INSERT INTO transactions(username, date, counterparty, service, amount, status, ref) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(username, r.date, r.counterparty, r.service, int(r.amount), r.status, r.ref) for r in tx.itertuples()],
+    )
+    conn.executemany(
+        "INSERT INTO notifications(username, title, body, ts, ntype, read) VALUES (?, ?, ?, ?, ?, ?)",
+        [(username, n["title"], n["body"], n["ts"], n["ntype"], int(n["read"])) for n in _seed_notifications()],
+    )
+    for folder, threads in _seed_mail().items():
+        for th in threads:
+            tid = conn.execute(
+                "INSERT INTO threads(username, folder, title, sender, preview) VALUES (?, ?, ?, ?, ?)",
+                (username, folder, th["title"], th["from"], th["preview"]),
+            ).lastrowid
+            conn.executemany("INSERT INTO messages(thread_id, by, ts, text) VALUES (?, ?, ?, ?)",
+                             [(tid, m["by"], m["ts"], m["text"]) for m in th["msgs"]])
+
+
+# =====================
+#  TRANSACTIONS
+# =====================
+TX_COLUMNS = ["date", "counterparty", "service", "amount", "status", "ref"]
+
+
+def list_transactions(username: str | None = None, date_from=None, date_to=None) -> pd.DataFrame:
+    """Ledger do usuário (ou de todos, para o admin) no mesmo formato do seed.
+    `date_from`/`date_to` (inclusivos, 'YYYY-MM-DD') usam o índice por data."""
+    where, params = [], []
+    if username is not None:
+        where.append("username = ?")
+        params.append(username)
+    if date_from is not None:
+        where.append("date >= ?")
+        params.append(str(date_from))
+    if date_to is not None:
+        where.append("date <= ?")
+        params.append(str(date_to))
+    sql = f"SELECT {', '.join(TX_COLUMNS)} FROM transactions"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return _frame(sql + " ORDER BY date, id", params)
+
+
+def transactions_version(username: str | None = None) -> int:
+    """Muda a cada escrita no ledger do usuário (None = qualquer usuário)."""
+    if username is None:
+        row = _one("SELECT COALESCE(SUM(version), 0) FROM tx_versions")
+    else:
+        row = _one("SELECT version FROM tx_versions WHERE username = ?", (username,))
+    return row[0] if row else 0
+
+
+def transactions_since(after_id: int = 0) -> pd.DataFrame:
+    """Transações com id > after_id (ids são monotônicos), só as colunas das séries."""
+    return _frame("SELECT id, date, amount, status FROM transactions WHERE id > ? ORDER BY id", (after_id,))
+
+
+def transactions_watermark() -> tuple:
+    """(maior id, total, versão) — a versão também muda com updates."""
+    row = _one("SELECT COALESCE(MAX(id), 0), COUNT(*) FROM transactions")
+    return (row[0], row[1], transactions_version())
+
+
+def add_transaction(username, date, counterparty, service, amount, status, ref) -> int:
+    with transaction() as conn:
+        return conn.execute(
+            "INSERT INTO transactions(username, date, counterparty, service, amount, status, ref) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (username, date, counterparty, service, int(amount), status, ref),
+        ).lastrowid
+
+
+# =====================
+#  RFPs
+# =====================
+RFP_COLUMNS = ["submitted_at", "title", "scope", "target_date", "budget", "target_name",
+               "target_type", "target_city", "target_contact", "price"]
+
+
+def add_rfp(username: str, rfp: dict) -> int:
+    row = {c: "" if rfp.get(c) is None else str(rfp.get(c)) for c in RFP_COLUMNS}
+    row["submitted_at"] = row["submitted_at"] or _now()
+    with transaction() as conn:
+        return conn.execute(
+            f"INSERT INTO rfps(username, {', '.join(RFP_COLUMNS)}) VALUES (?{', ?' * len(RFP_COLUMNS)})",
+            (username, *row.values()),
+        ).lastrowid
+
+
+def list_rfps(username: str | None = None) -> pd.DataFrame:
+    """Mais recentes primeiro."""
+    sql = f"SELECT {', '.join(RFP_COLUMNS)} FROM rfps"
+    params = ()
+    if username is not None:
+        sql += " WHERE username = ?"
+        params = (username,)
+    return _frame(sql + " ORDER BY submitted_at DESC, id DESC", params)
+
+
+def rfps_since(after_id: int = 0) -> pd.DataFrame:
+    """RFPs com id > after_id (ids são monotônicos), em ordem de inserção."""
+    return _frame(f"SELECT id, username, {', '.join(RFP_COLUMNS)} FROM rfps WHERE id > ? ORDER BY id", (after_id,))
+
+
+def rfps_watermark() -> tuple:
+    """(maior id, total) — barato pelo rowid; detecta inserções e remoções."""
+    row = _one("SELECT COALESCE(MAX(id), 0), COUNT(*) FROM rfps")
+    return (row[0], row[1])
+
+
+def latest_rfps(limit: int = 30) -> pd.DataFrame:
+    return _frame(f"SELECT {', '.join(RFP_COLUMNS)} FROM rfps ORDER BY submitted_at DESC, id DESC LIMIT ?", (limit,))
+
+
+def latest_transactions(limit: int = 25) -> pd.DataFrame:
+    return _frame(f"SELECT {', '.join(TX_COLUMNS)} FROM transactions ORDER BY date DESC, id DESC LIMIT ?", (limit,))
+
+
+# =====================
+#  KPI AGGREGATES
+# =====================
+_KPI_RECOMPUTE_SQL = """
+SELECT 'status' AS dim, status AS key, SUM(amount) AS amount, COUNT(*) AS count FROM transactions GROUP BY status
+UNION ALL SELECT 'counterparty', counterparty, SUM(amount), COUNT(*) FROM transactions GROUP BY counterparty
+UNION ALL SELECT 'day', date, SUM(amount), COUNT(*) FROM transactions GROUP BY date
+UNION ALL SELECT 'rfp', 'total', 0, COUNT(*) FROM rfps HAVING COUNT(*) > 0
+UNION ALL SELECT 'rfp_day', substr(submitted_at, 1, 10), 0, COUNT(*) FROM rfps GROUP BY substr(submitted_at, 1, 10)
+"""
+
+
+def kpis(dim: str) -> dict:
+    """{key: (amount, count)} de uma dimensão materializada (sem chaves zeradas)."""
+    rows = _all("SELECT key, amount, count FROM kpi_agg WHERE dim = ? AND count <> 0", (dim,))
+    return {r["key"]: (r["amount"], r["count"]) for r in rows}
+
+
+def kpi(dim: str, key: str) -> tuple:
+    row = _one("SELECT amount, count FROM kpi_agg WHERE dim = ? AND key = ?", (dim, key))
+    return (row["amount"], row["count"]) if row else (0, 0)
+
+
+def recompute_kpis() -> dict:
+    """Recalcula tudo do zero (verificação): {(dim, key): (amount, count)}."""
+    return {(r["dim"], r["key"]): (r["amount"], r["count"])
+            for r in _all(_KPI_RECOMPUTE_SQL)}
+
+
+def verify_kpis() -> list:
+    """Divergências entre os agregados materializados e o recálculo completo."""
+    stored = {(r["dim"], r["key"]): (r["amount"], r["count"])
+              for r in _all("SELECT dim, key, amount, count FROM kpi_agg WHERE count <> 0")}
+    fresh = recompute_kpis()
+    return sorted((k, stored.get(k), fresh.get(k)) for k in stored.keys() | fresh.keys()
+                  if stored.get(k) != fresh.get(k))
+
+
+def rebuild_kpis(conn=None):
+    if conn is None:
+        with connection() as conn:
+            return rebuild_kpis(conn)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM kpi_agg")
+        conn.execute(f"INSERT INTO kpi_agg(dim, key, amount, count) {_KPI_RECOMPUTE_SQL}")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+# =====================
+#  NOTIFICATIONS
+# =====================
+# ids AUTOINCREMENT (monotônicos, nunca reaproveitados); o badge lê um contador
+# por usuário mantido por triggers em vez de contar as notificações.
+NOTIF_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notif_counters (
+    username TEXT PRIMARY KEY,
+    unread   INTEGER NOT NULL DEFAULT 0,
+    total    INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS trg_notif_ins AFTER INSERT ON notifications BEGIN
+    INSERT INTO notif_counters(username, unread, total) VALUES (NEW.username, NEW.read = 0, 1)
+    ON CONFLICT(username) DO UPDATE SET unread = unread + excluded.unread, total = total + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_notif_read AFTER UPDATE OF read ON notifications
+WHEN (OLD.read = 0) <> (NEW.read = 0) BEGIN
+    UPDATE notif_counters SET unread = unread + (CASE WHEN NEW.read = 0 THEN 1 ELSE -1 END)
+    WHERE username = NEW.username;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_notif_del AFTER DELETE ON notifications BEGIN
+    UPDATE notif_counters SET unread = unread - (OLD.read = 0), total = total - 1 WHERE username = OLD.username;
+END;
+"""
+
+
+def rebuild_notif_counters(conn=None):
+    if conn is None:
+        with connection() as conn:
+            return rebuild_notif_counters(conn)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM notif_counters")
+        conn.execute("INSERT INTO notif_counters(username, unread, total) "
+                     "SELECT username, SUM(read = 0), COUNT(*) FROM notifications GROUP BY username")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def add_notification(username, title, body, ntype="info", ts=None) -> int:
+    with transaction() as conn:
+        return conn.execute(
+            "INSERT INTO notifications(username, title, body, ts, ntype, read) VALUES (?, ?, ?, ?, ?, 0)",
+            (username, title, body, ts or _now(), ntype),
+        ).lastrowid
+
+
+def list_notifications(username: str, limit: int | None = None) -> list:
+    """Mais recentes primeiro; `limit` lê só as N primeiras pelo índice (username, ts)."""
+    rows = _all(
+        "SELECT id, title, body, ts, ntype, read FROM notifications WHERE username = ? "
+        "ORDER BY ts DESC, id DESC LIMIT ?",
+        (username, -1 if limit is None else limit),
+    )
+    return [{**dict(r), "read": bool(r["read"])} for r in rows]
+
+
+def notification_counts(username: str) -> tuple:
+    """(não lidas, total) a partir do contador mantido."""
+    row = _one("SELECT unread, total FROM notif_counters WHERE username = ?", (username,))
+    return (row["unread"], row["total"]) if row else (0, 0)
+
+
+def unread_count(username: str) -> int:
+    return notification_counts(username)[0]
+
+
+def mark_all_read(username: str):
+    with transaction() as conn:
+        conn.execute("UPDATE notifications SET read = 1 WHERE username = ? AND read = 0", (username,))
+
+
+# =====================
+#  MAIL / THREADS
+# =====================
+MAIL_FOLDERS = ["Inbox", "Sent", "Archived"]
+
+# messages é um log só de inserção; thread_stats (contagem e último id por
+# thread) é mantido por trigger para a UI saber quantas mensagens antigas
+# existem sem contar a thread inteira.
+MAIL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS thread_stats (
+    thread_id INTEGER PRIMARY KEY,
+    count     INTEGER NOT NULL DEFAULT 0,
+    last_id   INTEGER NOT NULL DEFAULT 0,
+    last_ts   TEXT NOT NULL DEFAULT ''
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS trg_msg_ins AFTER INSERT ON messages BEGIN
+    INSERT INTO thread_stats(thread_id, count, last_id, last_ts) VALUES (NEW.thread_id, 1, NEW.id, NEW.ts)
+    ON CONFLICT(thread_id) DO UPDATE SET count = count + 1, last_id = NEW.id, last_ts = NEW.ts;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_msg_upd BEFORE UPDATE ON messages BEGIN
+    SELECT RAISE(ABORT, 'messages are append-only');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_msg_del BEFORE DELETE ON messages BEGIN
+    SELECT RAISE(ABORT, 'messages are append-only');
+END;
+"""
+
+
+def rebuild_thread_stats(conn=None):
+    if conn is None:
+        with connection() as conn:
+            return rebuild_thread_stats(conn)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM thread_stats")
+        conn.execute("INSERT INTO thread_stats(thread_id, count, last_id, last_ts) "
+                     "SELECT thread_id, COUNT(*), MAX(id), MAX(ts) FROM messages GROUP BY thread_id")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+_THREAD_COLS = ("t.id, t.folder, t.title, t.sender AS \"from\", t.preview, "
+                "COALESCE(s.count, 0) AS count, COALESCE(s.last_ts, '') AS last_ts")
+
+
+def list_threads(username: str, folder: str) -> list:
+    """Threads da pasta na ordem do índice (username, folder, id)."""
+    rows = _all(
+        f"SELECT {_THREAD_COLS} FROM threads t LEFT JOIN thread_stats s ON s.thread_id = t.id "
+        "WHERE t.username = ? AND t.folder = ? ORDER BY t.id",
+        (username, folder),
+    )
+    return [dict(r) for r in rows]
+
+
+def get_thread(thread_id, username: str) -> dict | None:
+    row = _one(
+        f"SELECT {_THREAD_COLS} FROM threads t LEFT JOIN thread_stats s ON s.thread_id = t.id "
+        "WHERE t.id = ? AND t.username = ?",
+        (thread_id, username),
+    )
+    return dict(row) if row else None
+
+
+def thread_messages(thread_id, limit: int | None = None, before_id: int | None = None) -> list:
+    """As `limit` mensagens mais recentes (anteriores a `before_id`), em ordem cronológica."""
+    rows = _all(
+        "SELECT id, by, ts, text FROM messages WHERE thread_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+        (thread_id, before_id if before_id is not None else 1 << 62, -1 if limit is None else limit),
+    )
+    return [dict(r) for r in reversed(rows)]
+
+
+def add_message(thread_id, by: str, text: str, ts=None) -> int:
+    with transaction() as conn:
+        return conn.execute("INSERT INTO messages(thread_id, by, ts, text) VALUES (?, ?, ?, ?)",
+                            (thread_id, by, ts or _now(), text)).lastrowid
+
+
+# =====================
+#  BROADCASTS
+# =====================
+# Um broadcast gera uma linha em `deliveries` por (destinatário, canal); a
+# entrega em si roda em background (vip/broadcast.py). Os contadores do
+# broadcast são mantidos por trigger a cada mudança de status de entrega.
+BROADCAST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS broadcasts (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    segment    TEXT NOT NULL,
+    subject    TEXT NOT NULL DEFAULT '',
+    body       TEXT NOT NULL DEFAULT '',
+    via        TEXT NOT NULL,
+    status     TEXT NOT NULL DEFAULT 'queued',
+    total      INTEGER NOT NULL DEFAULT 0,
+    sent       INTEGER NOT NULL DEFAULT 0,
+    failed     INTEGER NOT NULL DEFAULT 0,
+    skipped    INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS deliveries (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    broadcast_id INTEGER NOT NULL REFERENCES broadcasts(id),
+    username     TEXT NOT NULL,
+    channel      TEXT NOT NULL,
+    address      TEXT NOT NULL DEFAULT '',
+    status       TEXT NOT NULL DEFAULT 'pending',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    error        TEXT NOT NULL DEFAULT '',
+    updated_at   TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS ix_deliv_queue ON deliveries(broadcast_id, channel, status, id);
+CREATE TRIGGER IF NOT EXISTS trg_deliv_status AFTER UPDATE OF status ON deliveries
+WHEN OLD.status <> NEW.status BEGIN
+    UPDATE broadcasts SET
+        sent    = sent    + (NEW.status = 'sent')    - (OLD.status = 'sent'),
+        failed  = failed  + (NEW.status = 'failed')  - (OLD.status = 'failed'),
+        skipped = skipped + (NEW.status = 'skipped') - (OLD.status = 'skipped')
+    WHERE id = NEW.broadcast_id;
+END;
+"""
+BROADCAST_COLUMNS = ["id", "created_at", "segment", "subject", "via", "status", "total", "sent", "failed", "skipped"]
+
+
+def create_broadcast(segment: str, roles, subject: str, body: str, via: str, channels) -> tuple:
+    """Cria o broadcast e enfileira uma entrega por usuário ativo (não admin) do
+    segmento e canal, num único INSERT ... SELECT. `roles` None = todos.
+    Devolve (id, nº de entregas)."""
+    where = "role <> ? AND status = 'Active'"
+    params = [ADMIN_ROLE]
+    if roles is not None:
+        where += f" AND role IN ({', '.join('?' * len(roles))})"
+        params += list(roles)
+    with transaction() as conn:
+        bid = conn.execute(
+            "INSERT INTO broadcasts(created_at, segment, subject, body, via) VALUES (?, ?, ?, ?, ?)",
+            (_now(), segment, subject, body, via)).lastrowid
+        total = 0
+        for ch in channels:
+            total += conn.execute(
+                "INSERT INTO deliveries(broadcast_id, username, channel, address) "
+                f"SELECT ?, username, ?, contact FROM users WHERE {where} ORDER BY username",
+                (bid, ch, *params)).rowcount
+        conn.execute("UPDATE broadcasts SET total = ? WHERE id = ?", (total, bid))
+    return bid, total
+
+
+def get_broadcast(broadcast_id) -> dict | None:
+    row = _one("SELECT * FROM broadcasts WHERE id = ?", (broadcast_id,))
+    return dict(row) if row else None
+
+
+def pending_deliveries(broadcast_id, channel: str, after_id: int = 0, limit: int = 200) -> list:
+    rows = _all(
+        "SELECT id, username, address, attempts FROM deliveries "
+        "WHERE broadcast_id = ? AND channel = ? AND status = 'pending' AND id > ? ORDER BY id LIMIT ?",
+        (broadcast_id, channel, after_id, limit))
+    return [dict(r) for r in rows]
+
+
+def record_deliveries(updates):
+    """Aplica um lote de (status, attempts, error, id) numa única transação."""
+    ts = _now()
+    with transaction() as conn:
+        conn.executemany("UPDATE deliveries SET status = ?, attempts = ?, error = ?, updated_at = ? WHERE id = ?",
+                         [(s, a, e, ts, i) for s, a, e, i in updates])
+
+
+def set_broadcast_status(broadcast_id, status: str):
+    with transaction() as conn:
+        conn.execute("UPDATE broadcasts SET status = ? WHERE id = ?", (status, broadcast_id))
+
+
+def open_broadcasts() -> list:
+    """Broadcasts ainda com entregas pendentes (para retomar após reinício)."""
+    rows = _all("SELECT DISTINCT broadcast_id, channel FROM deliveries WHERE status = 'pending' ORDER BY broadcast_id")
+    return [(r[0], r[1]) for r in rows]
+
+
+def has_pending(broadcast_id) -> bool:
+    return _one(
+        "SELECT 1 FROM deliveries WHERE broadcast_id = ? AND status = 'pending' LIMIT 1",
+        (broadcast_id,)) is not None
+
+
+def list_broadcasts(limit: int = 50) -> pd.DataFrame:
+    return _frame(f"SELECT {', '.join(BROADCAST_COLUMNS)} FROM broadcasts ORDER BY id DESC LIMIT ?", (limit,))
+
+
+def seed_broadcasts():
+    """Histórico de demonstração, só se ainda não houver broadcasts."""
+    rows = _seed_broadcast_log()
+    with transaction() as conn:
+        if conn.execute("SELECT 1 FROM broadcasts LIMIT 1").fetchone() is None:
+            conn.executemany(
+                "INSERT INTO broadcasts(created_at, segment, subject, body, via, status) VALUES (?, ?, ?, ?, ?, 'done')",
+                [(r["sent_at"], r["segment"], r["subject"], r["body"], r["via"]) for r in rows])
+
+
+# =====================
+#  BOOKINGS / HOLDS
+# =====================
+# Ocupação por listing (chave = nome do listing no catálogo), datas inclusivas
+# 'YYYY-MM-DD'. `kind`: 'booking' (confirmado) ou 'hold' (reserva provisória de
+# uma RFP). O índice em memória (vip/availability.py) é recarregado quando
+# `booking_version` muda (triggers).
+BOOKING_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bookings (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    listing    TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date   TEXT NOT NULL,
+    kind       TEXT NOT NULL DEFAULT 'booking',
+    username   TEXT NOT NULL DEFAULT '',
+    rfp_id     INTEGER,
+    created_at TEXT NOT NULL,
+    CHECK (end_date >= start_date)
+);
+CREATE INDEX IF NOT EXISTS ix_bookings_listing ON bookings(listing, start_date);
+CREATE TABLE IF NOT EXISTS booking_version (
+    id      INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO booking_version(id, version) VALUES (1, 0);
+CREATE TRIGGER IF NOT EXISTS trg_bk_ins AFTER INSERT ON bookings BEGIN
+    UPDATE booking_version SET version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_bk_upd AFTER UPDATE ON bookings BEGIN
+    UPDATE booking_version SET version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_bk_del AFTER DELETE ON bookings BEGIN
+    UPDATE booking_version SET version = version + 1 WHERE id = 1;
+END;
+"""
+BOOKING_COLUMNS = ["listing", "start_date", "end_date", "kind"]
+
+
+def add_booking(listing: str, start_date, end_date=None, kind: str = "booking",
+                username: str = "", rfp_id=None) -> int:
+    end_date = end_date or start_date
+    with transaction() as conn:
+        return conn.execute(
+            "INSERT INTO bookings(listing, start_date, end_date, kind, username, rfp_id, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (listing, str(start_date), str(end_date), kind, username, rfp_id, _now())).lastrowid
+
+
+def add_bookings(rows) -> int:
+    """Carga em lote de (listing, start_date, end_date, kind)."""
+    ts = _now()
+    with transaction() as conn:
+        return conn.executemany(
+            "INSERT INTO bookings(listing, start_date, end_date, kind, created_at) VALUES (?, ?, ?, ?, ?)",
+            [(l, str(a), str(b), k, ts) for l, a, b, k in rows]).rowcount
+
+
+def list_bookings(listing: str | None = None) -> pd.DataFrame:
+    sql, params = f"SELECT {', '.join(BOOKING_COLUMNS)} FROM bookings", ()
+    if listing is not None:
+        sql, params = sql + " WHERE listing = ?", (listing,)
+    return _frame(sql + " ORDER BY listing, start_date", params)
+
+
+def bookings_version() -> int:
+    row = _one("SELECT version FROM booking_version WHERE id = 1")
+    return row[0] if row else 0
+
+
+# =====================
+#  API KEYS (data clients)
+# =====================
+# Chaves da API JSON (vip/api.py) por cliente B2B (ids de data_clients). Só o
+# hash SHA-256 fica no banco; o token aparece uma vez, na criação.
+API_KEY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS api_keys (
+    key_hash   TEXT PRIMARY KEY,
+    client_id  INTEGER NOT NULL,
+    prefix     TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    revoked    INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_api_keys_client ON api_keys(client_id);
+"""
+API_KEY_PREFIX = "vip_"
+
+
+def _key_hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def create_api_key(client_id: int) -> str:
+    token = API_KEY_PREFIX + secrets.token_urlsafe(24)
+    with transaction() as conn:
+        conn.execute("INSERT INTO api_keys(key_hash, client_id, prefix, created_at) VALUES (?, ?, ?, ?)",
+                     (_key_hash(token), int(client_id), token[:len(API_KEY_PREFIX) + 6], _now()))
+    return token
+
+
+def api_key_client(token: str):
+    """client_id da chave, ou None se não existe/foi revogada."""
+    if not token or not token.startswith(API_KEY_PREFIX):
+        return None
+    row = _one("SELECT client_id FROM api_keys WHERE key_hash = ? AND revoked = 0", (_key_hash(token),))
+    return row[0] if row else None
+
+
+def list_api_keys(client_id=None) -> pd.DataFrame:
+    sql, params = "SELECT client_id, prefix, created_at, revoked FROM api_keys", ()
+    if client_id is not None:
+        sql, params = sql + " WHERE client_id = ?", (int(client_id),)
+    return _frame(sql + " ORDER BY created_at DESC", params)
+
+
+def revoke_api_keys(client_id: int) -> int:
+    with transaction() as conn:
+        return conn.execute("UPDATE api_keys SET revoked = 1 WHERE client_id = ? AND revoked = 0",
+                            (int(client_id),)).rowcount
@@ -0,0 +1,182 @@
+# =====================
+#  EXPORTS (CSV)
+# =====================
+# Exportações B2B geradas sob demanda direto do SQLite: o cursor é lido em
+# blocos de CHUNK_ROWS linhas e cada bloco vira CSV (opcionalmente gzip) antes
+# de ler o próximo, então a memória fica limitada ao bloco + arquivo de saída.
+# Na UI `export_file` vai como callable no `st.download_button` e só roda no
+# clique: o CSV é gravado em blocos num arquivo temporário e o Streamlit lê o
+# arquivo uma vez para servir (não há um buffer intermediário em memória).
+# Com `anonymize` cada bloco passa pelo Anonymizer (vip/anonymize.py); a
+# supressão k-anônima precisa das contagens globais, então há uma primeira
+# passada lendo só os quase-identificadores. Colunas de texto livre (título e
+# escopo das RFPs) nem são lidas quando a exportação é anonimizada.
+#   python -m vip.export transactions --from 2025-01-01 --to 2025-12-31 --gzip --out tx.csv.gz
+#   python -m vip.export rfps --anonymize --k 10 --out rfps_anon.csv
+import argparse
+import csv
+import gzip
+import io
+import os
+import sys
+import tempfile
+from contextlib import suppress
+from datetime import date, timedelta
+
+import pandas as pd
+
+from vip import db
+from vip.anonymize import DEFAULT_K, Anonymizer, exportable
+
+CHUNK_ROWS = 50_000
+GZIP_LEVEL = 6            # o nível 9 padrão custa ~3x o tempo para ganhar poucos %
+DATASETS = {
+    # nome -> (tabela, colunas, coluna de data)
+    "transactions": ("transactions", db.TX_COLUMNS, "date"),
+    "rfps": ("rfps", db.RFP_COLUMNS, "submitted_at"),
+}
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def iter_rows(dataset: str, columns=None, date_from=None, date_to=None, chunk_rows: int = CHUNK_ROWS):
+    """Blocos de tuplas do dataset, em ordem de data; datas inclusivas."""
+    table, allowed, date_col = DATASETS[dataset]
+    columns = list(columns or allowed)
+    unknown = [c for c in columns if c not in allowed]
+    if unknown:
+        raise ValueError(f"unknown columns for {dataset}: {unknown}")
+    where, params = [], []
+    if date_from is not None:
+        where.append(f"{date_col} >= ?")
+        params.append(_as_date(date_from).isoformat())
+    if date_to is not None:
+        # '< dia seguinte' cobre tanto 'YYYY-MM-DD' quanto 'YYYY-MM-DD HH:MM'
+        where.append(f"{date_col} < ?")
+        params.append((_as_date(date_to) + timedelta(days=1)).isoformat())
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    # a conexão fica fora do pool enquanto o cursor é lido (volta quando o gerador termina ou é fechado)
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.row_factory = None      # tuplas simples: o csv.writer não precisa de sqlite3.Row
+        cur.execute(sql + f" ORDER BY {date_col}, id", params)
+        try:
+            while True:
+                rows = cur.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cur.close()
+
+
+def iter_csv(dataset: str, columns=None, date_from=None, date_to=None, chunk_rows: int = CHUNK_ROWS,
+             anonymize: bool = False, k: int = DEFAULT_K):
+    """Pedaços de CSV (bytes UTF-8), começando pelo cabeçalho."""
+    columns = list(columns or DATASETS[dataset][1])
+    anon = None
+    if anonymize:
+        columns = exportable(dataset, columns)
+        if not columns:
+            raise ValueError(f"no columns of {dataset} can be exported anonymized")
+        anon = Anonymizer(dataset, k=k)
+        quasi = anon.quasi_columns(columns)
+        for rows in iter_rows(dataset, quasi, date_from, date_to, chunk_rows) if quasi else ():
+            anon.observe(anon.generalize(pd.DataFrame.from_records(rows, columns=quasi)))
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(columns)
+    for rows in iter_rows(dataset, columns, date_from, date_to, chunk_rows):
+        if anon is None:
+            writer.writerows(rows)
+        else:
+            anon.transform(pd.DataFrame.from_records(rows, columns=columns)).to_csv(
+                buf, header=False, index=False, lineterminator="\n")
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def write_export(fileobj, dataset: str, columns=None, date_from=None, date_to=None,
+                 compress: bool = False, chunk_rows: int = CHUNK_ROWS,
+                 anonymize: bool = False, k: int = DEFAULT_K) -> int:
+    """Grava o CSV em `fileobj` (binário) e devolve o nº de bytes não comprimidos."""
+    out = gzip.GzipFile(fileobj=fileobj, mode="wb", compresslevel=GZIP_LEVEL, mtime=0) if compress else fileobj
+    total = 0
+    try:
+        for piece in iter_csv(dataset, columns, date_from, date_to, chunk_rows, anonymize, k):
+            out.write(piece)
+            total += len(piece)
+    finally:
+        if compress:
+            out.close()
+    return total
+
+
+def export_bytes(dataset: str, columns=None, date_from=None, date_to=None, compress: bool = False,
+                 anonymize: bool = False, k: int = DEFAULT_K) -> bytes:
+    buf = io.BytesIO()
+    write_export(buf, dataset, columns, date_from, date_to, compress, anonymize=anonymize, k=k)
+    return buf.getvalue()
+
+
+class TempExport(io.FileIO):
+    """Arquivo temporário sem buffer (RawIOBase, aceito pelo st.download_button)
+    que é apagado ao ser fechado ou coletado."""
+
+    def __init__(self, prefix: str = "vip_export_"):
+        fd, self.path = tempfile.mkstemp(prefix=prefix)
+        super().__init__(fd, "w+b")
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            with suppress(FileNotFoundError):
+                os.remove(self.path)
+
+
+def export_file(dataset: str, columns=None, date_from=None, date_to=None, compress: bool = False,
+                anonymize: bool = False, k: int = DEFAULT_K) -> TempExport:
+    """Exportação gravada em blocos num TempExport, devolvido posicionado no início."""
+    fh = TempExport(prefix=f"vip_{dataset}_")
+    try:
+        write_export(fh, dataset, columns, date_from, date_to, compress, anonymize=anonymize, k=k)
+    except BaseException:
+        fh.close()
+        raise
+    fh.seek(0)
+    return fh
+
+
+def file_name(dataset: str, compress: bool = False) -> str:
+    name = "rfp_history" if dataset == "rfps" else dataset
+    return f"{name}.csv.gz" if compress else f"{name}.csv"
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Export a dataset from the VIP store as CSV")
+    ap.add_argument("dataset", choices=sorted(DATASETS))
+    ap.add_argument("--from", dest="date_from")
+    ap.add_argument("--to", dest="date_to")
+    ap.add_argument("--columns", help="comma-separated subset of columns")
+    ap.add_argument("--gzip", action="store_true")
+    ap.add_argument("--anonymize", action="store_true")
+    ap.add_argument("--k", type=int, default=DEFAULT_K, help="minimum group size for --anonymize")
+    ap.add_argument("--out", help="output file (default: stdout)")
+    args = ap.parse_args()
+    cols = args.columns.split(",") if args.columns else None
+    if args.out:
+        with open(args.out, "wb") as fh:
+            n = write_export(fh, args.dataset, cols, args.date_from, args.date_to, args.gzip,
+                             anonymize=args.anonymize, k=args.k)
+        print(f"wrote {n:,} bytes of CSV to {args.out}", file=sys.stderr)
+    else:
+        write_export(sys.stdout.buffer, args.dataset, cols, args.date_from, args.date_to, args.gzip,
+                     anonymize=args.anonymize, k=args.k)
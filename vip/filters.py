@@ -0,0 +1,135 @@
+# =====================
+#  FILTER INDEX (Type / City / Category / Price)
+# =====================
+# Índices montados uma vez por dataset:
+#   - colunas categóricas: códigos por linha + lista ordenada de posições por valor
+#   - preço: ordem de linhas por preço para busca de intervalo com searchsorted
+# A consulta parte do predicado mais seletivo e verifica os demais só nas linhas
+# candidatas, sem gerar DataFrames intermediários. Retorna row ids (posições).
+# `updated()` devolve um índice novo após inserir/alterar linhas, refazendo só as
+# listas dos valores tocados (importação de catálogo, vip/ingest.py).
+import numpy as np
+import pandas as pd
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+class FilterIndex:
+    def __init__(self, df: pd.DataFrame, columns=("type", "city", "category"), price_col="price"):
+        self.n = len(df)
+        self.codes = {}      # col -> np.ndarray[int32] (-1 = vazio)
+        self.lookup_code = {}  # col -> {valor: código}
+        self.postings = {}   # col -> [np.ndarray de posições, um por código]
+        for col in columns:
+            if col in df.columns:
+                self._index_column(col, df[col])
+
+        self.price_col = price_col
+        self.price = None
+        if price_col in df.columns and pd.api.types.is_numeric_dtype(df[price_col]):
+            self.price = df[price_col].to_numpy(dtype=np.float64)
+            valid = np.flatnonzero(~np.isnan(self.price))
+            self.price_order = valid[np.argsort(self.price[valid], kind="stable")]
+            self.price_sorted = self.price[self.price_order]
+
+    def _index_column(self, col, series):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        codes = codes.astype(np.int32)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1), side="left")
+        self.codes[col] = codes
+        self.lookup_code[col] = {v: i for i, v in enumerate(uniques.tolist())}
+        self.postings[col] = [order[bounds[i]:bounds[i + 1]].astype(np.int64) for i in range(len(uniques))]
+
+    def values(self, col) -> list:
+        """Valores distintos (ordenados) que ainda aparecem em alguma linha."""
+        postings = self.postings.get(col, [])
+        return sorted(v for v, c in self.lookup_code.get(col, {}).items() if postings[c].size)
+
+    def updated(self, df: pd.DataFrame, row_ids) -> "FilterIndex":
+        """Índice de `df` quando só as linhas `row_ids` mudaram (ids >= n são novas)."""
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        out = FilterIndex.__new__(FilterIndex)
+        out.n = len(df)
+        out.codes, out.lookup_code, out.postings = {}, {}, {}
+        for col, old_codes in self.codes.items():
+            lookup = dict(self.lookup_code[col])
+            fc, uniques = pd.factorize(df[col].iloc[row_ids], use_na_sentinel=True)
+            mapped = np.array([lookup.setdefault(v, len(lookup)) for v in uniques.tolist()] + [-1], dtype=np.int32)
+            new = mapped[fc]                        # fc == -1 (vazio) cai no -1 do fim
+            codes = np.full(out.n, -1, dtype=np.int32)
+            codes[:self.n] = old_codes
+            old = codes[row_ids]
+            codes[row_ids] = new
+            postings = self.postings[col] + [_EMPTY] * (len(lookup) - len(self.postings[col]))
+            moved = old != new                      # linhas que trocaram de valor nesta coluna
+            ids, old, new = row_ids[moved], old[moved], new[moved]
+            for code in np.unique(np.concatenate([old[old >= 0], new[new >= 0]])):
+                p = postings[code]
+                gone = ids[old == code]
+                if gone.size:
+                    p = p[~np.isin(p, gone)]
+                add = np.sort(ids[new == code])
+                if add.size and p.size and add[0] <= p[-1]:
+                    add = np.union1d(p, add)
+                elif p.size:
+                    add = np.concatenate([p, add])   # só linhas novas (ids maiores): já ordenado
+                postings[code] = add
+            out.codes[col], out.lookup_code[col], out.postings[col] = codes, lookup, postings
+
+        out.price_col = self.price_col
+        out.price = None
+        if self.price is not None and self.price_col in df.columns:
+            price = np.full(out.n, np.nan)
+            price[:self.n] = self.price
+            price[row_ids] = df[self.price_col].iloc[row_ids].to_numpy(dtype=np.float64)
+            keep = ~np.isin(self.price_order, row_ids)
+            order, sorted_ = self.price_order[keep], self.price_sorted[keep]
+            ins = row_ids[~np.isnan(price[row_ids])]
+            ins = ins[np.argsort(price[ins], kind="stable")]
+            at = np.searchsorted(sorted_, price[ins], side="right")
+            out.price = price
+            out.price_order = np.insert(order, at, ins)
+            out.price_sorted = np.insert(sorted_, at, price[ins])
+        return out
+
+    def _price_slice(self, lo, hi):
+        a = np.searchsorted(self.price_sorted, lo, side="left")
+        b = np.searchsorted(self.price_sorted, hi, side="right")
+        return self.price_order[a:b]
+
+    def query(self, equals: dict | None = None, price_range=None) -> np.ndarray:
+        """Row ids (ordenados) que batem com todos os filtros. Valor None/"All" = sem filtro."""
+        preds = []  # (tamanho, tipo, payload)
+        for col, val in (equals or {}).items():
+            if val is None or val == "All" or col not in self.codes:
+                continue
+            code = self.lookup_code[col].get(val)
+            if code is None:
+                return _EMPTY
+            preds.append((len(self.postings[col][code]), "eq", (col, code)))
+        if price_range is not None and self.price is not None:
+            lo, hi = price_range
+            ids = self._price_slice(lo, hi)
+            preds.append((len(ids), "price", ids))
+
+        if not preds:
+            return np.arange(self.n, dtype=np.int64)
+
+        preds.sort(key=lambda p: p[0])
+        _, kind, payload = preds[0]
+        if kind == "eq":
+            col, code = payload
+            ids = self.postings[col][code]
+        else:
+            ids = np.sort(payload)
+        for _, kind, payload in preds[1:]:
+            if ids.size == 0:
+                break
+            if kind == "eq":
+                col, code = payload
+                ids = ids[self.codes[col][ids] == code]
+            else:
+                p = self.price[ids]
+                ids = ids[(p >= lo) & (p <= hi)]
+        return ids
@@ -0,0 +1,249 @@
+# =====================
+#  CATALOG INGESTION
+# =====================
+# Importação em lote de catálogos de vendors/venues (CSV) para o marketplace.
+# Duas passadas, ambas em blocos de `chunk_rows` linhas, com memória limitada ao
+# bloco + catálogo resultante (não cresce com o tamanho do arquivo):
+#   1. cada bloco do CSV (lido como texto) é validado: colunas obrigatórias,
+#      price/capacity inteiros >= 0, rating 0–5, e-mail, type/price_range
+#      conhecidos e price_range coerente com o price (vazio é preenchido a partir
+#      do price). As linhas válidas vão para uma tabela SQLite temporária (em
+#      disco) com chave única (name, contact_email) sem diferenciar maiúsculas:
+#      INSERT OR REPLACE deixa só a última ocorrência de cada chave;
+#   2. as linhas guardadas são relidas na ordem do arquivo, comparadas com o
+#      catálogo (chave existente vira update; linhas idênticas são ignoradas) e
+#      gravadas numa única cópia de trabalho (`CatalogUpsert`), trocada pelo
+#      catálogo em uso só no fim.
+# Nada muda antes do fim: um erro no meio do arquivo (CSV ilegível) deixa o
+# catálogo em uso intacto. Os erros guardados são limitados a `max_errors`.
+#   python -m vip.ingest vendors.csv --chunk-rows 50000 [--dry-run]
+import argparse
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from vip.marketplace import CatalogUpsert, get_marketplace, save_marketplace
+
+REQUIRED_COLUMNS = ("type", "name", "category", "city", "capacity", "price_range", "rating", "contact_email", "price")
+TYPES = ("Vendor", "Venue")
+PRICE_RANGES = ("$", "$$", "$$$", "$$$$")
+PRICE_BANDS = (100, 225, 400)   # limites entre as faixas (pontos médios de 50/150/300/500)
+CHUNK_ROWS = 50_000
+MAX_ERRORS = 1_000
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_LOCK = threading.Lock()    # uma importação por vez por processo
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    duplicates: int = 0     # repetidas dentro do próprio arquivo (vale a última)
+    rejected: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+    catalog_rows: int = 0
+    errors: list = field(default_factory=list)
+
+    def summary(self) -> dict:
+        return {k: v for k, v in vars(self).items() if k != "errors"}
+
+    def error_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.errors, columns=["line", "column", "value", "error"])
+
+
+def price_range_for(price) -> np.ndarray:
+    return np.asarray(PRICE_RANGES, dtype=object)[np.searchsorted(PRICE_BANDS, price, side="right")]
+
+
+def _key(df: pd.DataFrame) -> pd.Series:
+    name = df["name"].astype("string").fillna("").str.strip().str.casefold()
+    email = df["contact_email"].astype("string").fillna("").str.strip().str.lower()
+    return name + "\x1f" + email
+
+
+def validate(chunk: pd.DataFrame, first_line: int = 2) -> tuple:
+    """(linhas válidas normalizadas, lista de erros) de um bloco lido como texto.
+    `first_line` é a linha do arquivo da primeira linha do bloco (cabeçalho = 1)."""
+    missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"missing required column(s): {', '.join(missing)}")
+    df = pd.DataFrame({c: chunk[c].astype("string").str.strip() for c in REQUIRED_COLUMNS})
+    bad = pd.DataFrame(False, index=df.index, columns=list(REQUIRED_COLUMNS))
+    reasons = {}
+
+    def check(col, mask, reason):
+        mask = pd.Series(mask, index=df.index).fillna(True).astype(bool) & ~bad[col]
+        bad[col] |= mask
+        reasons.setdefault(col, []).append((mask.to_numpy(), reason))
+
+    for col in ("name", "category", "city"):
+        check(col, df[col].fillna("") == "", "required")
+    check("type", ~df["type"].isin(TYPES), f"must be one of {', '.join(TYPES)}")
+    check("contact_email", ~df["contact_email"].fillna("").str.match(_EMAIL_RE), "invalid e-mail")
+    nums = {}
+    for col, lo, hi, whole in (("price", 0, None, True), ("capacity", 0, None, True), ("rating", 0, 5, False)):
+        v = pd.to_numeric(df[col], errors="coerce").astype("float64")
+        check(col, v.isna(), "not a number")
+        check(col, (v < lo) | (v > hi if hi is not None else False), f"out of range ({lo}–{hi})" if hi else f"must be >= {lo}")
+        if whole:
+            check(col, v != v.round(), "must be a whole number")
+        nums[col] = v
+
+    ok_price = ~bad["price"]
+    derived = pd.Series(pd.NA, index=df.index, dtype="string")
+    derived[ok_price] = price_range_for(nums["price"][ok_price].to_numpy())
+    given = df["price_range"].fillna("")
+    check("price_range", (given != "") & ~given.isin(PRICE_RANGES), f"must be one of {' '.join(PRICE_RANGES)}")
+    check("price_range", ok_price & (given != "") & given.isin(PRICE_RANGES) & (given != derived),
+          "inconsistent with price")
+
+    errors = []
+    lines = np.arange(first_line, first_line + len(df))
+    for col, checks in reasons.items():
+        for mask, reason in checks:
+            for i in np.flatnonzero(mask):
+                errors.append({"line": int(lines[i]), "column": col, "value": df[col].iloc[i], "error": reason})
+    errors.sort(key=lambda e: e["line"])
+
+    keep = ~bad.any(axis=1).to_numpy()
+    out = df[keep].copy()
+    out["price_range"] = out["price_range"].mask(out["price_range"] == "", derived[keep])
+    out["price"] = nums["price"][keep].astype(np.int64)
+    out["capacity"] = nums["capacity"][keep].astype(np.int64)
+    out["rating"] = nums["rating"][keep].round(1)
+    return out.reset_index(drop=True), errors
+
+
+def _changed(current: pd.DataFrame, rows: pd.DataFrame) -> np.ndarray:
+    """Máscara das linhas de `rows` que diferem das linhas equivalentes em `current`."""
+    diff = np.zeros(len(rows), dtype=bool)
+    for c in rows.columns:
+        if c not in current.columns:
+            continue
+        a, b = current[c], rows[c]
+        if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+            diff |= ~np.isclose(a.to_numpy(np.float64), b.to_numpy(np.float64), atol=1e-6, equal_nan=True)
+        else:
+            diff |= a.astype("string").fillna("").to_numpy() != b.astype("string").fillna("").to_numpy()
+    return diff
+
+
+class _Spill:
+    """Linhas válidas da 1ª passada numa tabela SQLite temporária (arquivo privado,
+    apagado no close); a chave única guarda só a última ocorrência de cada linha."""
+    INT_COLUMNS = ("capacity", "price")
+
+    def __init__(self):
+        self.conn = sqlite3.connect("", isolation_level=None)     # "" = banco temporário em disco
+        cols = ", ".join(f"{c} {'INTEGER' if c in self.INT_COLUMNS else 'REAL' if c == 'rating' else 'TEXT'}"
+                         for c in REQUIRED_COLUMNS)
+        self.conn.execute(f"CREATE TABLE rows (seq INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, {cols})")
+        self.seq = 0
+
+    def put(self, rows: pd.DataFrame):
+        values = [rows[c].tolist() for c in REQUIRED_COLUMNS]
+        seqs = range(self.seq, self.seq + len(rows))
+        self.seq += len(rows)
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO rows VALUES ({', '.join('?' * (len(REQUIRED_COLUMNS) + 2))})",
+                zip(seqs, _key(rows).tolist(), *values))
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+    def chunks(self, chunk_rows: int):
+        """(chaves, linhas) em blocos, na ordem da última ocorrência no arquivo."""
+        cur = self.conn.execute(f"SELECT key, {', '.join(REQUIRED_COLUMNS)} FROM rows ORDER BY seq")
+        while batch := cur.fetchmany(chunk_rows):
+            df = pd.DataFrame(batch, columns=["key", *REQUIRED_COLUMNS])
+            for c in REQUIRED_COLUMNS:
+                df[c] = df[c].astype(np.int64 if c in self.INT_COLUMNS else np.float64 if c == "rating" else "string")
+            yield df.pop("key").astype("string"), df
+
+    def close(self):
+        self.conn.close()
+
+
+def ingest(source, csv_path, chunk_rows: int = CHUNK_ROWS, dry_run: bool = False,
+           max_errors: int = MAX_ERRORS, progress=None) -> ImportReport:
+    """Importa um catálogo CSV (caminho ou arquivo aberto) para o marketplace em `csv_path`.
+    `progress(report)` é chamado após cada bloco lido. Com `dry_run` só valida e conta."""
+    report = ImportReport()
+    t0 = time.perf_counter()
+    with _LOCK:
+        ds = get_marketplace(csv_path)
+        n0 = len(ds.df)
+        spill = _Spill()
+        try:
+            line, valid = 2, 0
+            for chunk in pd.read_csv(source, chunksize=chunk_rows, dtype=str, keep_default_na=False,
+                                     skipinitialspace=True):
+                report.chunks += 1
+                report.rows += len(chunk)
+                rows, errors = validate(chunk, first_line=line)
+                line += len(chunk)
+                report.rejected += len(chunk) - len(rows)
+                room = max_errors - len(report.errors)
+                if room > 0:
+                    report.errors.extend(errors[:room])
+                spill.put(rows)
+                valid += len(rows)
+                if progress:
+                    progress(report)
+            report.duplicates = valid - len(spill)
+
+            # chave -> row id (última ocorrência, se o catálogo já tiver repetidas)
+            keys = pd.Series(np.arange(n0, dtype=np.int64), index=_key(ds.df) if n0 else pd.Index([], dtype="string"))
+            keys = keys[~keys.index.duplicated(keep="last")]
+            work = None if dry_run else CatalogUpsert(ds)
+            next_id = n0
+            for k, rows in spill.chunks(chunk_rows):
+                ids = keys.reindex(k).to_numpy(dtype=np.float64)
+                new = np.isnan(ids)
+                old_ids = ids[~new].astype(np.int64)
+                updates = rows[~new].reset_index(drop=True)
+                changed = _changed(ds.df.iloc[old_ids].reset_index(drop=True), updates)
+                report.unchanged += int((~changed).sum())
+                report.updated += int(changed.sum())
+                report.inserted += int(new.sum())
+                new_ids = np.arange(next_id, next_id + int(new.sum()), dtype=np.int64)
+                next_id += new_ids.size
+                if work is not None and (changed.any() or new_ids.size):
+                    work.apply(pd.concat([updates[changed], rows[new]], ignore_index=True),
+                               np.concatenate([old_ids[changed], new_ids]))
+        finally:
+            spill.close()
+
+        if work is not None and (report.inserted or report.updated):
+            save_marketplace(csv_path, work.finish())
+    report.catalog_rows = next_id
+    report.seconds = time.perf_counter() - t0
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Bulk import of vendor/venue catalogs into the marketplace")
+    ap.add_argument("source", help="catalog CSV with columns: " + ", ".join(REQUIRED_COLUMNS))
+    ap.add_argument("--into", default=str(Path(__file__).resolve().parent.parent / "data" / "marketplace_clean_numeric.csv"),
+                    help="marketplace CSV to upsert into")
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    ap.add_argument("--dry-run", action="store_true", help="validate and count only; nothing is written")
+    ap.add_argument("--errors", type=int, default=20, help="rejected rows to print")
+    args = ap.parse_args()
+    rep = ingest(args.source, args.into, chunk_rows=args.chunk_rows, dry_run=args.dry_run,
+                 progress=lambda r: print(f"  chunk {r.chunks}: {r.rows:,} rows read", flush=True))
+    for k, v in rep.summary().items():
+        print(f"{k:>13}: {v:,.2f}" if isinstance(v, float) else f"{k:>13}: {v:,}")
+    if rep.errors:
+        print(rep.error_frame().head(args.errors).to_string(index=False))
@@ -0,0 +1,97 @@
+# =====================
+#  LEDGER ENGINE
+# =====================
+# Transações de um usuário (ou de todos, para o admin) num frame tipado:
+# datetime64 para `date`, categorias para status/counterparty/service e um
+# "haystack" minúsculo pré-montado para a busca textual. O frame fica ordenado
+# por data, então o filtro de período é um recorte por busca binária e os demais
+# filtros só varrem as linhas dentro do intervalo.
+# Um cache por processo só recarrega o ledger quando a versão muda
+# (triggers em `transactions` incrementam `tx_versions`).
+import threading
+
+import numpy as np
+import pandas as pd
+
+from vip import db
+
+CATEGORY_COLUMNS = ("counterparty", "service", "status")
+SEARCH_COLUMNS = ("counterparty", "service", "ref")
+
+
+class Ledger:
+    def __init__(self, df: pd.DataFrame):
+        df = df.copy()
+        df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d", errors="coerce")
+        for c in CATEGORY_COLUMNS:
+            df[c] = df[c].astype("category")
+        df["amount"] = pd.to_numeric(df["amount"], errors="coerce").fillna(0).astype("int64")
+        df["ref"] = df["ref"].astype("string")
+        self.df = df.sort_values("date", kind="stable").reset_index(drop=True)
+        self._dates = self.df["date"].to_numpy()
+        self._amounts = self.df["amount"].to_numpy()
+        self._dated = int((~np.isnat(self._dates)).sum())     # datas inválidas (NaT) ficam no fim
+        sep = "\x00"
+        hay = self.df[SEARCH_COLUMNS[0]].astype("string").fillna("")
+        for c in SEARCH_COLUMNS[1:]:
+            hay = hay + sep + self.df[c].astype("string").fillna("")
+        self._haystack = hay.str.lower()
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def statuses(self) -> list:
+        return self.df["status"].cat.categories.tolist()
+
+    @property
+    def amount_bounds(self) -> tuple:
+        return (int(self._amounts.min()), int(self._amounts.max())) if len(self) else (0, 0)
+
+    @property
+    def date_bounds(self) -> tuple:
+        valid = self._dates[~np.isnat(self._dates)]
+        if not valid.size:
+            return (None, None)
+        return (pd.Timestamp(valid[0]).date(), pd.Timestamp(valid[-1]).date())
+
+    def filter(self, status=None, amount=None, q: str = "", date_from=None, date_to=None) -> pd.DataFrame:
+        lo, hi = 0, len(self.df)
+        if date_from is not None or date_to is not None:
+            hi = self._dated
+        if date_from is not None:
+            lo = int(np.searchsorted(self._dates, np.datetime64(pd.Timestamp(date_from)), side="left"))
+        if date_to is not None:
+            end = pd.Timestamp(date_to) + pd.Timedelta(days=1)
+            hi = int(np.searchsorted(self._dates, np.datetime64(end), side="left"))
+        if lo >= hi:
+            return self.df.iloc[0:0]
+        mask = np.ones(hi - lo, dtype=bool)
+        if status and status != "All":
+            mask &= (self.df["status"].iloc[lo:hi] == status).to_numpy()
+        if amount is not None:
+            a = self._amounts[lo:hi]
+            mask &= (a >= amount[0]) & (a <= amount[1])
+        if q:
+            mask &= self._haystack.iloc[lo:hi].str.contains(q.lower(), regex=False).to_numpy(dtype=bool, na_value=False)
+        return self.df.iloc[lo:hi][mask]
+
+
+_CACHE: dict = {}   # (db path, username) -> (versão, Ledger)
+_LOCK = threading.Lock()
+
+
+def get_ledger(username: str | None = None) -> Ledger:
+    """Ledger do usuário (None = todos), recarregado só quando houve escrita."""
+    key = (str(db.current_path()), username)
+    version = db.transactions_version(username)
+    hit = _CACHE.get(key)
+    if hit and hit[0] == version:
+        return hit[1]
+    with _LOCK:
+        hit = _CACHE.get(key)
+        if hit and hit[0] == version:
+            return hit[1]
+        ledger = Ledger(db.list_transactions(username))
+        _CACHE[key] = (version, ledger)
+        return ledger
@@ -0,0 +1,395 @@
+# =====================
+#  MARKETPLACE DATASET
+# =====================
+# Um único dataset carregado por processo, compartilhado entre todas as sessões
+# do Streamlit. O CSV só é relido quando mtime/size mudam *e* o hash do conteúdo
+# também mudou (um `touch` no arquivo não força reparse).
+#
+# Formato compacto: `python -m vip.marketplace build` gera um .parquet ao lado do
+# CSV (categorias + numéricos reduzidos). O loader usa o .parquet quando ele é
+# mais novo que o CSV; o CSV continua sendo o fallback.
+#
+# Importações em lote (vip/ingest.py) não reconstroem o dataset: `CatalogUpsert`
+# é uma cópia de trabalho (colunas como arrays, copiadas uma vez) em que cada
+# bloco de linhas novas/alteradas é gravado no lugar, com custo proporcional ao
+# bloco; `finish` monta o dataset novo e atualiza filtros, opções e texto só nas
+# linhas tocadas. O dataset atual, em uso pelas sessões, fica intacto até
+# `save_marketplace` persistir CSV + .parquet e instalar o resultado no cache.
+# `upserted` é o atalho para um único bloco.
+import argparse
+import hashlib
+import os
+import threading
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from vip.filters import FilterIndex
+from vip.ranking import Ranker, RankWeights
+from vip.textindex import TextIndex
+
+OPTION_COLUMNS = ("type", "city", "category")
+CATEGORY_COLUMNS = ("type", "city", "category", "price_range")
+INT_COLUMNS = ("capacity", "price")
+DISPLAY_COLUMNS = ["name", "category", "city", "capacity", "price", "rating", "contact_email", "type"]
+
+
+@dataclass
+class MarketplaceDataset:
+    df: pd.DataFrame
+    options: dict                  # coluna -> lista ordenada de valores (sem "All")
+    price_bounds: tuple | None     # (min, max) inteiros, ou None se não há preço numérico
+    filters: FilterIndex
+    text: TextIndex
+    digest: str = ""
+    _last_search: tuple = field(default=("", None, None), repr=False, compare=False)
+
+    def _search(self, text: str) -> tuple:
+        # memo da última busca: o ranking reaproveita os scores da mesma consulta
+        q, hits, scores = self._last_search
+        if q != text or hits is None:
+            hits, scores = self.text.search(text)
+            self._last_search = (text, hits, scores)
+        return hits, scores
+
+    def query(self, equals: dict | None = None, price_range=None, text: str = "") -> np.ndarray:
+        """Row ids que batem com os filtros; com `text`, ordenados por relevância."""
+        ids = self.filters.query(equals, price_range)
+        if text and text.strip():
+            hits, _ = self._search(text)
+            ids = hits[np.isin(hits, ids, assume_unique=True)]
+        return ids
+
+    @cached_property
+    def _names(self) -> pd.Index:
+        return pd.Index(self.df["name"].astype("string") if "name" in self.df.columns else [])
+
+    def rows_for_names(self, names) -> np.ndarray:
+        """Row ids dos listings com esses nomes (ex.: ocupados num período)."""
+        pos = self._names.get_indexer_for(pd.Index(names, dtype="string"))
+        return np.unique(pos[pos >= 0])
+
+    @cached_property
+    def ranker(self) -> Ranker:
+        """Componentes estáticos do ranking, calculados uma vez por dataset."""
+        return Ranker(self.df)
+
+    def rank_page(self, ids: np.ndarray, page: int = 0, page_size: int = 25, budget: float | None = None,
+                  attendees: int | None = None, text: str = "", weights: RankWeights = RankWeights()) -> np.ndarray:
+        """Página do "Best match": top-K parcial com K = fim da página pedida."""
+        text_scores = None
+        if text and text.strip():
+            hits, scores = self._search(text)
+            text_scores = np.zeros(ids.size)
+            if hits.size:
+                order = np.argsort(hits)
+                at = order[np.minimum(np.searchsorted(hits, ids, sorter=order), hits.size - 1)]
+                text_scores = np.where(hits[at] == ids, scores[at], 0.0)
+        stop = (max(page, 0) + 1) * page_size
+        top, _ = self.ranker.top_k(ids, stop, budget=budget, attendees=attendees,
+                                   text_scores=text_scores, weights=weights)
+        return top[stop - page_size:stop]
+
+    def sort_page(self, ids: np.ndarray, sort_by: str | None = None, descending: bool = False,
+                  page: int = 0, page_size: int = 25) -> np.ndarray:
+        """Só os row ids da página pedida. Para as primeiras páginas usa seleção
+        parcial (np.partition) em vez de ordenar todos os resultados."""
+        start = max(page, 0) * page_size
+        stop = min(start + page_size, ids.size)
+        if start >= stop:
+            return ids[:0]
+        if not sort_by or sort_by not in self.df.columns or not pd.api.types.is_numeric_dtype(self.df[sort_by]):
+            return ids[start:stop]
+        vals = self.df[sort_by].to_numpy(dtype=np.float64)[ids]
+        if descending:
+            vals = -vals
+        if stop < ids.size // 2:
+            kth = np.partition(vals, stop - 1)[stop - 1]
+            if not np.isnan(kth):
+                cand = np.flatnonzero(vals <= kth)  # inclui todos os empates no limite
+                order = cand[np.lexsort((ids[cand], vals[cand]))]
+                return ids[order[start:stop]]
+        order = np.lexsort((ids, vals))
+        return ids[order[start:stop]]
+
+    def upserted(self, rows: pd.DataFrame, row_ids) -> "MarketplaceDataset":
+        """Novo dataset com `rows` nas posições `row_ids`; ids a partir de len(df)
+        acrescentam linhas (em sequência). Este dataset não é alterado."""
+        return CatalogUpsert(self).apply(rows, row_ids).finish()
+
+    def display_frame(self, page_ids: np.ndarray) -> pd.DataFrame:
+        """Tabela da página no formato mostrado no marketplace."""
+        cols = [c for c in DISPLAY_COLUMNS if c in self.df.columns]
+        out = self.df.iloc[page_ids][cols].reset_index(drop=True)
+        if "rating" in out.columns:
+            out["rating"] = out["rating"].astype(str) + " ⭐"
+        return out
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Dicionários categóricos para colunas repetitivas e numéricos no menor dtype."""
+    df = df.reset_index(drop=True)
+    for c in CATEGORY_COLUMNS:
+        if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype("category")
+    for c in INT_COLUMNS:
+        if c in df.columns and pd.api.types.is_integer_dtype(df[c]):
+            df[c] = pd.to_numeric(df[c], downcast="integer")
+    if "rating" in df.columns and pd.api.types.is_numeric_dtype(df["rating"]):
+        df["rating"] = df["rating"].round(1).astype("float32")
+    return df
+
+
+class CatalogUpsert:
+    """Cópia de trabalho de um dataset para gravações em blocos. `apply` custa o
+    tamanho do bloco: colunas numéricas e categóricas viram arrays graváveis (uma
+    cópia, na criação); as de texto não são copiadas, os updates delas ficam
+    guardados e são aplicados de uma vez em `finish`, que devolve o dataset novo
+    (chamado uma vez). O dataset de origem não é alterado."""
+
+    TEXT_FIELDS = ("name", "category")
+
+    def __init__(self, ds: MarketplaceDataset):
+        self.base = ds
+        self.n = len(ds.df)
+        self.added = 0                  # linhas novas já gravadas (ids n, n + 1, ...)
+        self.arrays = {}                # coluna numérica/categórica -> array das linhas existentes (códigos)
+        self.cats = {}                  # coluna categórica -> {categoria: código}; novas vão para o fim
+        self.updates = {}               # coluna de texto -> blocos (ids, valores) para `finish`
+        self.new = {}                   # coluna -> blocos de valores das linhas novas
+        for c in ds.df.columns:
+            col = ds.df[c]
+            self.new[c] = []
+            if isinstance(col.dtype, pd.CategoricalDtype):
+                self.cats[c] = {v: i for i, v in enumerate(col.cat.categories)}
+                self.arrays[c] = col.cat.codes.to_numpy().astype(np.int32)
+            elif pd.api.types.is_numeric_dtype(col):
+                self.arrays[c] = col.to_numpy(dtype=np.float64 if pd.api.types.is_float_dtype(col) else np.int64)
+            else:
+                self.updates[c] = []
+        self.touched = []
+        self.text = None                # cópia do índice de texto, feita no 1º update de nome/categoria
+
+    def _codes(self, c: str, vals) -> np.ndarray:
+        lookup = self.cats[c]
+        return np.array([-1 if pd.isna(v) else lookup.setdefault(v, len(lookup)) for v in vals], dtype=np.int32)
+
+    def _current_text(self, c: str, ids: np.ndarray) -> np.ndarray:
+        if c in self.cats:
+            cats = np.array(list(self.cats[c]) + [""], dtype=object)
+            return cats[self.arrays[c][ids]]        # -1 cai no "" do fim
+        return self.base.df[c].iloc[ids].astype("string").fillna("").to_numpy()
+
+    def apply(self, rows: pd.DataFrame, row_ids) -> "CatalogUpsert":
+        """Grava `rows` em `row_ids`; ids >= len(df) são linhas novas, em sequência
+        a partir da próxima livre. Colunas ausentes em `rows` ficam como estão
+        (vazias nas linhas novas)."""
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        order = np.argsort(row_ids, kind="stable")
+        row_ids, rows = row_ids[order], rows.iloc[order].reset_index(drop=True)
+        new = row_ids >= self.n
+        if not np.array_equal(row_ids[new], np.arange(self.n + self.added, self.n + self.added + new.sum())):
+            raise ValueError("new rows must continue the catalog without gaps")
+        upd = row_ids[~new]
+        fields = [c for c in self.TEXT_FIELDS if c in self.new and c in rows.columns]
+        before = [self._current_text(c, upd) for c in fields] if upd.size else []
+
+        for c in self.new:
+            present = c in rows.columns
+            if c in self.cats:
+                vals = self._codes(c, rows[c]) if present else np.full(len(rows), -1, dtype=np.int32)
+            elif c in self.arrays:
+                vals = rows[c].to_numpy() if present else np.full(len(rows), np.nan)
+            else:
+                vals = rows[c].to_numpy(dtype=object) if present else np.full(len(rows), None, dtype=object)
+            if present and upd.size:
+                if c in self.updates:
+                    self.updates[c].append((upd, vals[~new]))
+                else:
+                    arr = self.arrays[c]
+                    dtype = np.result_type(arr.dtype, vals.dtype)
+                    if dtype != arr.dtype:
+                        arr = self.arrays[c] = arr.astype(dtype)
+                    arr[upd] = vals[~new]
+            if new.any():
+                self.new[c].append(vals[new])
+        self.added += int(new.sum())
+        self.touched.append(row_ids)
+
+        if upd.size and fields:
+            after = [rows[c].astype("string").fillna("").to_numpy()[~new] for c in fields]
+            changed = np.logical_or.reduce([b != a for b, a in zip(before, after)])
+            if changed.any() and self.text is None:
+                self.text = self.base.text.copy()
+            for i in np.flatnonzero(changed):
+                self.text.update(int(upd[i]), *(a[i] for a in after))
+        return self
+
+    def finish(self) -> MarketplaceDataset:
+        """Dataset novo com tudo o que foi gravado (o de origem, se nada foi)."""
+        if not self.touched:
+            return self.base
+        out = {}
+        for c, old in self.base.df.items():
+            blocks = self.new.pop(c)
+            if c in self.arrays:            # libera a cópia de trabalho coluna a coluna
+                arr = self.arrays.pop(c)
+                arr = np.concatenate([arr, *blocks]) if blocks else arr
+                out[c] = (pd.Categorical.from_codes(arr, categories=pd.Index(list(self.cats[c]),
+                                                                             dtype=old.cat.categories.dtype))
+                          if c in self.cats else arr)
+                continue
+            col, ups = old, self.updates.pop(c)
+            if ups:
+                col = old.copy()
+                col.iloc[np.concatenate([i for i, _ in ups])] = np.concatenate([v for _, v in ups])
+            if blocks:
+                col = pd.concat([col, pd.Series(np.concatenate(blocks), dtype=object)], ignore_index=True)
+            out[c] = col.astype(old.dtype)
+        df = compact_frame(pd.DataFrame(out))
+        del out
+        row_ids = np.concatenate(self.touched)
+        filters = self.base.filters.updated(df, np.sort(row_ids))
+
+        text = self.text or self.base.text
+        fields = [c for c in self.TEXT_FIELDS if c in df.columns]
+        if self.added and fields:
+            text = text if self.text is not None else text.copy()
+            text.extend(self.n, *(df[c].iloc[self.n:].astype("string").fillna("").tolist() for c in fields))
+        options = {c: filters.values(c) for c in OPTION_COLUMNS if c in df.columns}
+        return MarketplaceDataset(df=df, options=options, price_bounds=_price_bounds(df),
+                                  filters=filters, text=text, digest=self.base.digest)
+
+
+def _price_bounds(df: pd.DataFrame) -> tuple | None:
+    if "price" in df.columns and pd.api.types.is_numeric_dtype(df["price"]) and df["price"].notna().any():
+        return (int(df["price"].min()), int(df["price"].max()))
+    return None
+
+
+def build_dataset(df: pd.DataFrame, digest: str = "") -> MarketplaceDataset:
+    df = compact_frame(df)
+    options = {
+        c: sorted(df[c].dropna().unique().tolist())
+        for c in OPTION_COLUMNS if c in df.columns
+    }
+    return MarketplaceDataset(df=df, options=options, price_bounds=_price_bounds(df),
+                              filters=FilterIndex(df, columns=OPTION_COLUMNS),
+                              text=_build_text_index(df), digest=digest)
+
+
+def _build_text_index(df: pd.DataFrame) -> TextIndex:
+    cols = [df[c].astype("string").fillna("") for c in ("name", "category") if c in df.columns]
+    return TextIndex(*cols) if cols else TextIndex()
+
+
+def columnar_path(csv_path) -> Path:
+    return Path(csv_path).with_suffix(".parquet")
+
+
+def build_columnar(csv_path, out_path=None) -> Path:
+    """Converte o CSV para o formato colunar (requer pyarrow)."""
+    out = Path(out_path) if out_path else columnar_path(csv_path)
+    compact_frame(pd.read_csv(csv_path)).to_parquet(out, index=False)
+    return out
+
+
+def _pick_source(p: Path) -> Path:
+    col = columnar_path(p)
+    try:
+        col_mtime = col.stat().st_mtime_ns
+    except FileNotFoundError:
+        return p
+    try:
+        return col if col_mtime >= p.stat().st_mtime_ns else p
+    except FileNotFoundError:
+        return col
+
+
+def _read_source(src: Path, csv: Path) -> pd.DataFrame:
+    if src.suffix == ".parquet":
+        try:
+            return pd.read_parquet(src)
+        except Exception:  # pyarrow ausente ou arquivo inválido -> CSV
+            pass
+    return pd.read_csv(csv)
+
+
+# csv path -> (stat signature, content digest, dataset)
+_CACHE: dict = {}
+_LOCK = threading.Lock()
+
+
+def _stat_signature(p: Path):
+    src = _pick_source(p)
+    s = src.stat()
+    return (src, s.st_mtime_ns, s.st_size)
+
+
+def _file_digest(p: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with p.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def get_marketplace(path) -> MarketplaceDataset:
+    """Dataset do processo; recarrega apenas se o arquivo realmente mudou."""
+    p = Path(path).resolve()
+    sig = _stat_signature(p)
+    hit = _CACHE.get(p)
+    if hit and hit[0] == sig:
+        return hit[2]
+    with _LOCK:
+        hit = _CACHE.get(p)
+        if hit and hit[0] == sig:
+            return hit[2]
+        digest = _file_digest(sig[0])
+        if hit and hit[1] == digest:
+            _CACHE[p] = (sig, digest, hit[2])
+            return hit[2]
+        ds = build_dataset(_read_source(sig[0], p), digest=digest)
+        _CACHE[p] = (sig, digest, ds)
+        return ds
+
+
+def save_marketplace(path, ds: MarketplaceDataset) -> MarketplaceDataset:
+    """Grava o dataset no CSV (e no .parquet, se possível) e o instala no cache do
+    processo com a nova assinatura/digest, sem reler o arquivo."""
+    p = Path(path).resolve()
+    tmp = p.with_name(p.name + ".tmp")
+    ds.df.to_csv(tmp, index=False, chunksize=50_000)
+    os.replace(tmp, p)
+    col = columnar_path(p)
+    col_tmp = col.with_name(col.name + ".tmp")
+    try:
+        ds.df.to_parquet(col_tmp, index=False)
+        os.replace(col_tmp, col)        # escrito depois do CSV: mais novo, vira a fonte
+    except Exception:  # pyarrow ausente -> fica só o CSV (mais novo que um .parquet antigo)
+        col_tmp.unlink(missing_ok=True)
+    with _LOCK:
+        sig = _stat_signature(p)
+        ds.digest = _file_digest(sig[0])
+        _CACHE[p] = (sig, ds.digest, ds)
+    return ds
+
+
+def clear_cache():
+    with _LOCK:
+        _CACHE.clear()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Marketplace data tools")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="convert the marketplace CSV to the columnar (.parquet) format")
+    b.add_argument("csv", nargs="?", default=str(Path(__file__).resolve().parent.parent / "data" / "marketplace_clean_numeric.csv"))
+    b.add_argument("--out", default=None)
+    args = ap.parse_args()
+    if args.cmd == "build":
+        out = build_columnar(args.csv, args.out)
+        print(f"wrote {out} ({out.stat().st_size:,} bytes)")
@@ -0,0 +1,169 @@
+# =====================
+#  PERFORMANCE
+# =====================
+# Instrumentação leve do app: cada rerun do Streamlit executa o VIPv3.py inteiro,
+# então medimos por rerun (por rota), por seção renderizada e por carga de dados
+# (get_marketplace, get_ledger, ... incluindo acertos de cache), além de contar
+# reruns e estimar o tamanho do session_state (amostrado: a estimativa serializa
+# os valores, então só roda no 1º rerun da sessão e a cada STATE_EVERY).
+# As amostras ficam em janelas circulares por métrica (últimas SAMPLE_WINDOW),
+# compartilhadas entre sessões do processo; `summary()` agrega em p50/p95.
+# Um rerun pode ser capturado com cProfile (`request_profile`): o profiler liga
+# no começo do próximo rerun da sessão e desliga no fim (ou, se o rerun foi
+# interrompido por st.rerun(), no começo do seguinte). Reruns parciais de seções
+# (st.fragment) contam como "fragment:<seção>".
+# VIP_PERF=0 desliga a coleta.
+import cProfile
+import io
+import os
+import pickle
+import pstats
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+ENABLED = os.environ.get("VIP_PERF", "1") != "0"
+SAMPLE_WINDOW = 500
+PROFILE_LINES = 40
+STATE_EVERY = 25        # reruns entre duas medidas do session_state
+
+_samples: dict = {}     # (tipo, nome) -> deque de valores
+_counts: dict = {}      # (tipo, nome) -> total de amostras desde o reset
+_reruns: dict = {}      # rota -> reruns desde o reset
+_LOCK = threading.Lock()
+
+
+def record(kind: str, name: str, value: float):
+    if not ENABLED:
+        return
+    key = (kind, name)
+    with _LOCK:
+        buf = _samples.get(key)
+        if buf is None:
+            buf = _samples[key] = deque(maxlen=SAMPLE_WINDOW)
+        buf.append(value)
+        _counts[key] = _counts.get(key, 0) + 1
+
+
+@contextmanager
+def timer(kind: str, name: str):
+    """Grava o tempo do bloco em ms, inclusive quando ele sai por exceção (st.rerun)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(kind, name, (time.perf_counter() - t0) * 1000)
+
+
+def timed(kind: str, name: str):
+    def wrap(fn):
+        @wraps(fn)
+        def inner(*args, **kwargs):
+            with timer(kind, name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def reset():
+    with _LOCK:
+        _samples.clear()
+        _counts.clear()
+        _reruns.clear()
+
+
+def rerun_counts() -> dict:
+    with _LOCK:
+        return dict(_reruns)
+
+
+def summary() -> pd.DataFrame:
+    """Uma linha por métrica: amostras, p50/p95/max/último (ms, ou KB em `state`)."""
+    with _LOCK:
+        snap = {k: (np.fromiter(v, dtype=np.float64), _counts[k]) for k, v in _samples.items()}
+    rows = [{"kind": kind, "name": name, "count": n,
+             "p50": float(np.percentile(vals, 50)), "p95": float(np.percentile(vals, 95)),
+             "max": float(vals.max()), "last": float(vals[-1])}
+            for (kind, name), (vals, n) in snap.items() if vals.size]
+    cols = ["kind", "name", "count", "p50", "p95", "max", "last"]
+    return pd.DataFrame(rows, columns=cols).sort_values(["kind", "p95"], ascending=[True, False], ignore_index=True)
+
+
+# ---------- tamanho do session_state ----------
+def _size_of(value) -> int:
+    if hasattr(value, "session_bytes"):     # overlays sobre dados compartilhados
+        return value.session_bytes()
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:               # widgets/objetos não serializáveis
+        return sys.getsizeof(value)
+
+
+def state_sizes(state) -> pd.Series:
+    """Bytes aproximados por chave do session_state, do maior para o menor."""
+    sizes = {str(k): _size_of(state[k]) for k in list(state.keys())}
+    return pd.Series(sizes, dtype="int64").sort_values(ascending=False)
+
+
+# ---------- ciclo do rerun ----------
+def _stop_profile(state):
+    prof = state.pop("_perf_profiler", None)
+    if prof is None:
+        return
+    prof.disable()
+    out = io.StringIO()
+    pstats.Stats(prof, stream=out).sort_stats(state.get("_perf_profile_sort", "cumulative")).print_stats(PROFILE_LINES)
+    state["_perf_last_profile"] = (state.pop("_perf_profile_label", ""), out.getvalue())
+
+
+def request_profile(state, sort: str = "cumulative"):
+    """Pede um cProfile do próximo rerun desta sessão."""
+    state["_perf_profile_next"] = True
+    state["_perf_profile_sort"] = sort
+
+
+def begin_run(state, route: str):
+    """Chamado no topo do script: conta o rerun e liga o profiler se pedido."""
+    _stop_profile(state)            # rerun anterior interrompido por st.rerun()
+    state["_perf_reruns"] = state.get("_perf_reruns", 0) + 1
+    if ENABLED:
+        with _LOCK:
+            _reruns[route] = _reruns.get(route, 0) + 1
+    state["_perf_t0"] = time.perf_counter()
+    state["_perf_full_run"] = True
+    if state.pop("_perf_profile_next", False):
+        prof = cProfile.Profile()
+        state["_perf_profiler"] = prof
+        state["_perf_profile_label"] = f"{route} / {state.get('main_section', '')}"
+        prof.enable()
+
+
+def count_fragment(state, name: str):
+    """Conta o rerun parcial quando uma seção (st.fragment) roda fora de uma execução completa."""
+    if state.get("_perf_full_run", True) or not ENABLED:
+        return
+    state["_perf_reruns"] = state.get("_perf_reruns", 0) + 1
+    with _LOCK:
+        _reruns[f"fragment:{name}"] = _reruns.get(f"fragment:{name}", 0) + 1
+
+
+def end_run(state, route: str):
+    """Chamado no fim do script (reruns completos): tempo total e, por amostragem,
+    tamanho do estado."""
+    _stop_profile(state)
+    state["_perf_full_run"] = False
+    t0 = state.pop("_perf_t0", None)
+    if t0 is not None:
+        record("route", route, (time.perf_counter() - t0) * 1000)
+    if ENABLED and state.get("_perf_reruns", 1) % STATE_EVERY == 1:
+        record("state", "session_kb", state_sizes(state).sum() / 1024)
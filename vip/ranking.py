@@ -0,0 +1,85 @@
+# =====================
+#  RANKING ("Best match")
+# =====================
+# Score por listing = média ponderada de componentes em [0, 1]:
+#   rating      nota / 5
+#   price       com orçamento: 1 até o orçamento, caindo conforme passa dele;
+#               sem orçamento: percentil invertido do preço (mais barato = melhor)
+#   capacity    com público esperado: penaliza falta de lugares (quadrático) e
+#               sobra (raiz); listings sem capacidade ficam neutros (0.5)
+#   text        score da busca textual normalizado (só quando há busca)
+# Componentes sem entrada do usuário saem da média (os pesos são renormalizados).
+# As partes estáticas (nota, percentil de preço, capacidade) são calculadas uma
+# vez por dataset; por consulta só o que depende de orçamento/público/texto.
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+TEXT_SCORE_MAX = 2.5   # TextIndex.search: exato 2.0 + 0.5 de prefixo
+
+
+@dataclass(frozen=True)
+class RankWeights:
+    rating: float = 0.4
+    price: float = 0.25
+    capacity: float = 0.2
+    text: float = 0.15
+
+
+def _column(df: pd.DataFrame, name: str) -> np.ndarray:
+    if name in df.columns and pd.api.types.is_numeric_dtype(df[name]):
+        return df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.full(len(df), np.nan)
+
+
+class Ranker:
+    def __init__(self, df: pd.DataFrame):
+        rating = _column(df, "rating")
+        self.rating = np.clip(np.nan_to_num(rating, nan=0.0) / 5.0, 0.0, 1.0)
+        self.price = _column(df, "price")
+        self.capacity = np.nan_to_num(_column(df, "capacity"), nan=0.0)
+        # percentil invertido do preço; sem preço = neutro
+        cheap = np.full(len(df), 0.5)
+        valid = ~np.isnan(self.price)
+        if valid.sum() > 1:
+            ranks = pd.Series(self.price[valid]).rank(method="average").to_numpy()
+            cheap[valid] = 1.0 - (ranks - 1) / (valid.sum() - 1)
+        self.cheapness = cheap
+
+    def scores(self, ids: np.ndarray, budget: float | None = None, attendees: int | None = None,
+               text_scores: np.ndarray | None = None, weights: RankWeights = RankWeights()) -> np.ndarray:
+        parts = [(weights.rating, self.rating[ids])]
+        if budget is not None and budget > 0:
+            p = self.price[ids]
+            fit = 1.0 / (1.0 + 4.0 * np.maximum(p - budget, 0.0) / budget)
+            parts.append((weights.price, np.where(np.isnan(p), 0.5, fit)))
+        else:
+            parts.append((weights.price, self.cheapness[ids]))
+        if attendees is not None and attendees > 0:
+            cap = self.capacity[ids]
+            ratio = cap / attendees
+            with np.errstate(divide="ignore"):
+                fit = np.where(ratio < 1.0, ratio ** 2, 1.0 / np.sqrt(ratio))
+            parts.append((weights.capacity, np.where(cap > 0, fit, 0.5)))
+        if text_scores is not None:
+            parts.append((weights.text, np.clip(text_scores / TEXT_SCORE_MAX, 0.0, 1.0)))
+        total_w = sum(w for w, _ in parts) or 1.0
+        out = np.zeros(ids.size)
+        for w, part in parts:
+            out += (w / total_w) * part
+        return out
+
+    def top_k(self, ids: np.ndarray, k: int, **kwargs) -> tuple:
+        """(ids, scores) dos K melhores, em ordem. Seleção parcial (np.argpartition)
+        em vez de ordenar tudo; empates no limite entram todos, desempate por id."""
+        if k <= 0 or not ids.size:
+            return ids[:0], np.zeros(0)
+        s = self.scores(ids, **kwargs)
+        if k < ids.size:
+            kth = s[np.argpartition(-s, k - 1)[k - 1]]
+            cand = np.flatnonzero(s >= kth)
+        else:
+            cand = np.arange(ids.size)
+        order = cand[np.lexsort((ids[cand], -s[cand]))][:k]
+        return ids[order], s[order]
@@ -0,0 +1,229 @@
+# =====================
+#  RFP HISTORY
+# =====================
+# Histórico de RFPs em colunas tipadas (timestamps, orçamento numérico) com
+# índices por solicitante, por alvo (listing) e por data. O store do SQLite só
+# recebe inserções com ids monotônicos, então o cache por processo estende o
+# snapshot com as linhas novas (id > último id) em vez de reler tudo; remoções
+# (total diferente do esperado) forçam a recarga completa.
+# Colunas e postings ficam em arrays numpy que dobram de capacidade; `extended`
+# anexa as linhas novas depois do fim e devolve outro snapshot com o novo
+# comprimento. Cada snapshot só lê o prefixo `[:n]` dele, então leitores em
+# outras sessões nunca veem linhas nem índices pela metade.
+import threading
+
+import numpy as np
+import pandas as pd
+
+from vip import db
+
+TEXT_COLUMNS = ("username", "title", "scope", "target_name", "target_type", "target_city", "target_contact")
+EXPORT_FORMATS = {"submitted_at": db.TS_FMT, "target_date": "%Y-%m-%d"}
+
+
+def _typed(raw: pd.DataFrame) -> pd.DataFrame:
+    df = raw.copy()
+    df["id"] = pd.to_numeric(df["id"]).astype("int64")
+    df["submitted_at"] = pd.to_datetime(df["submitted_at"], format="ISO8601", errors="coerce")
+    df["target_date"] = pd.to_datetime(df["target_date"], format="ISO8601", errors="coerce")
+    # o texto original do orçamento fica em `budget`; `budget_usd` é o valor numérico
+    digits = df["budget"].astype("string").str.replace(r"[^0-9.\-]", "", regex=True)
+    df["budget_usd"] = pd.to_numeric(digits.replace("", pd.NA), errors="coerce").astype("Float64")
+    df["price"] = pd.to_numeric(df["price"].replace("", pd.NA), errors="coerce").astype("Float64")
+    for c in TEXT_COLUMNS:
+        df[c] = df[c].fillna("").astype("string")
+    return df.reset_index(drop=True)
+
+
+def _positions(df: pd.DataFrame, column: str, base: int) -> dict:
+    return {k: v.astype(np.int64) + base for k, v in df.groupby(column, sort=False).indices.items()}
+
+
+def _storable(col: pd.Series) -> np.ndarray:
+    if pd.api.types.is_float_dtype(col.dtype):
+        return col.to_numpy(dtype=np.float64, na_value=np.nan)     # Float64: NA vira NaN
+    if pd.api.types.is_numeric_dtype(col.dtype) or pd.api.types.is_datetime64_dtype(col.dtype):
+        return col.to_numpy()
+    return col.to_numpy(dtype=object)
+
+
+class _Buffer:
+    """Array que cresce dobrando a capacidade. Quem já leu `view()` continua com
+    as mesmas posições depois de um `append` (a realocação só copia o prefixo)."""
+
+    def __init__(self, values):
+        values = np.asarray(values)
+        self.data = np.empty(max(16, len(values)), dtype=values.dtype)
+        self.data[:len(values)] = values
+        self.size = len(values)
+
+    def view(self) -> np.ndarray:
+        n = self.size                       # lê o tamanho antes: `data` só cresce
+        return self.data[:n]
+
+    def append(self, values) -> None:
+        values = np.asarray(values)
+        end = self.size + len(values)
+        dtype = np.result_type(self.data.dtype, values.dtype)
+        if end > len(self.data) or dtype != self.data.dtype:
+            data = np.empty(max(end, 2 * len(self.data)), dtype=dtype)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+        self.data[self.size:end] = values
+        self.size = end
+
+
+class _Store:
+    """Colunas e postings compartilhados pelos snapshots de uma mesma linhagem."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.dtypes = df.dtypes.to_dict()
+        self.columns = {c: _Buffer(_storable(df[c])) for c in df.columns}
+        self.by_user, self.by_target = {}, {}
+        self._index(df, 0)
+        self.size = len(df)
+        self.lock = threading.Lock()
+
+    def append(self, chunk: pd.DataFrame) -> None:
+        base = self.size
+        for c, buf in self.columns.items():
+            buf.append(_storable(chunk[c]))
+        self._index(chunk, base)
+        self.size = base + len(chunk)
+
+    def _index(self, df: pd.DataFrame, base: int) -> None:
+        for index, column in ((self.by_user, "username"), (self.by_target, "target_name")):
+            for k, pos in _positions(df, column, base).items():
+                if k in index:
+                    index[k].append(pos)
+                else:
+                    index[k] = _Buffer(pos)
+
+    def postings(self, index: dict, key, n: int) -> np.ndarray:
+        """Posições de `key` entre as n primeiras linhas (postings são crescentes)."""
+        buf = index.get(key)
+        if buf is None:
+            return np.empty(0, dtype=np.int64)
+        pos = buf.view()
+        return pos[:np.searchsorted(pos, n)]
+
+    def rows(self, pos: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame({c: pd.Series(buf.data[pos], index=pos).astype(self.dtypes[c])
+                             for c, buf in self.columns.items()}, index=pos)
+
+
+class RfpHistory:
+    def __init__(self, store: _Store, n: int, date_order: _Buffer, sorted_dates: _Buffer):
+        self._store = store
+        self._n = n
+        self._order_buffers = (date_order, sorted_dates)
+        self._date_order = date_order.view()[:n]        # posições ordenadas por (submitted_at, id)
+        self._sorted_dates = sorted_dates.view()[:n]
+        self.last_id = int(store.columns["id"].data[n - 1]) if n else 0
+
+    @classmethod
+    def build(cls, raw: pd.DataFrame) -> "RfpHistory":
+        return cls._from_typed(_typed(raw))
+
+    @classmethod
+    def _from_typed(cls, df: pd.DataFrame) -> "RfpHistory":
+        dates = df["submitted_at"].to_numpy()
+        order = np.argsort(dates, kind="stable")
+        return cls(_Store(df), len(df), _Buffer(order), _Buffer(dates[order]))
+
+    def extended(self, raw: pd.DataFrame) -> "RfpHistory":
+        """Novo snapshot com as linhas de `raw` (ids maiores que `last_id`) anexadas."""
+        if raw.empty:
+            return self
+        if not self._n:
+            return RfpHistory.build(raw)
+        chunk = _typed(raw)
+        store, base = self._store, self._n
+        with store.lock:
+            if store.size != base:
+                # outro snapshot já anexou a partir deste: começa uma linhagem nova
+                return RfpHistory._from_typed(pd.concat([self.df, chunk], ignore_index=True))
+            store.append(chunk)
+            order, dates = self._order_buffers
+            new = chunk["submitted_at"].to_numpy()
+            new_min = chunk["submitted_at"].min()
+            if pd.notna(new_min) and new_min >= self._sorted_dates[-1]:
+                # caso comum: submissões novas são as mais recentes, só anexa à ordem
+                tail = np.argsort(new, kind="stable")
+                order.append(tail + base)
+                dates.append(new[tail])
+            else:
+                every = store.columns["submitted_at"].view()[:base + len(chunk)]
+                full = np.argsort(every, kind="stable")
+                order, dates = _Buffer(full), _Buffer(every[full])
+        return RfpHistory(store, base + len(chunk), order, dates)
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """Todas as linhas do snapshot (materializa uma cópia; prefira os métodos abaixo)."""
+        return self._store.rows(np.arange(self._n)).set_axis(pd.RangeIndex(self._n))
+
+    def _newest_first(self, pos) -> pd.DataFrame:
+        rows = self._store.rows(np.asarray(pos, dtype=np.int64))
+        return rows.sort_values(["submitted_at", "id"], ascending=False, na_position="last")
+
+    def for_user(self, username: str) -> pd.DataFrame:
+        return self._newest_first(self._store.postings(self._store.by_user, username, self._n))
+
+    def for_target(self, target_name: str) -> pd.DataFrame:
+        return self._newest_first(self._store.postings(self._store.by_target, target_name, self._n))
+
+    def between(self, date_from=None, date_to=None) -> pd.DataFrame:
+        """Submissões no intervalo [date_from, date_to] (dias inclusivos), mais antigas primeiro."""
+        lo, hi = 0, len(self._sorted_dates)
+        if date_from is not None:
+            lo = int(np.searchsorted(self._sorted_dates, np.datetime64(pd.Timestamp(date_from)), side="left"))
+        if date_to is not None:
+            end = pd.Timestamp(date_to) + pd.Timedelta(days=1)
+            hi = int(np.searchsorted(self._sorted_dates, np.datetime64(end), side="left"))
+        return self._store.rows(self._date_order[lo:max(lo, hi)])
+
+    def latest(self, n: int = 30) -> pd.DataFrame:
+        return self._store.rows(self._date_order[::-1][:n])
+
+    def export_frame(self, rows: pd.DataFrame | None = None, columns=None) -> pd.DataFrame:
+        """Colunas do store com os timestamps de volta ao formato texto original."""
+        rows = self.df if rows is None else rows
+        out = rows[list(columns or db.RFP_COLUMNS)].copy()
+        for c, fmt in EXPORT_FORMATS.items():
+            if c in out:
+                out[c] = out[c].dt.strftime(fmt).fillna("")
+        for c in ("price", "budget_usd"):
+            if c in out:
+                v = out[c]
+                whole = bool((v.dropna() % 1 == 0).all())
+                out[c] = (v.round().astype("Int64") if whole else v).astype("string").fillna("")
+        return out
+
+
+_CACHE: dict = {}   # db path -> RfpHistory
+_LOCK = threading.Lock()
+
+
+def get_rfp_history() -> RfpHistory:
+    """Snapshot atual; só lê do banco as RFPs inseridas desde o último snapshot."""
+    key = str(db.current_path())
+    last_id, total = db.rfps_watermark()
+    hit = _CACHE.get(key)
+    if hit is not None and hit.last_id == last_id and len(hit) == total:
+        return hit
+    with _LOCK:
+        hit = _CACHE.get(key)
+        if hit is not None and hit.last_id == last_id and len(hit) == total:
+            return hit
+        if hit is not None and hit.last_id <= last_id:
+            hist = hit.extended(db.rfps_since(hit.last_id))
+            if len(hist) != db.rfps_watermark()[1]:
+                hist = RfpHistory.build(db.rfps_since(0))     # houve remoção
+        else:
+            hist = RfpHistory.build(db.rfps_since(0))
+        _CACHE[key] = hist
+        return hist
@@ -0,0 +1,74 @@
+# =====================
+#   SEEDS
+# =====================
+# Dados de demonstração gravados para cada conta nova (e para o admin).
+# Os de SHARED_SEEDS ficam uma vez por processo (vip/shared.py) e cada sessão só
+# guarda as próprias mudanças.
+import pandas as pd
+
+
+def _seed_notifications():
+    return [
+        {"id": 1, "title": "Payment confirmed",     "body": "Catering - $500 received.",       "ts": "2025-09-19 16:05", "ntype": "success", "read": True},
+        {"id": 2, "title": "RFP response received", "body": "Vertex 161 sent a proposal.",     "ts": "2025-09-22 10:12", "ntype": "info",    "read": False},
+        {"id": 3, "title": "New message",           "body": "Venue Harbor replied in chat.",   "ts": "2025-09-18 09:21", "ntype": "message", "read": False},
+    ]
+def _seed_transactions():
+    return pd.DataFrame(
+        [
+            ["2025-09-10", "Harbor 412",  "Venue Booking",     300, "Completed", "TXN-001"],
+            ["2025-09-12", "Helix 238",   "AV Support",        150, "Completed", "TXN-002"],
+            ["2025-09-15", "Radiant 179", "Catering Deposit",  500, "Pending",   "TXN-003"],
+            ["2025-09-18", "Vertex 161",  "Photography",       150, "Refunded",  "TXN-004"],
+            ["2025-09-20", "Harbor 412",  "Venue Balance",     450, "Completed", "TXN-005"],
+            ["2025-09-22", "Helix 238",   "Lighting",          220, "Completed", "TXN-006"],
+        ],
+        columns=["date", "counterparty", "service", "amount", "status", "ref"],
+    )
+def _seed_mail():
+    return {
+        "Inbox": [
+            {"id": 101, "title": "Quote for AV package", "from": "Helix 238", "preview": "We can offer...", "msgs": [
+                {"by":"Helix 238","ts":"2025-09-21 10:02","text":"We can offer AV package for $150."},
+                {"by":"You","ts":"2025-09-21 10:10","text":"Thanks! Can you include microphones?"}
+            ]},
+            {"id": 102, "title": "Venue Harbor availability", "from": "Harbor 412", "preview": "Available on 10/15", "msgs":[
+                {"by":"Harbor 412","ts":"2025-09-20 14:01","text":"We are available on 10/15."}
+            ]},
+        ],
+        "Sent": [
+            {"id": 201, "title": "Follow-up: Photography", "from": "Vertex 161", "preview": "Sharing brief...", "msgs":[
+                {"by":"You","ts":"2025-09-18 16:00","text":"Sharing brief for photography needs."}
+            ]},
+        ],
+        "Archived": []
+    }
+def _seed_broadcast_log():
+    return [
+        {"sent_at":"2025-09-21 17:05", "segment":"All Vendors", "subject":"Platform maintenance",
+         "body":"Short notice: maintenance 02:00–03:00 UTC.", "via":"Email"}
+    ]
+def _seed_admin_disputes():
+    return [
+        {"id": 9001, "created":"2025-09-22 11:10", "type":"Payment", "from":"Helix 238",
+         "against":"Harbor 412", "summary":"Refund disagreement (TXN-004)", "status":"Open"},
+        {"id": 9002, "created":"2025-09-23 09:45", "type":"Content", "from":"Vertex 161",
+         "against":"Radiant 179", "summary":"Misleading portfolio images", "status":"Under review"},
+    ]
+def _seed_promo_campaigns():
+    return [
+        {"id":7001, "name":"October Spotlight", "segment":"Venues", "budget":200, "status":"Active"},
+        {"id":7002, "name":"Boost – Photography", "segment":"Vendors (Photography)", "budget":150, "status":"Paused"},
+    ]
+def _seed_data_clients():
+    return [
+        {"id":3001, "name":"Acme Insights", "plan":"Pro (Monthly)", "status":"Active"},
+        {"id":3002, "name":"CivicData", "plan":"Basic (Annual)", "status":"Trial"},
+    ]
+
+# chave do session_state -> seed compartilhado
+SHARED_SEEDS = {
+    "admin_disputes": _seed_admin_disputes,
+    "promo_campaigns": _seed_promo_campaigns,
+    "data_clients": _seed_data_clients,
+}
@@ -0,0 +1,137 @@
+# =====================
+#  SHARED SEED DATA
+# =====================
+# Dados de referência/demonstração que toda sessão começa vendo igual (disputas,
+# campanhas de promo, clientes B2B). Em vez de cada sessão guardar sua própria
+# cópia das listas/dicts, o processo guarda uma única `SharedTable` imutável
+# (tupla de MappingProxyType) e cada sessão só tem um `Overlay` copy-on-write com
+# o que ela mudou: patches por id e linhas novas. Ler devolve a base com os
+# patches aplicados; sem mudanças a sessão custa só o objeto do overlay.
+#   python -m vip.shared report --sessions 500   # bytes por sessão: cópia vs overlay
+import argparse
+import sys
+from functools import cached_property
+from types import MappingProxyType
+
+import pandas as pd
+
+
+class SharedTable:
+    """Linhas imutáveis, uma instância por processo."""
+
+    def __init__(self, rows, key: str = "id"):
+        self.key = key
+        self.rows = tuple(MappingProxyType(dict(r)) for r in rows)
+        self._by_key = MappingProxyType({r[key]: r for r in self.rows})
+
+    def get(self, row_id):
+        return self._by_key.get(row_id)
+
+    @cached_property
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame([dict(r) for r in self.rows])
+
+
+class Overlay:
+    """Visão copy-on-write de uma SharedTable para uma sessão."""
+    __slots__ = ("base", "patches", "added")
+
+    def __init__(self, base: SharedTable):
+        self.base = base
+        self.patches: dict = {}     # id -> {coluna: valor} só do que difere da base
+        self.added: list = []
+
+    def __iter__(self):
+        patches = self.patches
+        for r in self.base.rows:
+            p = patches.get(r[self.base.key])
+            yield {**r, **p} if p else r
+        yield from self.added
+
+    def __len__(self):
+        return len(self.base.rows) + len(self.added)
+
+    def rows(self) -> list:
+        return list(self)
+
+    def update(self, row_id, **changes):
+        for r in self.added:
+            if r[self.base.key] == row_id:
+                r.update(changes)
+                return
+        base = self.base.get(row_id)
+        if base is None:
+            raise KeyError(row_id)
+        patch = {**self.patches.get(row_id, {}), **changes}
+        patch = {c: v for c, v in patch.items() if base.get(c) != v}
+        if patch:
+            self.patches[row_id] = patch
+        else:
+            self.patches.pop(row_id, None)
+
+    def append(self, row: dict):
+        self.added.append(dict(row))
+
+    def next_id(self, floor: int = 0) -> int:
+        return max([r[self.base.key] for r in self] + [floor]) + 1
+
+    def frame(self) -> pd.DataFrame:
+        if not self.patches and not self.added:
+            return self.base.frame       # compartilhado; quem exibe não altera
+        return pd.DataFrame([dict(r) for r in self])
+
+    def session_bytes(self) -> int:
+        """Memória própria da sessão (sem a base compartilhada)."""
+        return deep_size(self, skip={id(self.base)})
+
+
+def deep_size(obj, skip=None) -> int:
+    """sys.getsizeof recursivo (dicts, listas, tuplas, sets, __slots__/__dict__)."""
+    seen = set(skip or ())
+    total, stack = 0, [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        if isinstance(o, pd.DataFrame):
+            total += int(o.memory_usage(deep=True, index=True).sum())
+            continue
+        total += sys.getsizeof(o)
+        if isinstance(o, (dict, MappingProxyType)):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        elif hasattr(o, "__slots__"):
+            stack.extend(getattr(o, s) for s in o.__slots__ if hasattr(o, s))
+        elif hasattr(o, "__dict__") and not isinstance(o, type):
+            stack.append(vars(o))
+    return total
+
+
+def memory_report(tables: dict, overlays: dict | None = None) -> pd.DataFrame:
+    """Bytes por sessão de cada seed: cópia própria (antes) vs overlay (agora)."""
+    rows = []
+    for name, table in tables.items():
+        overlay = (overlays or {}).get(name) or Overlay(table)
+        rows.append({"seed": name,
+                     "copy_per_session": deep_size([dict(r) for r in table.rows]),
+                     "overlay_per_session": overlay.session_bytes(),
+                     "shared_once": deep_size(table.rows)})
+    return pd.DataFrame(rows, columns=["seed", "copy_per_session", "overlay_per_session", "shared_once"])
+
+
+if __name__ == "__main__":
+    from vip import seeds
+
+    ap = argparse.ArgumentParser(description="Shared seed data tools")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rep = sub.add_parser("report", help="per-session memory of the seed data: copies vs overlays")
+    rep.add_argument("--sessions", type=int, default=500)
+    args = ap.parse_args()
+    report = memory_report({name: SharedTable(fn()) for name, fn in seeds.SHARED_SEEDS.items()})
+    print(report.to_string(index=False))
+    before = args.sessions * report["copy_per_session"].sum()
+    after = report["shared_once"].sum() + args.sessions * report["overlay_per_session"].sum()
+    print(f"\n{args.sessions} sessions: {before / 1024:,.1f} KB as copies -> {after / 1024:,.1f} KB shared + overlays")
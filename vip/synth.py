@@ -0,0 +1,63 @@
+# =====================
+#  SYNTHETIC CATALOG
+# =====================
+# Gera catálogos com o mesmo schema de data/marketplace_clean_numeric.csv
+# (distribuições parecidas) para testar o marketplace em 10k/100k/1M linhas.
+#   python -m vip.synth --rows 100000 --out /tmp/market_100k.csv
+import argparse
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["type", "name", "category", "city", "capacity", "price_range", "rating", "contact_email", "price"]
+NAME_PREFIXES = [
+    "Vertex", "Harbor", "Echo", "Vega", "Helix", "Comet", "Horizon", "Eclipse", "Orion", "Radiant",
+    "Momentum", "Galaxy", "Spectrum", "Mirage", "Odyssey", "Nova", "Nimbus", "Vista", "Lyra", "Summit",
+    "Pulse", "Zenith", "Oasis", "Nebula", "Cascade", "Astra", "Atlas", "Stratus", "Lynx", "Solstice",
+    "Cosmos", "Quantum", "Phoenix", "Aurora", "Crown", "Serenity", "Lumen",
+]
+CATEGORIES = ["AV", "Catering", "Community Hall", "Conference Center", "Decoration",
+              "Hotel", "Outdoor", "Photography", "Security", "Theater"]
+CITIES = ["Boston", "Toronto", "Vancouver", "Los Angeles", "New York", "Chicago", "Seattle"]
+CITY_WEIGHTS = [0.155, 0.148, 0.144, 0.144, 0.144, 0.139, 0.126]
+PRICE_TIERS = {"$": 50, "$$": 150, "$$$": 300, "$$$$": 500}
+
+
+def generate_catalog(rows: int, seed: int = 0, offset: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    is_venue = rng.random(rows) < 0.5
+    num = (offset + rng.permutation(rows) + 1).astype(str)  # sufixo único -> nomes/e-mails únicos
+    prefix = np.asarray(NAME_PREFIXES)[rng.integers(0, len(NAME_PREFIXES), rows)]
+    kind = np.where(is_venue, "Venue", "Vendor")
+    tiers = np.asarray(list(PRICE_TIERS))
+    tier = rng.integers(0, len(tiers), rows)
+    capacity = np.where(is_venue, rng.integers(100, 2001, rows), rng.integers(10, 101, rows))
+    return pd.DataFrame({
+        "type": kind,
+        "name": np.char.add(np.char.add(prefix, " "), num),
+        "category": np.asarray(CATEGORIES)[rng.integers(0, len(CATEGORIES), rows)],
+        "city": np.asarray(CITIES)[rng.choice(len(CITIES), rows, p=CITY_WEIGHTS)],
+        "capacity": capacity,
+        "price_range": tiers[tier],
+        "rating": rng.integers(30, 51, rows) / 10,
+        "contact_email": np.char.add(np.char.add(np.char.lower(kind), num), "@example.com"),
+        "price": np.asarray(list(PRICE_TIERS.values()))[tier],
+    }, columns=COLUMNS)
+
+
+def write_catalog(path, rows: int, seed: int = 0, chunk_rows: int = 250_000):
+    """Grava em blocos para não segurar o catálogo inteiro em memória."""
+    for i, start in enumerate(range(0, rows, chunk_rows)):
+        chunk = generate_catalog(min(chunk_rows, rows - start), seed=seed + i, offset=start)
+        chunk.to_csv(path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+    return path
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Generate a synthetic marketplace catalog")
+    ap.add_argument("--rows", type=int, default=10_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", required=True)
+    args = ap.parse_args()
+    write_catalog(args.out, args.rows, seed=args.seed)
+    print(f"wrote {args.rows:,} rows to {args.out}")
@@ -0,0 +1,214 @@
+# =====================
+#  TEXT INDEX ("Search by name or category")
+# =====================
+# Índice invertido de trigramas + índice de prefixo por palavra.
+#   - substring (>= 3 chars): interseção das listas de trigramas da consulta,
+#     depois confirmação do substring só nos candidatos
+#   - consultas curtas (1–2 chars): prefixo de palavra via busca binária nos tokens
+#   - tolerância a erro: score = fração dos trigramas da consulta presentes na
+#     linha ("catring" -> cat/rin/ing batem com "catering")
+# Linhas podem ser adicionadas/atualizadas/removidas sem reconstruir o índice;
+# `extend` acrescenta um bloco de linhas novas pelo mesmo caminho vetorizado da carga.
+# Índices em uso por outras sessões não devem ser alterados: `copy()` dá uma cópia
+# rasa (as listas de posições, únicas alteradas no lugar, são copiadas).
+import re
+from bisect import bisect_left, insort
+
+import numpy as np
+import pandas as pd
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+EXTEND_ROWS = 50_000    # linhas por bloco em `extend` (limita os temporários da carga)
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def _grams(text: str, n: int = 3):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class TextIndex:
+    def __init__(self, *columns):
+        self._docs = []        # row id -> tupla de campos em minúsculas (None = removida)
+        self._grams = {}       # trigrama -> row ids (np.ndarray da carga inicial ou list)
+        self._tokens = {}      # palavra -> row ids
+        self._sorted_tokens = []
+        self._frozen = {}      # cache trigrama/palavra -> np.ndarray ordenado
+        if columns:
+            self._bulk_load(columns)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def copy(self) -> "TextIndex":
+        out = TextIndex()
+        out._docs = list(self._docs)
+        out._grams = {k: list(p) if isinstance(p, list) else p for k, p in self._grams.items()}
+        out._tokens = {k: list(p) if isinstance(p, list) else p for k, p in self._tokens.items()}
+        out._sorted_tokens = list(self._sorted_tokens)
+        out._frozen = dict(self._frozen)
+        return out
+
+    def _bulk_load(self, columns, offset: int = 0):
+        # carga vetorizada: trigramas/palavras são extraídos uma vez por valor
+        # distinto de cada coluna e expandidos para as linhas com numpy
+        cols = [["" if f is None else str(f).lower() for f in col] for col in columns]
+        docs = list(zip(*cols))
+        self._docs.extend(docs)
+        n = len(docs)
+        for kind, extract, index in (("g", _grams, self._grams),
+                                     ("t", lambda s: set(_TOKEN_RE.findall(s)), self._tokens)):
+            vocab, pairs = {}, []
+            for vals in cols:
+                codes, uniques = pd.factorize(np.asarray(vals, dtype=object))
+                per_value = [[vocab.setdefault(k, len(vocab)) for k in extract(u)] for u in uniques]
+                lens = np.fromiter(map(len, per_value), dtype=np.int64, count=len(per_value))
+                flat = np.fromiter((k for ks in per_value for k in ks), dtype=np.int64, count=int(lens.sum()))
+                starts = np.cumsum(lens) - lens
+                row_lens = lens[codes]
+                total = int(row_lens.sum())
+                rows = np.repeat(np.arange(n, dtype=np.int64), row_lens)
+                offs = np.arange(total) - np.repeat(np.cumsum(row_lens) - row_lens, row_lens)
+                keys = flat[np.repeat(starts[codes], row_lens) + offs]
+                pairs.append(keys * max(n, 1) + rows)
+            if not vocab:
+                continue
+            pairs = np.sort(np.concatenate(pairs))  # agrupa por chave, row ids ordenados
+            pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]]
+            keys, rows = np.divmod(pairs, max(n, 1))
+            cuts = np.flatnonzero(np.diff(keys)) + 1
+            names = list(vocab)
+            if kind == "t":
+                added = [k for k in names if k not in index]
+            for key_id, posting in zip(keys[np.r_[0, cuts]], np.split(rows + offset, cuts)):
+                k = names[key_id]
+                old = index.get(k)
+                if isinstance(old, list):
+                    old.extend(posting.tolist())
+                    self._frozen.pop((kind, k), None)
+                    continue
+                if old is not None:         # ids novos > todos os antigos: continua ordenado
+                    posting = np.concatenate([old, posting])
+                index[k] = posting
+                self._frozen[(kind, k)] = posting
+            if kind == "t":
+                # lista já ordenada + bloco ordenado: o timsort só intercala as duas
+                self._sorted_tokens.extend(sorted(added))
+                self._sorted_tokens.sort()
+
+    def extend(self, start: int, *columns):
+        """Acrescenta as linhas start, start + 1, ... (um valor por linha em cada coluna)."""
+        if start == len(self._docs):
+            total = len(columns[0]) if columns else 0
+            for a in range(0, total, EXTEND_ROWS):
+                self._bulk_load([col[a:a + EXTEND_ROWS] for col in columns], offset=start + a)
+            return
+        for i, fields in enumerate(zip(*columns)):
+            self.add(start + i, *fields)
+
+    def _mutable(self, index, key):
+        p = index.get(key)
+        if not isinstance(p, list):
+            p = index[key] = [] if p is None else p.tolist()
+        return p
+
+    # ---- manutenção incremental ----
+    def _keys(self, fields):
+        grams, tokens = set(), set()
+        for f in fields:
+            grams |= _grams(f)
+            tokens.update(_TOKEN_RE.findall(f))
+        return grams, tokens
+
+    def add(self, row_id: int, *fields):
+        fields = tuple("" if f is None else str(f).lower() for f in fields)
+        if row_id < len(self._docs) and self._docs[row_id] is not None:
+            self.remove(row_id)
+        while len(self._docs) <= row_id:
+            self._docs.append(None)
+        self._docs[row_id] = fields
+        grams, tokens = self._keys(fields)
+        for g in grams:
+            self._mutable(self._grams, g).append(row_id)
+            self._frozen.pop(("g", g), None)
+        for t in tokens:
+            if t not in self._tokens:
+                insort(self._sorted_tokens, t)
+            self._mutable(self._tokens, t).append(row_id)
+            self._frozen.pop(("t", t), None)
+
+    update = add
+
+    def remove(self, row_id: int):
+        fields = self._docs[row_id] if row_id < len(self._docs) else None
+        if fields is None:
+            return
+        self._docs[row_id] = None
+        grams, tokens = self._keys(fields)
+        for g in grams:
+            self._mutable(self._grams, g).remove(row_id)
+            self._frozen.pop(("g", g), None)
+        for t in tokens:
+            self._mutable(self._tokens, t).remove(row_id)
+            self._frozen.pop(("t", t), None)
+
+    def _postings(self, kind, key):
+        arr = self._frozen.get((kind, key))
+        if arr is None:
+            src = (self._grams if kind == "g" else self._tokens).get(key, ())
+            arr = np.unique(np.asarray(src, dtype=np.int64))
+            self._frozen[(kind, key)] = arr
+        return arr
+
+    # ---- consultas ----
+    def prefix(self, q: str) -> np.ndarray:
+        """Row ids (ordenados) com alguma palavra começando por `q`."""
+        lo = bisect_left(self._sorted_tokens, q)
+        hi = bisect_left(self._sorted_tokens, q + "\uffff")
+        parts = [self._postings("t", t) for t in self._sorted_tokens[lo:hi]]
+        return np.unique(np.concatenate(parts)) if parts else _EMPTY
+
+    def match(self, q: str) -> np.ndarray:
+        """Row ids (ordenados) que contêm `q` em algum campo (prefixo de palavra se len < 3)."""
+        q = (q or "").strip().lower()
+        if not q:
+            return np.array([i for i, d in enumerate(self._docs) if d is not None], dtype=np.int64)
+        if len(q) < 3:
+            return self.prefix(q)
+
+        lists = sorted((self._postings("g", g) for g in _grams(q)), key=len)
+        ids = lists[0]
+        for other in lists[1:]:
+            if ids.size == 0:
+                break
+            ids = ids[np.isin(ids, other, assume_unique=True)]
+        docs = self._docs
+        return np.fromiter((i for i in ids if any(q in f for f in docs[i])), dtype=np.int64)
+
+    def fuzzy(self, q: str, min_score: float = 0.5):
+        """(row ids, scores) por sobreposição de trigramas; tolera erros de digitação."""
+        qg = _grams((q or "").strip().lower())
+        if not qg:
+            return _EMPTY, np.empty(0)
+        lists = [self._postings("g", g) for g in qg]
+        hits = np.concatenate(lists) if lists else _EMPTY
+        if hits.size == 0:
+            return _EMPTY, np.empty(0)
+        ids, counts = np.unique(hits, return_counts=True)
+        scores = counts / len(qg)
+        keep = scores >= min_score
+        return ids[keep], scores[keep]
+
+    def search(self, q: str, min_score: float = 0.5):
+        """Busca ranqueada: exatos primeiro (prefixo de palavra > substring), depois aproximados."""
+        q = (q or "").strip().lower()
+        exact = self.match(q)
+        ids = [exact]
+        scores = [2.0 + 0.5 * np.isin(exact, self.prefix(q), assume_unique=True)]
+        if len(q) >= 4:
+            f_ids, f_scores = self.fuzzy(q, min_score=min_score)
+            extra = ~np.isin(f_ids, exact, assume_unique=True)
+            ids.append(f_ids[extra])
+            scores.append(f_scores[extra])
+        ids, scores = np.concatenate(ids), np.concatenate(scores)
+        order = np.lexsort((ids, -scores))
+        return ids[order], scores[order]
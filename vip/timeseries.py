@@ -0,0 +1,171 @@
+# =====================
+#  TIME SERIES
+# =====================
+# Séries diárias/semanais do Analytics derivadas do SQLite:
+#   revenue   soma de `amount` das transações Completed por `date`
+#   rfps      nº de RFPs por dia de `submitted_at`
+#   signups   nº de contas por dia de `created_at`
+# Cada fonte vira um agregado diário (dias como inteiros + bincount), guardado
+# por processo. Quando só houve inserções desde o último agregado (ids novos,
+# total e versão batem) lemos só as linhas novas e somamos aos dias; update ou
+# remoção força a reconstrução. Os frames já reamostrados (D/W, período) ficam
+# em cache no próprio agregado, que é trocado a cada extensão.
+# `demo_series` é o gerador de demonstração (passeio aleatório com semente).
+#   python -m vip.timeseries revenue --freq W --days 180
+import argparse
+import threading
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from vip import db
+
+FREQS = {"D": None, "W": "W-MON"}   # semanas começando na segunda
+
+
+def _days(values: pd.Series) -> np.ndarray:
+    """'YYYY-MM-DD[ HH:MM]' -> dias desde 1970 (int64); inválidos saem como -1."""
+    ts = pd.to_datetime(values.astype("string").str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+    out = ts.to_numpy().astype("datetime64[D]").astype(np.int64)
+    return np.where(ts.isna().to_numpy(), -1, out)
+
+
+def _bin(days: np.ndarray, counts: np.ndarray, totals: np.ndarray) -> tuple:
+    keep = days >= 0
+    u, inv = np.unique(days[keep], return_inverse=True)
+    return (u, np.bincount(inv, weights=counts[keep], minlength=u.size).astype(np.int64),
+            np.bincount(inv, weights=totals[keep], minlength=u.size))
+
+
+@dataclass(frozen=True)
+class Source:
+    since: object           # after_id -> DataFrame com `id`
+    watermark: object       # -> (maior id, total[, versão])
+    prepare: object         # DataFrame -> (dias, valores) só das linhas que contam
+
+
+def _revenue(df):
+    done = (df["status"] == "Completed").to_numpy()
+    return _days(df["date"][done]), pd.to_numeric(df["amount"][done], errors="coerce").fillna(0).to_numpy(np.float64)
+
+
+def _counter(col):
+    def prepare(df):
+        days = _days(df[col])
+        return days, np.ones(days.size)
+    return prepare
+
+
+SOURCES = {
+    "revenue": Source(db.transactions_since, db.transactions_watermark, _revenue),
+    "rfps": Source(db.rfps_since, db.rfps_watermark, _counter("submitted_at")),
+    "signups": Source(db.signups_since, db.users_watermark, _counter("created_at")),
+}
+VALUE_COLUMN = {"revenue": "total", "rfps": "count", "signups": "count"}
+
+
+class DailyAgg:
+    """Contagem e soma por dia de uma fonte; imutável (extensões criam outro)."""
+
+    def __init__(self, days, count, total, last_id: int, rows: int, mark: tuple):
+        self.days, self.count, self.total = days, count, total
+        self.last_id, self.rows, self.mark = last_id, rows, mark
+        self._frames: dict = {}
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, prepare, mark: tuple) -> "DailyAgg":
+        empty = np.zeros(0, dtype=np.int64)
+        return cls(empty, empty, np.zeros(0), 0, 0, mark).extended(df, prepare, mark)
+
+    def extended(self, df: pd.DataFrame, prepare, mark: tuple) -> "DailyAgg":
+        if df.empty:
+            return DailyAgg(self.days, self.count, self.total, self.last_id, self.rows, mark)
+        d, v = prepare(df)
+        days, count, total = _bin(np.concatenate([self.days, d]),
+                                  np.concatenate([self.count, np.ones(d.size, dtype=np.int64)]),
+                                  np.concatenate([self.total, v]))
+        return DailyAgg(days, count, total, int(df["id"].max()), self.rows + len(df), mark)
+
+    def frame(self, freq: str = "D", start=None, end=None) -> pd.DataFrame:
+        """Frame contínuo (dias sem dados = 0) entre start e end, diário ou semanal."""
+        key = (freq, start, end)
+        hit = self._frames.get(key)
+        if hit is not None:
+            return hit
+        idx = pd.to_datetime(self.days, unit="D")
+        lo = pd.Timestamp(start) if start is not None else (idx[0] if self.days.size else None)
+        hi = pd.Timestamp(end) if end is not None else (idx[-1] if self.days.size else None)
+        if lo is None or hi is None or lo > hi:
+            out = pd.DataFrame({"count": pd.Series(dtype=np.int64), "total": pd.Series(dtype=np.float64)},
+                               index=pd.DatetimeIndex([], name="date"))
+        else:
+            out = (pd.DataFrame({"count": self.count, "total": self.total}, index=idx)
+                   .reindex(pd.date_range(lo, hi, freq="D"), fill_value=0))
+            if FREQS[freq]:
+                out = out.resample(FREQS[freq], label="left", closed="left").sum()
+            out.index.name = "date"
+        self._frames[key] = out
+        return out
+
+
+_CACHE: dict = {}   # (db path, métrica) -> DailyAgg
+_LOCK = threading.Lock()
+
+
+def _only_inserts(old: tuple, new: tuple, added: int) -> bool:
+    # versão (quando a fonte tem) sobe 1 por inserção; qualquer outra escrita a faz subir a mais
+    return len(new) < 3 or new[2] - old[2] == added
+
+
+def get_daily(metric: str) -> DailyAgg:
+    src = SOURCES[metric]
+    key = (str(db.current_path()), metric)
+    mark = src.watermark()
+    hit = _CACHE.get(key)
+    if hit is not None and hit.mark == mark:
+        return hit
+    with _LOCK:
+        hit = _CACHE.get(key)
+        if hit is not None and hit.mark == mark:
+            return hit
+        agg = None
+        if hit is not None and mark[0] >= hit.last_id:
+            new = src.since(hit.last_id)
+            agg = hit.extended(new, src.prepare, mark)
+            if agg.rows != mark[1] or not _only_inserts(hit.mark, mark, len(new)):
+                agg = None          # houve update/remoção: recalcula tudo
+        if agg is None:
+            agg = DailyAgg.build(src.since(0), src.prepare, mark)
+        _CACHE[key] = agg
+        return agg
+
+
+def series(metric: str, freq: str = "D", days: int | None = None, end=None) -> pd.DataFrame:
+    """Série pronta para st.line_chart: índice `date`, coluna `value`.
+    Com `days`, a janela termina em `end` (hoje) e dias sem dados entram como 0."""
+    end = pd.Timestamp(end or date.today()).normalize()
+    start = end - pd.Timedelta(days=days - 1) if days else None
+    frame = get_daily(metric).frame(freq, start, end if days else None)
+    return frame[[VALUE_COLUMN[metric]]].rename(columns={VALUE_COLUMN[metric]: "value"})
+
+
+def demo_series(days: int = 14, base: int = 100, volatility: int = 15, seed: int = 0, end=None) -> pd.DataFrame:
+    """Passeio aleatório com piso em 0 (como o demo antigo), vetorizado e estável por `seed`."""
+    rng = np.random.default_rng(seed)
+    walk = base + np.cumsum(rng.integers(-volatility, volatility + 1, days))
+    # max(0, v + passo) acumulado = passeio menos o menor valor negativo visto até ali
+    values = walk - np.minimum(np.minimum.accumulate(walk), 0)
+    end = pd.Timestamp(end or date.today()).normalize()
+    dates = pd.date_range(end - pd.Timedelta(days=days), periods=days, freq="D")
+    return pd.DataFrame({"date": dates.strftime("%Y-%m-%d"), "value": values})
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Print a time series from the VIP store")
+    ap.add_argument("metric", choices=sorted(SOURCES))
+    ap.add_argument("--freq", choices=sorted(FREQS), default="D")
+    ap.add_argument("--days", type=int, default=None, help="window ending today (default: all data)")
+    args = ap.parse_args()
+    print(series(args.metric, args.freq, args.days).to_string())